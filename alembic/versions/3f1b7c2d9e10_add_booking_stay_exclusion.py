@@ -0,0 +1,73 @@
+"""add booking stay range and overlap exclusion constraint
+
+Revision ID: 3f1b7c2d9e10
+Revises: e663ce676bc4
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1b7c2d9e10'
+down_revision: Union[str, None] = 'e663ce676bc4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Keep in sync with shared.utils.BOOKING_OVERLAP_CONSTRAINT
+CONSTRAINT_NAME = 'excl_bookings_room_stay'
+
+# NULL (never conflicts) when either bound is missing or the range is inverted,
+# matching the old check_in_at/expected_check_out_at comparison.
+STAY_EXPRESSION = (
+    "CASE WHEN check_in_at < expected_check_out_at "
+    "THEN tstzrange(check_in_at, expected_check_out_at, '[)') END"
+)
+
+OVERLAPPING_ACTIVE_BOOKINGS = """
+SELECT a.booking_id, b.booking_id
+FROM bookings a
+JOIN bookings b ON a.room_id = b.room_id AND a.booking_id < b.booking_id
+WHERE a.status = 'Active' AND b.status = 'Active' AND a.stay && b.stay
+LIMIT 20
+"""
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    op.execute(f"ALTER TABLE bookings ADD COLUMN stay tstzrange GENERATED ALWAYS AS ({STAY_EXPRESSION}) STORED")
+
+    conflicts = conn.execute(sa.text(OVERLAPPING_ACTIVE_BOOKINGS)).all()
+    if conflicts:
+        raise RuntimeError(
+            "Cannot add the booking overlap constraint: these Active bookings overlap on the same room "
+            f"{[tuple(row) for row in conflicts]}. Complete or cancel one of each pair and re-run."
+        )
+
+    # room_id WITH = needs btree_gist. Where the extension isn't installable, the
+    # single-value range [room_id, room_id] gives the same equality test with
+    # the built-in range operator class.
+    has_btree_gist = conn.execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'btree_gist'")
+    ).first() is not None
+    if has_btree_gist:
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        room_key = "room_id"
+    else:
+        room_key = "int4range(room_id, room_id, '[]')"
+
+    # The constraint's partial GiST index also serves the overlap lookups
+    op.execute(
+        f"ALTER TABLE bookings ADD CONSTRAINT {CONSTRAINT_NAME} "
+        f"EXCLUDE USING gist ({room_key} WITH =, stay WITH &&) WHERE (status = 'Active')"
+    )
+
+
+def downgrade() -> None:
+    op.execute(f"ALTER TABLE bookings DROP CONSTRAINT IF EXISTS {CONSTRAINT_NAME}")
+    op.drop_column('bookings', 'stay')
@@ -0,0 +1,41 @@
+"""add hotel daily stats
+
+Revision ID: 599143e2fc2d
+Revises: 99c2015reset
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '599143e2fc2d'
+down_revision: Union[str, None] = '99c2015reset'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Per-hotel, per-day rollup. Populate history afterwards with:
+    #   python -m scripts.backfill_daily_stats
+    op.create_table('hotel_daily_stats',
+    sa.Column('hotel_id', sa.Integer(), nullable=False),
+    sa.Column('stat_date', sa.Date(), nullable=False),
+    sa.Column('occupied_room_nights', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('arrivals', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('departures', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('revenue_total', sa.DECIMAL(precision=12, scale=2), nullable=False, server_default='0'),
+    sa.Column('revenue_cash', sa.DECIMAL(precision=12, scale=2), nullable=False, server_default='0'),
+    sa.Column('revenue_card', sa.DECIMAL(precision=12, scale=2), nullable=False, server_default='0'),
+    sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.ForeignKeyConstraint(['hotel_id'], ['hotels.hotel_id'], ),
+    sa.PrimaryKeyConstraint('hotel_id', 'stat_date')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('hotel_daily_stats')
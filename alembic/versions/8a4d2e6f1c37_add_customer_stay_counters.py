@@ -0,0 +1,51 @@
+"""add customer stay counters
+
+Revision ID: 8a4d2e6f1c37
+Revises: 3f1b7c2d9e10
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4d2e6f1c37'
+down_revision: Union[str, None] = '3f1b7c2d9e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('customers', sa.Column('total_stays', sa.Integer(), nullable=False, server_default='0'))
+    op.create_table('customer_hotel_stats',
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('hotel_id', sa.Integer(), nullable=False),
+    sa.Column('stay_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('last_visit', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.customer_id'], ),
+    sa.ForeignKeyConstraint(['hotel_id'], ['hotels.hotel_id'], ),
+    sa.PrimaryKeyConstraint('customer_id', 'hotel_id')
+    )
+
+    # Backfill here (not in a separate script) so lookups never see zero
+    # counters for existing guests. Same rules as shared.stats.
+    op.execute("""
+        INSERT INTO customer_hotel_stats (customer_id, hotel_id, stay_count, last_visit)
+        SELECT customer_id, hotel_id, COUNT(*), MAX(check_in_at)
+        FROM bookings
+        WHERE status NOT IN ('Cancelled')
+        GROUP BY customer_id, hotel_id
+    """)
+    op.execute("""
+        UPDATE customers c SET total_stays = s.stays
+        FROM (SELECT customer_id, SUM(stay_count) AS stays FROM customer_hotel_stats GROUP BY customer_id) s
+        WHERE s.customer_id = c.customer_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('customer_hotel_stats')
+    op.drop_column('customers', 'total_stays')
@@ -0,0 +1,43 @@
+"""add customer rating totals
+
+Revision ID: c5e9a1b4d2f8
+Revises: 8a4d2e6f1c37
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e9a1b4d2f8'
+down_revision: Union[str, None] = '8a4d2e6f1c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('customers', sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('customers', sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from existing feedback; customers without ratings keep their average_rating
+    op.execute("""
+        UPDATE customers c SET
+            rating_sum = f.rating_sum,
+            rating_count = f.rating_count,
+            average_rating = ROUND(CAST(f.rating_sum AS NUMERIC) / f.rating_count, 2)
+        FROM (
+            SELECT customer_id, SUM(rating) AS rating_sum, COUNT(*) AS rating_count
+            FROM customerfeedbacks
+            WHERE rating IS NOT NULL
+            GROUP BY customer_id
+        ) f
+        WHERE f.customer_id = c.customer_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('customers', 'rating_count')
+    op.drop_column('customers', 'rating_sum')
@@ -0,0 +1,48 @@
+"""add hotel settings version
+
+Revision ID: d7b3f9c2a6e4
+Revises: c5e9a1b4d2f8
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7b3f9c2a6e4'
+down_revision: Union[str, None] = 'c5e9a1b4d2f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Drives the ETag on GET /hotel/{id}
+    op.add_column('hotels', sa.Column('settings_version', sa.BigInteger(), nullable=False, server_default='0'))
+
+    # Bump on any direct change to the hotel row, whichever code path (or psql
+    # session) makes it. Availability bumps touch only availability_version
+    # and are skipped by the WHEN clause, so the hot booking path pays nothing.
+    op.execute("""
+        CREATE FUNCTION bump_hotel_settings_version() RETURNS trigger AS $$
+        BEGIN
+            NEW.settings_version := OLD.settings_version + 1;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_hotels_settings_version
+        BEFORE UPDATE ON hotels
+        FOR EACH ROW
+        WHEN (OLD.availability_version IS NOT DISTINCT FROM NEW.availability_version)
+        EXECUTE FUNCTION bump_hotel_settings_version()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_hotels_settings_version ON hotels")
+    op.execute("DROP FUNCTION IF EXISTS bump_hotel_settings_version()")
+    op.drop_column('hotels', 'settings_version')
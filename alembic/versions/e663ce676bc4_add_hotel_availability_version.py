@@ -0,0 +1,27 @@
+"""add hotel availability version
+
+Revision ID: e663ce676bc4
+Revises: 599143e2fc2d
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e663ce676bc4'
+down_revision: Union[str, None] = '599143e2fc2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Version counter that keeps the per-process availability index coherent across workers
+    op.add_column('hotels', sa.Column('availability_version', sa.BigInteger(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('hotels', 'availability_version')
@@ -0,0 +1,36 @@
+"""add idempotency keys
+
+Revision ID: f2a8c4e1b7d3
+Revises: d7b3f9c2a6e4
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a8c4e1b7d3'
+down_revision: Union[str, None] = 'd7b3f9c2a6e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('idempotency_keys',
+    sa.Column('hotel_id', sa.Integer(), nullable=False),
+    sa.Column('key', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('request_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=False),
+    sa.Column('response_body', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['hotel_id'], ['hotels.hotel_id'], ),
+    sa.PrimaryKeyConstraint('hotel_id', 'key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('idempotency_keys')
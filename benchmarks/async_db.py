@@ -0,0 +1,99 @@
+"""
+Sync vs async throughput for the room availability query.
+
+Mounts two endpoints that run the same shared.utils.find_available_rooms query:
+  /sync   - def route + Session(engine)        (how PMS routes worked before)
+  /async  - async def route + AsyncSession      (how the hot PMS routes work now)
+and drives each with N concurrent in-process clients.
+
+Sync routes are capped by Starlette's threadpool (40 slots by default), so once
+concurrency exceeds that, requests queue for a thread while others wait on
+Postgres. --db-latency-ms adds a pg_sleep() to each request to emulate the
+network round trip to a managed database.
+
+Usage:
+    python -m benchmarks.async_db --hotel-id 1 --requests 2000 --concurrency 200 --db-latency-ms 5
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from shared.database import engine, async_engine
+from shared.utils import find_available_rooms
+
+
+def build_app(hotel_id: int, db_latency: float) -> FastAPI:
+    app = FastAPI()
+    check_in_at = datetime.now(timezone.utc)
+    expected_check_out_at = check_in_at + timedelta(days=2)
+
+    @app.get("/sync")
+    def sync_route():
+        with Session(engine) as session:
+            if db_latency:
+                session.exec(text("SELECT pg_sleep(:s)").bindparams(s=db_latency))
+            return len(find_available_rooms(session, hotel_id, check_in_at, expected_check_out_at))
+
+    @app.get("/async")
+    async def async_route():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            if db_latency:
+                await session.exec(text("SELECT pg_sleep(:s)").bindparams(s=db_latency))
+            rooms = await session.run_sync(find_available_rooms, hotel_id, check_in_at, expected_check_out_at)
+            return len(rooms)
+
+    return app
+
+
+async def drive(client: httpx.AsyncClient, path: str, total: int, concurrency: int) -> dict:
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "route": path,
+        "requests": total,
+        "concurrency": concurrency,
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+async def main(args):
+    app = build_app(args.hotel_id, args.db_latency_ms / 1000)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up both pools before measuring
+        await drive(client, "/sync", 50, 10)
+        await drive(client, "/async", 50, 10)
+        for path in ("/sync", "/async"):
+            print(await drive(client, path, args.requests, args.concurrency))
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotel-id", type=int, required=True)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    asyncio.run(main(parser.parse_args()))
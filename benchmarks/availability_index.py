@@ -0,0 +1,159 @@
+"""
+Room availability: SQL vs the in-memory index (shared/availability.py).
+
+Seeds a throwaway hotel with --rooms rooms and --bookings bookings (about a
+third of them Active, back to back per room over roughly two years), then times:
+
+  find_available_rooms   - find_available_rooms_sql() vs the engine
+  is_room_available      - the previous per-room overlap query vs the engine
+
+Engine timings include the per-request version check (one primary-key read);
+the first engine call, which loads the index, is reported separately. The
+throwaway hotel is deleted afterwards unless --keep is given.
+
+Usage:
+    python -m benchmarks.availability_index --rooms 500 --bookings 100000 --iterations 200
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import insert, text
+from sqlmodel import Session, select, func
+
+from shared.availability import availability_engine
+from shared.database import engine
+from shared.models import Bookings, Customers, Hotels, HotelUsers, Rooms
+from shared.utils import find_available_rooms, find_available_rooms_sql, is_room_available
+
+SEED_BATCH = 10_000
+
+
+def seed(session: Session, rooms: int, bookings: int) -> int:
+    hotel = Hotels(name="Availability Bench", address="-", terms_and_conditions="-")
+    session.add(hotel)
+    session.flush()
+    user = HotelUsers(hotel_id=hotel.hotel_id, username=f"bench-{hotel.hotel_id}@bench.test", password_hash="-", full_name="Bench")
+    customer = Customers(gov_id=f"BENCH-{hotel.hotel_id}", first_name="Bench", last_name="Guest")
+    session.add(user)
+    session.add(customer)
+    session.flush()
+
+    room_ids = session.exec(
+        insert(Rooms).returning(Rooms.room_id),
+        params=[{"hotel_id": hotel.hotel_id, "room_number": str(100 + i), "room_type": "D", "rate": Decimal("90.00"), "status": "A"}
+                for i in range(rooms)],
+    ).scalars().all()
+
+    # Back-to-back stays per room (with random gaps) so the seed never trips
+    # the bookings overlap constraint
+    rng = random.Random(7)
+    base = datetime.now(timezone.utc) - timedelta(days=365)
+    next_free = {room_id: base for room_id in room_ids}
+    rows = []
+    for i in range(bookings):
+        room_id = room_ids[i % len(room_ids)]
+        check_in = next_free[room_id] + timedelta(hours=rng.randrange(0, 36))
+        check_out = check_in + timedelta(days=rng.randint(1, 4))
+        next_free[room_id] = check_out
+        rows.append({
+            "hotel_id": hotel.hotel_id, "customer_id": customer.customer_id, "room_id": room_id,
+            "created_by_user_id": user.user_id, "check_in_at": check_in, "expected_check_out_at": check_out,
+            "total_amount": Decimal("180.00"), "status": "Active" if i % 3 == 0 else "Completed",
+        })
+        if len(rows) == SEED_BATCH:
+            session.exec(insert(Bookings), params=rows)
+            rows = []
+    if rows:
+        session.exec(insert(Bookings), params=rows)
+    session.commit()
+    return hotel.hotel_id
+
+
+def cleanup(session: Session, hotel_id: int) -> None:
+    for table in ("bookings", "rooms", "hotel_daily_stats", "hotelusers"):
+        session.exec(text(f"DELETE FROM {table} WHERE hotel_id = :hotel_id").bindparams(hotel_id=hotel_id))
+    session.exec(text("DELETE FROM customers WHERE gov_id = :gov_id").bindparams(gov_id=f"BENCH-{hotel_id}"))
+    session.exec(text("DELETE FROM hotels WHERE hotel_id = :hotel_id").bindparams(hotel_id=hotel_id))
+    session.commit()
+
+
+def timed(fn, iterations: int, windows) -> dict:
+    latencies = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        fn(*windows[i % len(windows)])
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(latencies[len(latencies) // 2], 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 3),
+    }
+
+
+def legacy_is_room_available(session: Session, room_id: int, check_in_at: datetime, expected_check_out_at: datetime) -> bool:
+    statement = select(Bookings).where(
+        Bookings.room_id == room_id,
+        Bookings.status == "Active",
+        Bookings.check_in_at < expected_check_out_at,
+        Bookings.expected_check_out_at > check_in_at,
+    )
+    return session.exec(statement).first() is None
+
+
+def main(args):
+    with Session(engine) as session:
+        started = time.perf_counter()
+        hotel_id = seed(session, args.rooms, args.bookings)
+        seeded_s = time.perf_counter() - started
+        try:
+            room_ids = session.exec(select(Rooms.room_id).where(Rooms.hotel_id == hotel_id)).all()
+            rng = random.Random(11)
+            now = datetime.now(timezone.utc)
+            windows = []
+            for _ in range(64):
+                start = now + timedelta(hours=rng.randrange(-24 * 180, 24 * 180))
+                windows.append((start, start + timedelta(days=rng.randint(1, 5))))
+            room_windows = [(rng.choice(room_ids), start, end) for start, end in windows]
+
+            # Both paths must agree before their timings mean anything
+            for start, end in windows[:8]:
+                sql = [r.room_id for r in find_available_rooms_sql(session, hotel_id, start, end)]
+                mem = [r.room_id for r in find_available_rooms(session, hotel_id, start, end)]
+                assert sorted(sql) == mem, "engine and SQL disagree on find_available_rooms"
+            for room_id, start, end in room_windows[:32]:
+                assert legacy_is_room_available(session, room_id, start, end) == is_room_available(session, room_id, start, end)
+
+            availability_engine.invalidate(hotel_id)
+            load_started = time.perf_counter()
+            availability_engine.get_index(session, hotel_id)
+            load_ms = (time.perf_counter() - load_started) * 1000
+
+            active = session.exec(select(func.count()).where(Bookings.hotel_id == hotel_id, Bookings.status == "Active")).one()
+            print({"rooms": args.rooms, "bookings": args.bookings, "active": active,
+                   "seed_s": round(seeded_s, 1), "index_load_ms": round(load_ms, 1)})
+            results = {
+                "find_available_rooms/sql": timed(lambda s, e: find_available_rooms_sql(session, hotel_id, s, e), args.iterations, windows),
+                "find_available_rooms/index": timed(lambda s, e: find_available_rooms(session, hotel_id, s, e), args.iterations, windows),
+                "is_room_available/sql": timed(lambda r, s, e: legacy_is_room_available(session, r, s, e), args.iterations, room_windows),
+                "is_room_available/index": timed(lambda r, s, e: is_room_available(session, r, s, e), args.iterations, room_windows),
+            }
+            for name, result in results.items():
+                print(name, result)
+        finally:
+            session.rollback()
+            if not args.keep:
+                cleanup(session, hotel_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="Leave the seeded hotel in place")
+    main(parser.parse_args())
@@ -0,0 +1,397 @@
+"""
+Load test for the PMS hot paths, with results saved as JSON for comparing commits.
+
+Seeds throwaway hotels into the database at DATABASE_URL:
+- --hotels hotels, each with --rooms rooms and --bookings past bookings
+  (back to back per room)
+- about half of each hotel's rooms occupied right now
+- --customers shared guests
+
+Then it drives each scenario with --concurrency concurrent clients:
+
+  login            POST /auth/login                    (identity)
+  available        GET  /rooms/available               (pms)
+  create_booking   POST /bookings/                     (pms, --new-guest-share new guests)
+  lookup           GET  /bookings/customers/lookup     (pms)
+  checkout         POST /bookings/room/{id}/checkout   (pms, one per occupied room)
+  report           POST /reports/bookings              (reporting, 30 days of CSV)
+
+Requests go through the apps in-process (ASGI) by default, or over HTTP to
+running services with --identity-url / --pms-url / --reporting-url; the
+database is seeded directly either way.
+
+For every scenario it reports:
+- p50/p95/p99 latency
+- throughput
+- status codes
+- SQL statements and DB time per request, read from the Server-Timing
+  header (for the streamed report, only the statements run before the
+  first byte)
+
+The results file (default benchmarks/results/hot_paths-<time>-<commit>.json)
+records the commit and settings. --compare prints the change against an
+earlier results file. The seeded data is deleted afterwards unless --keep.
+
+Usage:
+    python -m benchmarks.hot_paths --hotels 2 --rooms 200 --customers 5000 --bookings 20000 \\
+        --requests 300 --concurrency 16
+    python -m benchmarks.hot_paths --only available,lookup --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import secrets
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import insert, text
+from sqlmodel import Session
+
+from shared.core.security import create_access_token, get_password_hash
+from shared.database import engine
+from shared.models import Bookings, Customers, Hotels, HotelUsers, Rooms
+from shared.stats import rebuild_daily_stats, reconcile_customer_stats
+
+SCENARIOS = ("login", "available", "create_booking", "lookup", "checkout", "report")
+PASSWORD = "hot-paths-bench"
+SEED_BATCH = 10_000
+SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+# --- Seed ---
+
+def seed(session: Session, tag: str, hotels: int, rooms: int, customers: int, bookings: int) -> dict:
+    rng = random.Random(7)
+    now = datetime.now(timezone.utc)
+    password_hash = get_password_hash(PASSWORD)
+
+    customer_ids = session.exec(
+        insert(Customers).returning(Customers.customer_id),
+        params=[{"gov_id": f"HPB-{tag}-{i}", "first_name": "Guest", "last_name": str(i), "phone": "0",
+                 "average_rating": Decimal("5.00")} for i in range(customers)],
+    ).scalars().all()
+
+    dataset = {"hotels": []}
+    for h in range(hotels):
+        hotel = Hotels(name=f"Hot Paths Bench {tag}", address="-", terms_and_conditions="-")
+        session.add(hotel)
+        session.flush()
+        user = HotelUsers(hotel_id=hotel.hotel_id, username=f"hpb-{tag}-{h}@bench.test",
+                          password_hash=password_hash, full_name="Bench")
+        session.add(user)
+        session.flush()
+
+        room_ids = session.exec(
+            insert(Rooms).returning(Rooms.room_id),
+            params=[{"hotel_id": hotel.hotel_id, "room_number": str(100 + i), "room_type": "D",
+                     "rate": Decimal("90.00"), "status": "A"} for i in range(rooms)],
+        ).scalars().all()
+
+        # History ends a week ago; every other room then gets a stay spanning now
+        next_free = {room_id: now - timedelta(days=365) for room_id in room_ids}
+        rows = []
+
+        def flush_rows():
+            if rows:
+                session.exec(insert(Bookings), params=rows)
+                rows.clear()
+
+        for i in range(bookings):
+            room_id = room_ids[i % len(room_ids)]
+            check_in = next_free[room_id] + timedelta(hours=rng.randrange(0, 36))
+            check_out = check_in + timedelta(days=rng.randint(1, 4))
+            if check_out > now - timedelta(days=7):
+                continue
+            next_free[room_id] = check_out
+            rows.append({
+                "hotel_id": hotel.hotel_id, "customer_id": rng.choice(customer_ids), "room_id": room_id,
+                "created_by_user_id": user.user_id, "check_in_at": check_in, "expected_check_out_at": check_out,
+                "actual_check_out_at": check_out, "total_amount": Decimal("180.00"), "cash_amount": Decimal("80.00"),
+                "card_amount": Decimal("100.00"), "status": "Completed",
+            })
+            if len(rows) == SEED_BATCH:
+                flush_rows()
+        occupied = room_ids[::2]
+        for room_id in occupied:
+            rows.append({
+                "hotel_id": hotel.hotel_id, "customer_id": rng.choice(customer_ids), "room_id": room_id,
+                "created_by_user_id": user.user_id, "check_in_at": now - timedelta(days=1),
+                "expected_check_out_at": now + timedelta(days=1), "total_amount": Decimal("180.00"),
+                "cash_amount": Decimal("180.00"), "card_amount": Decimal("0.00"), "status": "Active",
+            })
+        flush_rows()
+        session.exec(update_rooms_status(occupied))
+
+        rebuild_daily_stats(session, hotel.hotel_id)
+        dataset["hotels"].append({
+            "hotel_id": hotel.hotel_id, "user_id": user.user_id, "username": user.username,
+            "room_ids": list(room_ids), "occupied": list(occupied),
+        })
+    reconcile_customer_stats(session)
+    session.commit()
+    dataset["gov_ids"] = [f"HPB-{tag}-{i}" for i in range(customers)]
+    return dataset
+
+
+def update_rooms_status(room_ids: List[int]):
+    return text("UPDATE rooms SET status = 'O' WHERE room_id = ANY(:room_ids)").bindparams(room_ids=room_ids)
+
+
+def cleanup(session: Session, tag: str, hotel_ids: List[int]) -> None:
+    session.rollback()
+    for table in ("customerfeedbacks", "idempotency_keys", "bookings", "customer_hotel_stats",
+                  "customer_notes", "rooms", "hotel_daily_stats", "hotelusers", "hotels"):
+        session.exec(text(f"DELETE FROM {table} WHERE hotel_id = ANY(:hotel_ids)").bindparams(hotel_ids=hotel_ids))
+    session.exec(text("DELETE FROM customers WHERE gov_id LIKE :prefix").bindparams(prefix=f"HPB-{tag}-%"))
+    session.commit()
+
+
+# --- Drive ---
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(request: Callable[[int], tuple], total: int, concurrency: int, warmup: int) -> dict:
+    for i in range(warmup):
+        client, method, url, kwargs = request(-1 - i)
+        await client.request(method, url, **kwargs)
+
+    latencies, queries, db_ms = [], [], []
+    statuses = Counter()
+    remaining = iter(range(total))
+
+    async def worker():
+        for i in remaining:
+            client, method, url, kwargs = request(i)
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] += 1
+            timing = SERVER_TIMING.search(response.headers.get("server-timing", ""))
+            if timing:
+                db_ms.append(float(timing.group(1)))
+                queries.append(int(timing.group(2)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(total / wall, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "mean_queries": round(sum(queries) / len(queries), 2) if queries else None,
+        "mean_db_ms": round(sum(db_ms) / len(db_ms), 2) if db_ms else None,
+    }
+
+
+def client_for(app_import: Callable, url: Optional[str]) -> httpx.AsyncClient:
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=60)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app_import()), base_url="http://bench", timeout=60)
+
+
+def identity_app():
+    from services.identity.main import app
+    return app
+
+
+def pms_app():
+    from services.pms.main import app
+    return app
+
+
+def reporting_app():
+    from services.reporting.main import app
+    return app
+
+
+def build_requests(dataset: dict, clients: Dict[str, httpx.AsyncClient], tag: str,
+                   new_guest_share: float) -> Dict[str, Callable[[int], tuple]]:
+    hotels = dataset["hotels"]
+    headers = [{"Authorization": f"Bearer {create_access_token({'sub': str(h['user_id'])})}"} for h in hotels]
+    gov_ids = dataset["gov_ids"]
+    now = datetime.now(timezone.utc)
+    future = now + timedelta(days=400)
+    occupied = [(h, room_id) for h, hotel in enumerate(hotels) for room_id in hotel["occupied"]]
+    checkout_order = iter(occupied)
+
+    def login(i):
+        hotel = hotels[i % len(hotels)]
+        return clients["identity"], "POST", "/auth/login", {"data": {"username": hotel["username"], "password": PASSWORD}}
+
+    def available(i):
+        rng = random.Random(i)
+        start = now + timedelta(days=rng.randrange(-60, 120))
+        params = {"check_in_at": start.isoformat(), "expected_check_out_at": (start + timedelta(days=rng.randint(1, 4))).isoformat()}
+        return clients["pms"], "GET", "/rooms/available", {"params": params, "headers": headers[i % len(hotels)]}
+
+    def create_booking(i):
+        # Each request gets its own (room, 3-day slot) far in the future, so nothing conflicts
+        h = i % len(hotels)
+        room_ids = hotels[h]["room_ids"]
+        slot = abs(i) // len(hotels)
+        start = future + timedelta(days=3 * (slot // len(room_ids)))
+        body = {
+            "room_id": room_ids[slot % len(room_ids)], "check_in_at": start.isoformat(),
+            "expected_check_out_at": (start + timedelta(days=2)).isoformat(), "status": "Active", "total_amount": 180,
+        }
+        if random.Random(i).random() >= new_guest_share:
+            body.update(guest_name="Bench Guest", guest_gov_id=random.Random(i).choice(gov_ids))
+        else:
+            body.update(guest_name="New Guest", guest_gov_id=f"HPB-{tag}-NEW-{i}")
+        if i < 0:  # warm-up slots go to a later block
+            body["check_in_at"] = (start + timedelta(days=200)).isoformat()
+            body["expected_check_out_at"] = (start + timedelta(days=202)).isoformat()
+        return clients["pms"], "POST", "/bookings/", {"json": body, "headers": headers[h]}
+
+    def lookup(i):
+        params = {"gov_id": random.Random(i).choice(gov_ids)}
+        return clients["pms"], "GET", "/bookings/customers/lookup", {"params": params, "headers": headers[i % len(hotels)]}
+
+    def checkout(i):
+        h, room_id = next(checkout_order)
+        body = {"rating": 4, "notes": "bench"} if i % 2 else {}
+        return clients["pms"], "POST", f"/bookings/room/{room_id}/checkout", {"json": body, "headers": headers[h]}
+
+    def report(i):
+        params = {"hotel_id": hotels[i % len(hotels)]["hotel_id"], "format": "csv",
+                  "start_date": (now - timedelta(days=30)).isoformat(), "end_date": now.isoformat()}
+        return clients["reporting"], "POST", "/reports/bookings", {"params": params}
+
+    return {"login": login, "available": available, "create_booking": create_booking,
+            "lookup": lookup, "checkout": checkout, "report": report}
+
+
+# --- Results ---
+
+def git_commit() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(status) if status is not None else None}
+
+
+def compare(current: dict, baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} ({(baseline['meta'].get('commit') or '?')[:10]})")
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before:
+            continue
+        changes = []
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "mean_queries"):
+            old, new = before.get(metric), result.get(metric)
+            if old and new is not None:
+                changes.append(f"{metric} {old} -> {new} ({(new - old) / old * 100:+.0f}%)")
+        print(f"  {name}: " + ", ".join(changes))
+
+
+async def drive_all(args, dataset: dict, tag: str, scenarios: List[str]) -> dict:
+    clients = {
+        "identity": client_for(identity_app, args.identity_url),
+        "pms": client_for(pms_app, args.pms_url),
+        "reporting": client_for(reporting_app, args.reporting_url),
+    }
+    requests = build_requests(dataset, clients, tag, args.new_guest_share)
+    occupied = sum(len(h["occupied"]) for h in dataset["hotels"])
+    results = {}
+    try:
+        for name in scenarios:
+            total, warmup = args.requests, args.warmup
+            if name == "login":
+                total = min(total, args.login_requests)
+            if name == "checkout":
+                # One checkout per occupied room, warm-up included
+                warmup = min(warmup, occupied // 10)
+                total = min(total, occupied - warmup)
+            results[name] = await run_scenario(requests[name], total, args.concurrency, warmup)
+            print(name, results[name])
+    finally:
+        for client in clients.values():
+            await client.aclose()
+    return results
+
+
+def main(args):
+    scenarios = args.only.split(",") if args.only else list(SCENARIOS)
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    tag = secrets.token_hex(3).upper()
+    with Session(engine) as session:
+        started = time.perf_counter()
+        dataset = seed(session, tag, args.hotels, args.rooms, args.customers, args.bookings)
+        seed_s = round(time.perf_counter() - started, 1)
+        hotel_ids = [h["hotel_id"] for h in dataset["hotels"]]
+        print({"tag": tag, "hotel_ids": hotel_ids, "seed_s": seed_s})
+        try:
+            scenario_results = asyncio.run(drive_all(args, dataset, tag, scenarios))
+        finally:
+            if not args.keep:
+                cleanup(session, tag, hotel_ids)
+
+    result = {
+        "meta": {
+            **git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "target": "http" if args.pms_url else "in-process",
+            "settings": {name: getattr(args, name) for name in (
+                "hotels", "rooms", "customers", "bookings", "requests", "login_requests", "new_guest_share", "concurrency", "warmup")},
+            "seed_s": seed_s,
+        },
+        "scenarios": scenario_results,
+    }
+    output = args.output or os.path.join(
+        "benchmarks", "results",
+        f"hot_paths-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{(result['meta']['commit'] or 'nogit')[:10]}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"results written to {output}")
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=2)
+    parser.add_argument("--rooms", type=int, default=200, help="Rooms per hotel")
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--bookings", type=int, default=20_000, help="Past bookings per hotel")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=50, help="Cap for the login scenario (bcrypt-bound)")
+    parser.add_argument("--new-guest-share", type=float, default=0.5, help="Share of create_booking requests for new guests")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=10, help="Unrecorded requests before each scenario")
+    parser.add_argument("--only", help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--identity-url", help="Drive a running identity service instead of in-process")
+    parser.add_argument("--pms-url", help="Drive a running PMS service instead of in-process")
+    parser.add_argument("--reporting-url", help="Drive a running reporting service instead of in-process")
+    parser.add_argument("--output", help="Results file (default benchmarks/results/hot_paths-<time>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to print changes against")
+    parser.add_argument("--keep", action="store_true", help="Leave the seeded data in place")
+    main(parser.parse_args())
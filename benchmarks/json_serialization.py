@@ -0,0 +1,103 @@
+"""
+Serialization cost per 1k rows: FastAPI's default paths vs shared/responses.py.
+
+For Rooms (as RoomRead) and Bookings (all model fields) it times:
+
+  response_model   - what a route with response_model does: validate every
+                     row against the schema, then dump to JSON bytes
+  jsonable_encoder - what a route returning dicts of ORM objects does
+                     (get_customer_history): jsonable_encoder + json.dumps
+  fast             - project() + FastJSONResponse (orjson)
+
+and checks the fast path produces the same JSON as the path it replaces.
+
+Usage:
+    python -m benchmarks.json_serialization --rows 1000 --repeat 200
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_model_field
+
+from shared.models import Bookings, Rooms
+from shared.responses import FastJSONResponse, project
+from shared.schemas import RoomRead
+
+
+def make_rooms(n: int) -> List[Rooms]:
+    return [
+        Rooms(room_id=i, hotel_id=1, room_number=str(100 + i), room_type="Double", rate=Decimal("89.50"), status="A")
+        for i in range(1, n + 1)
+    ]
+
+
+def make_bookings(n: int) -> List[Bookings]:
+    base = datetime(2026, 1, 1, 14, tzinfo=timezone.utc)
+    return [
+        Bookings(
+            booking_id=i, hotel_id=1, customer_id=i % 500 + 1, room_id=i % 300 + 1, created_by_user_id=1,
+            check_in_at=base + timedelta(hours=i), expected_check_out_at=base + timedelta(hours=i + 48),
+            actual_check_out_at=None, total_amount=Decimal("180.00"), cash_amount=Decimal("80.00"),
+            card_amount=Decimal("100.00"), status="Completed",
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {"p50_ms": round(samples[len(samples) // 2], 3), "mean_ms": round(statistics.fmean(samples), 3)}
+
+
+def main(args):
+    rooms = make_rooms(args.rows)
+    bookings = make_bookings(args.rows)
+    room_field = create_model_field("response", List[RoomRead], mode="serialization")
+
+    def room_response_model():
+        value, errors = room_field.validate(rooms, {}, loc=("response",))
+        return room_field.serialize_json(value)
+
+    def room_encoder():
+        return JSONResponse(jsonable_encoder(rooms)).body
+
+    def room_fast():
+        return FastJSONResponse(project(rooms, RoomRead)).body
+
+    def booking_encoder():
+        return JSONResponse(jsonable_encoder({"bookings_history": bookings})).body
+
+    def booking_fast():
+        return FastJSONResponse({"bookings_history": project(bookings, Bookings)}).body
+
+    assert json.loads(room_response_model()) == json.loads(room_fast())
+    assert json.loads(booking_encoder()) == json.loads(booking_fast())
+
+    print({"rows": args.rows, "repeat": args.repeat})
+    for name, fn in (
+        ("rooms/response_model", room_response_model),
+        ("rooms/jsonable_encoder", room_encoder),
+        ("rooms/fast", room_fast),
+        ("bookings/jsonable_encoder", booking_encoder),
+        ("bookings/fast", booking_fast),
+    ):
+        print(name, timed(fn, args.repeat))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    main(parser.parse_args())
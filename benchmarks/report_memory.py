@@ -0,0 +1,104 @@
+"""
+Peak RSS of the booking CSV report.
+
+Streams N bookings through the reporting pipeline and discards the output,
+then prints peak resident memory and time-to-first-chunk. Each run should be
+a fresh process since ru_maxrss is a high-water mark.
+
+Sources:
+  synthetic  - generated booking tuples, no database needed
+  db         - iter_booking_batches() against DATABASE_URL (seed the hotel first)
+
+--format picks the encoder (csv, parquet, arrow) for the streaming modes.
+
+--legacy runs the previous implementation (pandas DataFrame + StringIO) on
+synthetic rows for comparison; it needs pandas installed.
+
+Usage:
+    python -m benchmarks.report_memory --rows 1000000
+    python -m benchmarks.report_memory --rows 1000000 --format parquet
+    python -m benchmarks.report_memory --rows 1000000 --legacy
+    python -m benchmarks.report_memory --source db --hotel-id 1
+"""
+import argparse
+import io
+import resource
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from services.reporting.main import BOOKING_COLUMNS, REPORT_BATCH_SIZE, REPORT_FORMATS, iter_booking_batches
+
+
+def synthetic_batches(rows: int, batch_size: int):
+    base = datetime(2020, 1, 1, 14, tzinfo=timezone.utc)
+    batch = []
+    for i in range(1, rows + 1):
+        check_in = base + timedelta(hours=i % 50000)
+        batch.append((
+            i, 1, i % 20000 + 1, i % 300 + 1, 1, 2,
+            check_in, check_in + timedelta(days=2), check_in + timedelta(days=2),
+            Decimal("180.00"), Decimal("80.00"), Decimal("100.00"), "Completed",
+        ))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def legacy_report(rows: int) -> int:
+    import pandas as pd
+
+    columns = [c.name for c in BOOKING_COLUMNS]
+    data = [dict(zip(columns, row)) for batch in synthetic_batches(rows, REPORT_BATCH_SIZE) for row in batch]
+    df = pd.DataFrame(data)
+    stream = io.StringIO()
+    df.to_csv(stream, index=False)
+    return len(stream.getvalue())
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(args):
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    first_chunk = None
+
+    if args.legacy:
+        total_bytes = legacy_report(args.rows)
+        first_chunk = time.perf_counter() - started
+    else:
+        if args.source == "db":
+            batches = iter_booking_batches(args.hotel_id)
+        else:
+            batches = synthetic_batches(args.rows, REPORT_BATCH_SIZE)
+        encode = REPORT_FORMATS[args.format][0]
+        total_bytes = 0
+        for chunk in encode(batches):
+            if first_chunk is None:
+                first_chunk = time.perf_counter() - started
+            total_bytes += len(chunk)
+
+    print({
+        "mode": "legacy-pandas" if args.legacy else f"streaming-{args.source}-{args.format}",
+        "rows": args.rows if args.source == "synthetic" else None,
+        "output_mb": round(total_bytes / 1024 / 1024, 1),
+        "elapsed_s": round(time.perf_counter() - started, 2),
+        "time_to_first_chunk_s": round(first_chunk or 0, 3),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--source", choices=["synthetic", "db"], default="synthetic")
+    parser.add_argument("--hotel-id", type=int)
+    parser.add_argument("--format", choices=sorted(REPORT_FORMATS), default="csv")
+    parser.add_argument("--legacy", action="store_true")
+    main(parser.parse_args())
@@ -0,0 +1,85 @@
+"""
+Per-request cost of the request middleware (shared/middleware.py).
+
+Drives a one-route FastAPI app straight through its ASGI interface (no
+server or HTTP client in the loop) with:
+
+  none              - no middleware
+  base_http         - the previous BaseHTTPMiddleware exception logger
+  request_metrics   - RequestMetricsMiddleware (logging + latency/status metrics)
+
+and prints the mean microseconds per request for each.
+
+Usage:
+    python -m benchmarks.request_middleware --requests 20000
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from shared.metrics import RequestMetrics
+from shared.middleware import RequestMetricsMiddleware
+
+
+class BaseHTTPLogMiddleware(BaseHTTPMiddleware):
+    """The exception logger RequestMetricsMiddleware replaced."""
+
+    async def dispatch(self, request: Request, call_next):
+        try:
+            return await call_next(request)
+        except Exception:
+            raise
+
+
+def make_app(middleware) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/rooms/{room_id}")
+    async def get_room(room_id: int):
+        return {"room_id": room_id}
+
+    if middleware is RequestMetricsMiddleware:
+        app.add_middleware(RequestMetricsMiddleware, metrics=RequestMetrics())
+    elif middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+
+async def drive(app: FastAPI, requests: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/rooms/7", "raw_path": b"/rooms/7", "root_path": "",
+        "query_string": b"", "headers": [(b"host", b"bench")], "server": ("bench", 80), "client": ("127.0.0.1", 1),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):  # warm up (route compilation, first-call caches)
+        await app(dict(scope), receive, send)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main(args):
+    print({"requests": args.requests})
+    for name, middleware in (
+        ("none", None),
+        ("base_http", BaseHTTPLogMiddleware),
+        ("request_metrics", RequestMetricsMiddleware),
+    ):
+        print(name, {"us_per_request": round(asyncio.run(drive(make_app(middleware), args.requests)), 1)})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    main(parser.parse_args())
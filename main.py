@@ -5,6 +5,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlmodel import SQLModel
 
 from shared.database import engine
+from shared.utils import BOOKING_OVERLAP_CONSTRAINT
 
 # Corrected Imports from Services
 from services.identity.routes import users, auth
@@ -29,6 +30,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Logging & Metrics Middleware ---
+from shared.middleware import RequestMetricsMiddleware
+app.add_middleware(RequestMetricsMiddleware)
+
 # --- Routers ---
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(users.router, prefix="/users", tags=["hotelusers"])
@@ -42,6 +47,18 @@ app.include_router(rooms.router, prefix="/rooms", tags=["Rooms"])
 def root():
     return {"message": "Backend is running!"}
 
+# --- Metrics ---
+from shared.database import pool_stats
+from shared.middleware import prometheus_metrics
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return prometheus_metrics()
+
+@app.get("/metrics/pool")
+def pool_metrics():
+    return pool_stats()
+
 if __name__ == "__main__":
     import uvicorn
     import os
@@ -49,8 +66,21 @@ if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=port, reload=False)
 
 
+# --- Shutdown: stop the password hashing pool ---
+@app.on_event("shutdown")
+def on_shutdown():
+    from shared.core.security import password_hasher
+    password_hasher.shutdown()
+
 # --- Startup: create tables ---
 # --- Startup: create tables ---
+def _has_column(conn, table: str, column: str) -> bool:
+    from sqlalchemy import text
+    return conn.execute(
+        text("SELECT 1 FROM information_schema.columns WHERE table_name = :table AND column_name = :column"),
+        {"table": table, "column": column},
+    ).first() is not None
+
 @app.on_event("startup")
 def on_startup():
     SQLModel.metadata.create_all(engine)
@@ -73,4 +103,110 @@ def on_startup():
             conn.commit()
             print("MANUAL MIGRATION SUCCESS: Address columns added.")
         except Exception as e:
-            print(f"Manual migration warning (might already exist): {e}")    
\ No newline at end of file
+            print(f"Manual migration warning (might already exist): {e}")
+
+    # --- BOOKING OVERLAP CONSTRAINT (mirrors alembic 3f1b7c2d9e10) ---
+    # Overlap protection and the b.stay queries depend on these, so unlike the
+    # patch above a failure here stops startup instead of being printed.
+    with engine.begin() as conn:
+        conn.execute(text(
+            "ALTER TABLE bookings ADD COLUMN IF NOT EXISTS stay tstzrange GENERATED ALWAYS AS "
+            "(CASE WHEN check_in_at < expected_check_out_at "
+            "THEN tstzrange(check_in_at, expected_check_out_at, '[)') END) STORED"
+        ))
+        has_constraint = conn.execute(
+            text("SELECT 1 FROM pg_constraint WHERE conname = :name"),
+            {"name": BOOKING_OVERLAP_CONSTRAINT},
+        ).first() is not None
+        if not has_constraint:
+            has_btree_gist = conn.execute(
+                text("SELECT 1 FROM pg_available_extensions WHERE name = 'btree_gist'")
+            ).first() is not None
+            if has_btree_gist:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+                room_key = "room_id"
+            else:
+                room_key = "int4range(room_id, room_id, '[]')"
+            # Fails if Active bookings already overlap: resolve them and restart
+            conn.execute(text(
+                f"ALTER TABLE bookings ADD CONSTRAINT {BOOKING_OVERLAP_CONSTRAINT} "
+                f"EXCLUDE USING gist ({room_key} WITH =, stay WITH &&) WHERE (status = 'Active')"
+            ))
+            print(f"MANUAL MIGRATION SUCCESS: {BOOKING_OVERLAP_CONSTRAINT} added.")
+
+    # --- HOTEL AVAILABILITY VERSION (mirrors alembic e663ce676bc4) ---
+    # create_all doesn't add columns to existing tables; every booking write
+    # bumps this counter, so it is required like the constraint above.
+    with engine.begin() as conn:
+        if not _has_column(conn, "hotels", "availability_version"):
+            conn.execute(text("ALTER TABLE hotels ADD COLUMN availability_version BIGINT NOT NULL DEFAULT 0"))
+            print("MANUAL MIGRATION SUCCESS: hotels.availability_version added.")
+
+    # --- CUSTOMER STAY COUNTERS (mirrors alembic 8a4d2e6f1c37) ---
+    # customer_hotel_stats itself comes from create_all; both are backfilled
+    # when the column is first added, so lookups never see zero counters.
+    with engine.begin() as conn:
+        if not _has_column(conn, "customers", "total_stays"):
+            conn.execute(text("ALTER TABLE customers ADD COLUMN total_stays INTEGER NOT NULL DEFAULT 0"))
+            conn.execute(text("""
+                INSERT INTO customer_hotel_stats AS s (customer_id, hotel_id, stay_count, last_visit)
+                SELECT customer_id, hotel_id, COUNT(*), MAX(check_in_at)
+                FROM bookings
+                WHERE status NOT IN ('Cancelled')
+                GROUP BY customer_id, hotel_id
+                ON CONFLICT (customer_id, hotel_id) DO UPDATE
+                SET stay_count = EXCLUDED.stay_count, last_visit = EXCLUDED.last_visit
+            """))
+            conn.execute(text("""
+                UPDATE customers c SET total_stays = s.stays
+                FROM (SELECT customer_id, SUM(stay_count) AS stays FROM customer_hotel_stats GROUP BY customer_id) s
+                WHERE s.customer_id = c.customer_id
+            """))
+            print("MANUAL MIGRATION SUCCESS: customer stay counters added.")
+
+    # --- CUSTOMER RATING TOTALS (mirrors alembic c5e9a1b4d2f8) ---
+    with engine.begin() as conn:
+        if not _has_column(conn, "customers", "rating_sum"):
+            conn.execute(text("ALTER TABLE customers ADD COLUMN rating_sum INTEGER NOT NULL DEFAULT 0"))
+            conn.execute(text("ALTER TABLE customers ADD COLUMN rating_count INTEGER NOT NULL DEFAULT 0"))
+            # Customers without ratings keep their average_rating
+            conn.execute(text("""
+                UPDATE customers c SET
+                    rating_sum = f.rating_sum,
+                    rating_count = f.rating_count,
+                    average_rating = ROUND(CAST(f.rating_sum AS NUMERIC) / f.rating_count, 2)
+                FROM (
+                    SELECT customer_id, SUM(rating) AS rating_sum, COUNT(*) AS rating_count
+                    FROM customerfeedbacks
+                    WHERE rating IS NOT NULL
+                    GROUP BY customer_id
+                ) f
+                WHERE f.customer_id = c.customer_id
+            """))
+            print("MANUAL MIGRATION SUCCESS: customer rating totals added.")
+
+    # --- HOTEL SETTINGS VERSION (mirrors alembic d7b3f9c2a6e4) ---
+    # Drives the ETag on GET /hotel/{id}. The trigger is needed on fresh
+    # databases too: create_all makes the column but not the trigger.
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE hotels ADD COLUMN IF NOT EXISTS settings_version BIGINT NOT NULL DEFAULT 0"))
+        has_trigger = conn.execute(
+            text("SELECT 1 FROM pg_trigger WHERE tgname = 'trg_hotels_settings_version'")
+        ).first() is not None
+        if not has_trigger:
+            conn.execute(text("""
+                CREATE OR REPLACE FUNCTION bump_hotel_settings_version() RETURNS trigger AS $$
+                BEGIN
+                    NEW.settings_version := OLD.settings_version + 1;
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql
+            """))
+            conn.execute(text("""
+                CREATE TRIGGER trg_hotels_settings_version
+                BEFORE UPDATE ON hotels
+                FOR EACH ROW
+                WHEN (OLD.availability_version IS NOT DISTINCT FROM NEW.availability_version)
+                EXECUTE FUNCTION bump_hotel_settings_version()
+            """))
+            print("MANUAL MIGRATION SUCCESS: hotels.settings_version trigger added.")
@@ -0,0 +1,30 @@
+"""
+Rebuild hotel_daily_stats from bookings and customer feedback.
+
+Run once after the migration that creates the table, and any time the rollup
+needs repairing. Safe to run while the services are up.
+
+Usage:
+    python -m scripts.backfill_daily_stats             # all hotels
+    python -m scripts.backfill_daily_stats --hotel-id 1
+"""
+import argparse
+from sqlmodel import Session
+from shared.database import engine
+from shared.stats import rebuild_daily_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotel-id", type=int, default=None, help="Only rebuild this hotel")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        rows = rebuild_daily_stats(session, args.hotel_id)
+        session.commit()
+    scope = f"hotel {args.hotel_id}" if args.hotel_id is not None else "all hotels"
+    print(f"Rebuilt hotel_daily_stats for {scope}: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Check customers.rating_sum / rating_count against customer feedback.
+
+Prints every customer whose running totals disagree with their feedback rows
+and exits non-zero if any were found. With --fix, rewrites them (and
+average_rating) from the feedback table.
+
+Usage:
+    python -m scripts.check_customer_ratings
+    python -m scripts.check_customer_ratings --fix
+"""
+import argparse
+import sys
+from sqlmodel import Session
+from shared.database import engine
+from shared.stats import check_customer_ratings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fix", action="store_true", help="Rewrite drifted totals from feedback")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        drifted = check_customer_ratings(session, fix=args.fix)
+        session.commit()
+
+    for row in drifted:
+        print(row)
+    action = "fixed" if args.fix else "found"
+    print(f"{len(drifted)} customers with drifted rating totals {action}")
+    if drifted and not args.fix:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
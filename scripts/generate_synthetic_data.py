@@ -0,0 +1,390 @@
+"""
+Generate a large synthetic dataset for benchmarking and capacity planning.
+
+Creates, alongside whatever is already in the database:
+- --hotels hotels, each registered the way /auth/register does it: an owner
+  login, a layout_json of floors and rooms, receipt settings and the rooms
+  themselves
+- --customers customers, with gov_id "<prefix><customer_id>"
+- --bookings bookings spread evenly over all the rooms. Each room's stays
+  run back to back into the past and never overlap. About 60% of rooms
+  are occupied right now (Active, room status "O") and some have a future
+  reservation. Past stays are about 92% Completed and 8% Cancelled.
+- feedback on --feedback-share of the completed stays
+
+All rows are streamed into Postgres with COPY FROM STDIN by --workers
+processes. Primary keys come from the tables' own sequences: each range is
+reserved up front, so workers never coordinate. Indexes and the
+booking-overlap constraint stay in place and are checked during the load.
+
+Afterwards the derived tables are rebuilt in one pass each (skip with
+--skip-stats): hotel_daily_stats, customer_hotel_stats,
+customers.total_stays and the customer rating totals. The rebuilds cover
+every hotel, not only the generated ones: rebuild_daily_stats and
+reconcile_customer_stats take EXCLUSIVE locks on the whole
+hotel_daily_stats and customer_hotel_stats tables, so booking writes from
+the services wait until they commit. The script prints rows per minute for
+each phase.
+
+Run against a quiet database: sequences are advanced past the reserved
+ranges, but rows inserted concurrently by the services are not expected.
+
+Usage:
+    python -m scripts.generate_synthetic_data --hotels 2000 --customers 2000000 --bookings 20000000
+    python -m scripts.generate_synthetic_data --hotels 10 --customers 10000 --bookings 50000 --workers 2
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time as day_time, timedelta, timezone
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from shared.bulk_copy import copy_rows
+from shared.core.security import get_password_hash
+from shared.database import engine
+from shared.schemas import FloorLayout, ReceiptSettings, RoomLayout
+from shared.stats import rebuild_daily_stats, reconcile_customer_stats
+
+ROOM_TYPES = (("Single", Decimal("79.00")), ("Double", Decimal("109.00")), ("Suite", Decimal("189.00")))
+FIRST_NAMES = ("James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "Priya", "Wei",
+               "Carlos", "Fatima", "Ahmed", "Sofia", "Yuki", "Olga", "David", "Aisha", "Luca", "Emma")
+LAST_NAMES = ("Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Patel", "Chen",
+              "Rodriguez", "Khan", "Nguyen", "Kim", "Rossi", "Muller", "Ivanova", "Sato", "Reddy", "Lopez")
+CITIES = (("Austin", "TX", "73301"), ("Denver", "CO", "80201"), ("Orlando", "FL", "32801"),
+          ("Seattle", "WA", "98101"), ("Nashville", "TN", "37201"), ("Phoenix", "AZ", "85001"))
+RATINGS = (5, 4, 3, 2, 1)  # checkout accepts 1-5
+RATING_WEIGHTS = (45, 30, 13, 7, 5)
+
+OCCUPANCY = 0.6          # share of rooms with a guest in house right now
+FUTURE_RESERVATION = 0.2  # share of rooms with a stay booked ahead
+CANCELLED = 0.08         # share of past stays that were cancelled
+CUSTOMER_CHUNK = 200_000
+HOTEL_CHUNK = 20
+
+HOTEL_COLUMNS = ("hotel_id", "name", "address", "phone_number", "email", "terms_and_conditions", "created_at",
+                 "subscription_valid", "valid_from", "layout_json", "receipt_settings_json")
+USER_COLUMNS = ("user_id", "hotel_id", "username", "password_hash", "full_name", "is_active")
+ROOM_COLUMNS = ("room_id", "hotel_id", "room_number", "room_type", "rate", "status")
+CUSTOMER_COLUMNS = ("customer_id", "gov_id", "first_name", "last_name", "phone", "address", "city", "state",
+                    "zip_code", "average_rating", "created_at")
+BOOKING_COLUMNS = ("booking_id", "hotel_id", "customer_id", "room_id", "created_by_user_id", "num_guests",
+                   "check_in_at", "expected_check_out_at", "actual_check_out_at", "total_amount", "cash_amount",
+                   "card_amount", "status")
+FEEDBACK_COLUMNS = ("feedback_id", "booking_id", "customer_id", "hotel_id", "rating", "notes", "created_at")
+
+
+# --- Ids ---
+
+def reserve_ids(cursor, table: str, column: str, count: int) -> int:
+    """Advances the column's sequence past `count` ids and returns the first one."""
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+        f"nextval(pg_get_serial_sequence('{table}', '{column}')) + %s - 1)",
+        (max(count, 1),),
+    )
+    return cursor.fetchone()[0] - max(count, 1) + 1
+
+
+# --- Plan ---
+
+def room_plan(seed: int, room_id: int) -> Tuple[bool, bool]:
+    """(occupied now, has a future reservation): the same answer for the rooms and the bookings phase."""
+    rng = random.Random(seed * 1_000_003 + room_id)
+    return rng.random() < OCCUPANCY, rng.random() < FUTURE_RESERVATION
+
+
+def hotel_layout(rng: random.Random, hotel_index: int) -> List[FloorLayout]:
+    floors = []
+    for floor in range(1, rng.randint(2, 6) + 1):
+        rooms = []
+        for i in range(1, rng.randint(8, 24) + 1):
+            room_type, rate = rng.choices(ROOM_TYPES, weights=(3, 5, 1))[0]
+            rooms.append(RoomLayout(id=f"r{floor}-{i}", number=f"{floor}{i:02d}", type=room_type, rate=float(rate),
+                                    x=(i - 1) % 8 * 110, y=(i - 1) // 8 * 110, width=100, height=100))
+        floors.append(FloorLayout(id=f"f{floor}", name=f"Floor {floor}", rooms=rooms))
+    return floors
+
+
+class Plan:
+    """Id ranges and per-hotel layouts, built in the parent and shared read-only with workers."""
+
+    def __init__(self, args, hotel_base: int, user_base: int, room_base: int, customer_base: int,
+                 booking_base: int, feedback_base: int, hotels: List[Tuple[str, List[FloorLayout]]]):
+        self.seed = args.seed
+        self.prefix = args.prefix
+        self.feedback_share = args.feedback_share
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+        self.hotel_base, self.user_base, self.room_base = hotel_base, user_base, room_base
+        self.customer_base, self.customers = customer_base, args.customers
+        self.booking_base, self.bookings, self.feedback_base = booking_base, args.bookings, feedback_base
+        self.hotels = hotels
+        self.room_offsets = []  # index of each hotel's first room among all generated rooms
+        total = 0
+        for _, floors in hotels:
+            self.room_offsets.append(total)
+            total += sum(len(floor.rooms) for floor in floors)
+        self.total_rooms = total
+
+    def booking_range(self, room_index: int) -> Tuple[int, int]:
+        """(first booking_id, count) for the room_index-th generated room: bookings are spread evenly."""
+        per_room, extra = divmod(self.bookings, self.total_rooms)
+        first = self.booking_base + room_index * per_room + min(room_index, extra)
+        return first, per_room + (1 if room_index < extra else 0)
+
+
+# --- Rows ---
+
+def hotel_rows(plan: Plan, password_hash: str):
+    hotels, users, rooms = [], [], []
+    for index, (name, floors) in enumerate(plan.hotels):
+        hotel_id, user_id = plan.hotel_base + index, plan.user_base + index
+        city, state, zip_code = CITIES[index % len(CITIES)]
+        email = f"frontdesk{hotel_id}@{plan.prefix.lower().strip('-')}.example"
+        hotels.append((
+            hotel_id, name, f"{100 + index} Main St, {city}, {state} {zip_code}, USA", "555-0100", email,
+            "Standard Terms Applied.", plan.now - timedelta(days=3 * 365), True, plan.now - timedelta(days=3 * 365),
+            _json([floor.model_dump() for floor in floors]),
+            _json(ReceiptSettings(businessName=name, address=f"{city}, {state}").model_dump()),
+        ))
+        users.append((user_id, hotel_id, f"owner{hotel_id}@{plan.prefix.lower().strip('-')}.example",
+                      password_hash, f"Owner {hotel_id}", True))
+        room_id = plan.room_base + plan.room_offsets[index]
+        for floor in floors:
+            for room in floor.rooms:
+                occupied = room_plan(plan.seed, room_id)[0] and plan.booking_range(room_id - plan.room_base)[1] > 0
+                rooms.append((room_id, hotel_id, room.number, room.type, Decimal(str(room.rate)).quantize(Decimal("0.01")),
+                              "O" if occupied else "A"))
+                room_id += 1
+    return hotels, users, rooms
+
+
+def _json(value) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def customer_rows(plan: Plan, first: int, count: int) -> Iterator[tuple]:
+    rng = random.Random(plan.seed * 7 + first)
+    created = plan.now - timedelta(days=4 * 365)
+    for customer_id in range(first, first + count):
+        city, state, zip_code = rng.choice(CITIES)
+        yield (customer_id, f"{plan.prefix}{customer_id}", rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+               f"555-{rng.randrange(10_000_000):07d}", f"{rng.randint(1, 9999)} Oak Ave", city, state, zip_code,
+               Decimal("5.00"), created)
+
+
+def _at(day, hour: int) -> datetime:
+    return datetime.combine(day, day_time(hour), tzinfo=timezone.utc)
+
+
+def room_stays(plan: Plan, rng: random.Random, room_id: int, count: int) -> List[Tuple[datetime, datetime, str]]:
+    """`count` non-overlapping (check_in, check_out, status) stays for one room, oldest first."""
+    occupied, future = room_plan(plan.seed, room_id)
+    today = plan.now.date()
+    stays = []
+    if future and count >= 2:
+        start = today + timedelta(days=rng.randint(5, 60))
+        stays.append((_at(start, 15), _at(start + timedelta(days=rng.randint(1, 5)), 11), "Active"))
+    if occupied and count > len(stays):
+        start = today - timedelta(days=rng.randint(1, 3))
+        stays.append((_at(start, 15), _at(today + timedelta(days=rng.randint(1, 3)), 11), "Active"))
+        end = start
+    else:
+        end = today
+    while len(stays) < count:
+        # Walk back: check out by 11:00 on `end` at the latest, after the previous guest's 15:00 check-in
+        end -= timedelta(days=rng.choice((0, 0, 1, 1, 2, 3, 5)))
+        start = end - timedelta(days=rng.randint(1, 5))
+        stays.append((_at(start, 15), _at(end, 11), "Cancelled" if rng.random() < CANCELLED else "Completed"))
+        end = start
+    stays.sort()
+    return stays
+
+
+def booking_rows(plan: Plan, hotel_indexes: Sequence[int], feedbacks: list) -> Iterator[tuple]:
+    """Bookings for these hotels; feedback rows for them are appended to `feedbacks` as they are made."""
+    for index in hotel_indexes:
+        hotel_id, user_id = plan.hotel_base + index, plan.user_base + index
+        rng = random.Random(plan.seed * 31 + hotel_id)
+        room_index = plan.room_offsets[index]
+        for floor in plan.hotels[index][1]:
+            for room in floor.rooms:
+                room_id = plan.room_base + room_index
+                booking_id, count = plan.booking_range(room_index)
+                rate = Decimal(str(room.rate)).quantize(Decimal("0.01"))
+                for check_in, check_out, status in room_stays(plan, rng, room_id, count):
+                    customer_id = plan.customer_base + rng.randrange(plan.customers)
+                    total = rate * max((check_out.date() - check_in.date()).days, 1)
+                    cash = rng.choice((total, Decimal("0.00"), (total / 2).quantize(Decimal("0.01"))))
+                    checked_out = check_out - timedelta(minutes=rng.randint(0, 90)) if status == "Completed" else None
+                    yield (booking_id, hotel_id, customer_id, room_id, user_id, rng.choice((1, 1, 2, 2, 3)),
+                           check_in, check_out, checked_out, total, cash, total - cash, status)
+                    if checked_out is not None and rng.random() < plan.feedback_share:
+                        feedbacks.append((plan.feedback_base + booking_id - plan.booking_base, booking_id,
+                                          customer_id, hotel_id, rng.choices(RATINGS, weights=RATING_WEIGHTS)[0],
+                                          None, checked_out))
+                    booking_id += 1
+                room_index += 1
+
+
+# --- Workers ---
+
+_plan: Optional[Plan] = None
+
+
+def _worker_init(plan: Plan):
+    global _plan
+    _plan = plan  # sent once per worker instead of with every job
+    # Connections inherited from the parent must not be shared across processes
+    engine.dispose(close=False)
+
+
+def _copy_job(table: str, columns: Sequence[str], rows: Iterable[Sequence]) -> int:
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            count = copy_rows(cursor, table, columns, rows)
+        connection.commit()
+        return count
+    finally:
+        connection.close()
+
+
+def load_customers(first: int, count: int) -> dict:
+    return {"customers": _copy_job("customers", CUSTOMER_COLUMNS, customer_rows(_plan, first, count))}
+
+
+def load_bookings(hotel_indexes: Sequence[int]) -> dict:
+    plan, feedbacks = _plan, []
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            bookings = copy_rows(cursor, "bookings", BOOKING_COLUMNS, booking_rows(plan, hotel_indexes, feedbacks))
+            copy_rows(cursor, "customerfeedbacks", FEEDBACK_COLUMNS, feedbacks)
+        connection.commit()
+    finally:
+        connection.close()
+    return {"bookings": bookings, "customerfeedbacks": len(feedbacks)}
+
+
+def run_parallel(executor: ProcessPoolExecutor, jobs) -> dict:
+    totals = {}
+    for result in [executor.submit(fn, *args) for fn, *args in jobs]:
+        for table, count in result.result().items():
+            totals[table] = totals.get(table, 0) + count
+    return totals
+
+
+def report(phase: str, counts: dict, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    rows = sum(counts.values())
+    print(f"{phase}: {counts} in {elapsed:.1f}s ({rows / max(elapsed, 1e-9) * 60 / 1e6:.2f}M rows/min)", flush=True)
+
+
+# --- Main ---
+
+RATING_TOTALS_SQL = """
+UPDATE customers c SET
+    rating_sum = f.rating_sum,
+    rating_count = f.rating_count,
+    average_rating = ROUND(CAST(f.rating_sum AS NUMERIC) / f.rating_count, 2)
+FROM (
+    SELECT customer_id, SUM(rating) AS rating_sum, COUNT(*) AS rating_count
+    FROM customerfeedbacks
+    WHERE customer_id BETWEEN :first AND :last
+    GROUP BY customer_id
+) f
+WHERE f.customer_id = c.customer_id
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=100)
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--bookings", type=int, default=1_000_000, help="Total, spread evenly over all rooms")
+    parser.add_argument("--feedback-share", type=float, default=0.35, help="Share of completed stays with feedback")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--prefix", default="SYN-", help="gov_id prefix; pick a new one for each run")
+    parser.add_argument("--password", default="synthetic", help="Password of every generated owner login")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-stats", action="store_true", help="Don't rebuild the derived stats tables")
+    args = parser.parse_args()
+    if args.hotels < 1 or args.customers < 1:
+        parser.error("--hotels and --customers must be at least 1")
+
+    rng = random.Random(args.seed)
+    hotels = [(f"Synthetic Hotel {args.prefix}{i}", hotel_layout(rng, i)) for i in range(args.hotels)]
+    total_rooms = sum(len(floor.rooms) for _, floors in hotels for floor in floors)
+
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            plan = Plan(
+                args,
+                hotel_base=reserve_ids(cursor, "hotels", "hotel_id", args.hotels),
+                user_base=reserve_ids(cursor, "hotelusers", "user_id", args.hotels),
+                room_base=reserve_ids(cursor, "rooms", "room_id", total_rooms),
+                customer_base=reserve_ids(cursor, "customers", "customer_id", args.customers),
+                booking_base=reserve_ids(cursor, "bookings", "booking_id", args.bookings),
+                # One feedback id per booking id, so workers can number feedback without coordinating
+                feedback_base=reserve_ids(cursor, "customerfeedbacks", "feedback_id", args.bookings),
+                hotels=hotels,
+            )
+        connection.commit()
+
+        started = time.perf_counter()
+        hotel_data, user_data, room_data = hotel_rows(plan, get_password_hash(args.password))
+        with connection.cursor() as cursor:
+            counts = {
+                "hotels": copy_rows(cursor, "hotels", HOTEL_COLUMNS, hotel_data),
+                "hotelusers": copy_rows(cursor, "hotelusers", USER_COLUMNS, user_data),
+                "rooms": copy_rows(cursor, "rooms", ROOM_COLUMNS, room_data),
+            }
+        connection.commit()
+        report("hotels", counts, started)
+    finally:
+        connection.close()
+
+    total_started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_worker_init, initargs=(plan,)) as executor:
+        started = time.perf_counter()
+        counts = run_parallel(executor, [
+            (load_customers, first, min(CUSTOMER_CHUNK, plan.customer_base + args.customers - first))
+            for first in range(plan.customer_base, plan.customer_base + args.customers, CUSTOMER_CHUNK)
+        ])
+        report("customers", counts, started)
+
+        started = time.perf_counter()
+        counts = run_parallel(executor, [
+            (load_bookings, range(start, min(start + HOTEL_CHUNK, args.hotels)))
+            for start in range(0, args.hotels, HOTEL_CHUNK)
+        ])
+        report("bookings", counts, started)
+
+    if not args.skip_stats:
+        started = time.perf_counter()
+        with Session(engine) as session:
+            daily_rows = rebuild_daily_stats(session)
+            fixed = reconcile_customer_stats(session)
+            session.exec(text(RATING_TOTALS_SQL).bindparams(
+                first=plan.customer_base, last=plan.customer_base + args.customers - 1))
+            session.commit()
+        corrected = ", ".join(f"{name} {count}" for name, count in fixed.items())
+        print(f"stats: {daily_rows} hotel_daily_stats rows, customer stats corrected: {corrected} "
+              f"in {time.perf_counter() - started:.1f}s")
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE hotels, hotelusers, rooms, customers, bookings, customerfeedbacks"))
+    print(f"Generated hotels {plan.hotel_base}..{plan.hotel_base + args.hotels - 1}, customers "
+          f"{plan.customer_base}..{plan.customer_base + args.customers - 1} in {time.perf_counter() - total_started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
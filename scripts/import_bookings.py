@@ -0,0 +1,51 @@
+"""
+Import stays exported from another PMS into one hotel (CSV, JSON or JSON Lines).
+
+Same loader as POST /bookings/import (see shared/booking_import.py for the
+columns), for exports too large to upload. All or nothing: invalid or
+overlapping rows are printed with their row number, nothing is imported and
+the exit status is non-zero.
+
+Usage:
+    python -m scripts.import_bookings export.csv --hotel-id 1
+    python -m scripts.import_bookings export.jsonl --hotel-id 1 --user-id 7 --format json
+"""
+import argparse
+import sys
+import time
+from sqlmodel import Session, select
+from shared.booking_import import BookingImportError, import_bookings
+from shared.database import engine
+from shared.models import HotelUsers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Export file")
+    parser.add_argument("--hotel-id", type=int, required=True)
+    parser.add_argument("--user-id", type=int, default=None, help="Recorded as creator (default: the hotel's first user)")
+    parser.add_argument("--format", choices=("csv", "json"), default=None, help="Default: from the file extension")
+    args = parser.parse_args()
+    file_format = args.format or ("csv" if args.path.lower().endswith(".csv") else "json")
+
+    started = time.perf_counter()
+    with Session(engine) as session:
+        user_id = args.user_id or session.exec(
+            select(HotelUsers.user_id).where(HotelUsers.hotel_id == args.hotel_id).order_by(HotelUsers.user_id)
+        ).first()
+        if user_id is None:
+            sys.exit(f"Hotel {args.hotel_id} has no users")
+        with open(args.path, encoding="utf-8-sig", newline="" if file_format == "csv" else None) as file:
+            try:
+                result = import_bookings(session, args.hotel_id, user_id, file, file_format)
+            except BookingImportError as e:
+                session.rollback()
+                for row in sorted(e.errors):
+                    print(f"row {row}: {e.errors[row]}")
+                sys.exit(e.message)
+        session.commit()
+    print(f"Imported into hotel {args.hotel_id} in {time.perf_counter() - started:.1f}s: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Delete stored Idempotency-Key responses older than IDEMPOTENCY_KEY_TTL_HOURS.
+
+Expired keys are already ignored (and overwritten on reuse), so this only
+keeps the table small. Safe to run at any time, e.g. from a daily cron.
+
+Usage:
+    python -m scripts.purge_idempotency_keys
+"""
+import argparse
+from sqlmodel import Session
+from shared.database import engine
+from shared.idempotency import purge_expired
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+
+    with Session(engine) as session:
+        removed = purge_expired(session)
+        session.commit()
+
+    print(f"{removed} expired idempotency keys removed")
+
+
+if __name__ == "__main__":
+    main()
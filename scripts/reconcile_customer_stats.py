@@ -0,0 +1,31 @@
+"""
+Reconcile the customer stay counters (customers.total_stays and
+customer_hotel_stats) with bookings.
+
+Only rows that have drifted are rewritten, so this is cheap to run on a
+schedule. Safe to run while the services are up.
+
+Usage:
+    python -m scripts.reconcile_customer_stats                  # all customers
+    python -m scripts.reconcile_customer_stats --customer-id 42
+"""
+import argparse
+from sqlmodel import Session
+from shared.database import engine
+from shared.stats import reconcile_customer_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customer-id", type=int, default=None, help="Only reconcile this customer")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        fixed = reconcile_customer_stats(session, args.customer_id)
+        session.commit()
+    scope = f"customer {args.customer_id}" if args.customer_id is not None else "all customers"
+    print(f"Reconciled customer stay counters for {scope}: {fixed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,9 @@ from shared.models import Hotels
 
 app = FastAPI(title="Billing Service")
 
-# --- Logging Middleware ---
-from shared.middleware import LogExceptionMiddleware
-app.add_middleware(LogExceptionMiddleware)
+# --- Logging & Metrics Middleware ---
+from shared.middleware import RequestMetricsMiddleware
+app.add_middleware(RequestMetricsMiddleware)
 
 # Env Variables
 STRIPE_API_KEY = os.getenv("STRIPE_API_KEY")
@@ -75,3 +75,15 @@ async def handle_payment_succeeded(invoice):
 @app.get("/health")
 def health():
     return {"status": "ok", "service": "billing"}
+
+# --- Metrics ---
+from shared.database import pool_stats
+from shared.middleware import prometheus_metrics
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return prometheus_metrics()
+
+@app.get("/metrics/pool")
+def pool_metrics():
+    return pool_stats()
@@ -23,9 +23,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- Logging Middleware ---
-from shared.middleware import LogExceptionMiddleware
-app.add_middleware(LogExceptionMiddleware)
+# --- Logging & Metrics Middleware ---
+from shared.middleware import RequestMetricsMiddleware
+app.add_middleware(RequestMetricsMiddleware)
 
 # --- Routers ---
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
@@ -34,3 +34,29 @@ app.include_router(users.router, prefix="/users", tags=["hotelusers"])
 @app.get("/health")
 def health():
     return {"status": "ok", "service": "identity"}
+
+# --- Metrics ---
+from shared.database import pool_stats
+from shared.middleware import prometheus_metrics
+from shared.auth_cache import principal_cache
+from shared.core.security import password_hasher
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return prometheus_metrics()
+
+@app.get("/metrics/pool")
+def pool_metrics():
+    return pool_stats()
+
+@app.get("/metrics/auth-cache")
+def auth_cache_metrics():
+    return principal_cache.stats()
+
+@app.get("/metrics/password-hashing")
+def password_hashing_metrics():
+    return password_hasher.stats()
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    password_hasher.shutdown()
@@ -2,12 +2,14 @@ from datetime import timedelta, datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from shared.dependencies import get_session
+from shared.dependencies import get_session, get_async_session
 from shared.models import HotelUsers, Hotels, Rooms
 from shared.schemas import RegisterRequest, ForgotPasswordRequest, ResetPasswordRequest
-from shared.core.security import verify_password, create_access_token, get_password_hash
+from shared.core.security import verify_password_async, create_access_token, get_password_hash_async
 from shared.core.config import ACCESS_TOKEN_EXPIRE_MINUTES
+from shared.availability import invalidate_hotel_caches
 import secrets
 import smtplib
 from email.mime.text import MIMEText
@@ -16,16 +18,16 @@ import os
 router = APIRouter()
 
 @router.post("/login")
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     # 1. Fetch user
     query = select(HotelUsers).where(HotelUsers.username == form_data.username)
-    user = session.exec(query).first()
+    user = (await session.exec(query)).first()
     
-    # 2. Verify password
-    if not user or not verify_password(form_data.password, user.password_hash):
+    # 2. Verify password (bcrypt runs in the hashing pool)
+    if not user or not await verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -41,12 +43,12 @@ def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer", "hotel_id": user.hotel_id}
 
 @router.post("/register")
-def register_hotel(
+async def register_hotel(
     payload: RegisterRequest,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     # 1. Check if user already exists
-    existing_user = session.exec(select(HotelUsers).where(HotelUsers.username == payload.email)).first()
+    existing_user = (await session.exec(select(HotelUsers).where(HotelUsers.username == payload.email))).first()
     if existing_user:
         raise HTTPException(status_code=400, detail="User with this email already exists")
 
@@ -58,6 +60,10 @@ def register_hotel(
                 raise HTTPException(status_code=400, detail=f"Duplicate room number found in layout: {room.number}")
             all_room_numbers.add(room.number)
 
+    # 1.2 Hash before touching the DB: a 503 from a saturated hashing pool must
+    # not leave a hotel behind. Hotel, owner and rooms commit together below.
+    hashed_password = await get_password_hash_async(payload.password)
+
     # 2. Create Hotel
     layout_data = [floor.model_dump() for floor in payload.floors]
     receipt_data = payload.receiptSettings.model_dump() if payload.receiptSettings else None
@@ -73,11 +79,9 @@ def register_hotel(
         receipt_settings_json=receipt_data
     )
     session.add(new_hotel)
-    session.commit()
-    session.refresh(new_hotel)
+    await session.flush()  # assigns hotel_id for the owner and rooms
     
     # 3. Create Owner User
-    hashed_password = get_password_hash(payload.password)
     new_user = HotelUsers(
         hotel_id=new_hotel.hotel_id,
         username=payload.ownerEmail, # Username is Email
@@ -100,14 +104,15 @@ def register_hotel(
                 )
                 session.add(new_room)
                 
-        session.commit()
+        await session.commit()
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=400, detail="Database integrity error: Possible duplicate room numbers or invalid data.")
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
     
+    invalidate_hotel_caches(new_hotel.hotel_id)
     return {"status": "success", "hotel_id": new_hotel.hotel_id}
 
 # --- Password Reset Endpoints ---
@@ -186,12 +191,12 @@ def forgot_password(
     return {"message": "If email exists, reset link sent"}
 
 @router.post("/reset-password")
-def reset_password(
+async def reset_password(
     payload: ResetPasswordRequest,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     query = select(HotelUsers).where(HotelUsers.reset_token == payload.token)
-    user = session.exec(query).first()
+    user = (await session.exec(query)).first()
     
     if not user:
         raise HTTPException(status_code=400, detail="Invalid token")
@@ -201,10 +206,10 @@ def reset_password(
         raise HTTPException(status_code=400, detail="Token expired")
         
     # Update Password
-    user.password_hash = get_password_hash(payload.new_password)
+    user.password_hash = await get_password_hash_async(payload.new_password)
     user.reset_token = None
     user.reset_token_expires_at = None
     session.add(user)
-    session.commit()
+    await session.commit()
     
     return {"message": "Password reset successfully"}
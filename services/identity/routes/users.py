@@ -1,16 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
-from shared.dependencies import get_session, get_current_user
+from sqlmodel.ext.asyncio.session import AsyncSession
+from shared.dependencies import get_session, get_async_session, get_current_user, get_current_user_sync
 from shared.models import HotelUsers
 from shared.schemas import HotelUserCreate, HotelUserRead
-from shared.core.security import get_password_hash
+from shared.core.security import get_password_hash_async
 
 router = APIRouter()
 
 @router.get("/{user_id}", response_model=HotelUserRead)
 def get_user(
     user_id: int, 
-    current_user: HotelUsers = Depends(get_current_user),
+    current_user: HotelUsers = Depends(get_current_user_sync),
     session: Session = Depends(get_session)
 ):
     # Enforce: Can only see users from same hotel
@@ -27,26 +28,26 @@ def get_user(
 
 @router.get("/me", response_model=HotelUserRead)
 def get_current_user_profile(
-    current_user: HotelUsers = Depends(get_current_user),
+    current_user: HotelUsers = Depends(get_current_user_sync),
 ):
     return current_user
 
 @router.post("/", response_model=HotelUserRead)
-def create_user(
+async def create_user(
     user: HotelUserCreate, 
     current_user: HotelUsers = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     # Auto-assign to creator's hotel
     
     db_user = HotelUsers(
         hotel_id=current_user.hotel_id, # INFERRED
         username=user.username,
-        password_hash=get_password_hash(user.password), # REAL HASH
+        password_hash=await get_password_hash_async(user.password), # REAL HASH (hashing pool)
         full_name=user.full_name,
         is_active=user.is_active
     )
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    await session.commit()
+    await session.refresh(db_user)
     return db_user
@@ -22,9 +22,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- Logging Middleware ---
-from shared.middleware import LogExceptionMiddleware
-app.add_middleware(LogExceptionMiddleware)
+# --- Logging & Metrics Middleware ---
+from shared.middleware import RequestMetricsMiddleware
+app.add_middleware(RequestMetricsMiddleware)
 
 # --- Routers ---
 app.include_router(records.router, prefix="/bookings", tags=["Records"])
@@ -35,3 +35,40 @@ app.include_router(rooms.router, prefix="/rooms", tags=["Rooms"])
 @app.get("/health")
 def health():
     return {"status": "ok", "service": "pms"}
+
+# --- Metrics ---
+from shared.database import pool_stats
+from shared.middleware import prometheus_metrics
+from shared.auth_cache import principal_cache
+from shared.availability import availability_engine
+from shared.room_directory import room_directory
+from shared.hotel_versions import hotel_versions
+from shared.idempotency import idempotency_cache
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return prometheus_metrics()
+
+@app.get("/metrics/pool")
+def pool_metrics():
+    return pool_stats()
+
+@app.get("/metrics/auth-cache")
+def auth_cache_metrics():
+    return principal_cache.stats()
+
+@app.get("/metrics/availability")
+def availability_metrics():
+    return availability_engine.stats()
+
+@app.get("/metrics/room-directory")
+def room_directory_metrics():
+    return room_directory.stats()
+
+@app.get("/metrics/hotel-versions")
+def hotel_versions_metrics():
+    return hotel_versions.stats()
+
+@app.get("/metrics/idempotency")
+def idempotency_metrics():
+    return idempotency_cache.stats()
@@ -1,26 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from typing import Optional
 from sqlmodel import Session, select
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timezone
-from shared.dependencies import get_session, get_current_user
+from shared.dependencies import get_session, get_current_user, get_current_user_sync
 from shared.models import Bookings, HotelUsers
 from shared.schemas import BookingCreate, BookingRead
 
-from shared.utils import is_room_available
+from shared.utils import is_booking_overlap
+from shared.stats import apply_booking_stats, snapshot_booking
+from shared.availability import apply_committed_change, bump_availability_version
+from shared import idempotency
 
 router = APIRouter()
 
 @router.post("/check-in", response_model=BookingRead)
 def check_in(
     booking: BookingCreate,
-    current_user: HotelUsers = Depends(get_current_user),
+    current_user: HotelUsers = Depends(get_current_user_sync),
     session: Session = Depends(get_session),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
 ):
+    # Retry of a completed check-in? Replay its response
+    if idempotency_key is not None:
+        fingerprint = idempotency.request_hash("POST /operations/check-in", booking)
+        replay = idempotency.find_response(session, current_user.hotel_id, idempotency_key, fingerprint)
+        if replay is not None:
+            return replay
+
     start_time = booking.check_in_at or datetime.now(timezone.utc)
-    
-    # Overlap Check
-    # Overlap Check
-    if not is_room_available(session, booking.room_id, start_time, booking.expected_check_out_at):
-        raise HTTPException(status_code=409, detail="Room is already booked/occupied for these dates")
 
     # Security: Verify Room Ownership
     # Ensure the room actually belongs to THIS hotel
@@ -42,8 +50,35 @@ def check_in(
         status=booking.status
     )
     session.add(new_booking)
+    # Overlap Check (excl_bookings_room_stay constraint)
+    try:
+        session.flush()
+    except IntegrityError as e:
+        session.rollback()
+        if is_booking_overlap(e):
+            # Usually a concurrent retry of this very request: answer with its response
+            if idempotency_key is not None:
+                replay = idempotency.find_response(session, current_user.hotel_id, idempotency_key, fingerprint)
+                if replay is not None:
+                    return replay
+            raise HTTPException(status_code=409, detail="Room is already booked/occupied for these dates")
+        raise
+    apply_booking_stats(session, None, new_booking)
+    version = bump_availability_version(session, current_user.hotel_id)
+    if idempotency_key is not None:
+        body = BookingRead.model_validate(new_booking).model_dump_json().encode()
+        if not idempotency.save_response(session, current_user.hotel_id, idempotency_key, fingerprint, 200, body):
+            # A concurrent retry committed first: drop ours, answer with theirs
+            session.rollback()
+            replay = idempotency.find_response(session, current_user.hotel_id, idempotency_key, fingerprint)
+            if replay is None:
+                raise HTTPException(status_code=409, detail="A concurrent request with this Idempotency-Key did not finish; retry.")
+            return replay
     session.commit()
     session.refresh(new_booking)
+    apply_committed_change(current_user.hotel_id, version, added=[new_booking])
+    if idempotency_key is not None:
+        idempotency.remember_response(current_user.hotel_id, idempotency_key, fingerprint, 200, body)
     return new_booking
 
 @router.post("/check-out/{booking_id}", response_model=BookingRead)
@@ -52,10 +87,12 @@ def check_out(
     total_amount: float,
     status: str = "Completed",
     actual_check_out_at: datetime = None,
-    current_user: HotelUsers = Depends(get_current_user),
+    current_user: HotelUsers = Depends(get_current_user_sync),
     session: Session = Depends(get_session),
 ):
-    stmt = select(Bookings).where(Bookings.booking_id == booking_id)
+    # Locked so `before` is the committed state: concurrent check-outs apply
+    # their stats deltas one after the other instead of from the same snapshot
+    stmt = select(Bookings).where(Bookings.booking_id == booking_id).with_for_update()
     booking = session.exec(stmt).first()
     
     if not booking:
@@ -65,11 +102,15 @@ def check_out(
     if booking.hotel_id != current_user.hotel_id:
         raise HTTPException(status_code=403, detail="Not authorized to access bookings from another hotel")
 
+    before = snapshot_booking(booking)
     booking.total_amount = total_amount
     booking.status = status
     booking.actual_check_out_at = actual_check_out_at or datetime.now(timezone.utc)
     
     session.add(booking)
+    apply_booking_stats(session, before, booking)
+    version = bump_availability_version(session, current_user.hotel_id)
     session.commit()
     session.refresh(booking)
+    apply_committed_change(current_user.hotel_id, version, removed=[booking], added=[booking])
     return booking
\ No newline at end of file
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from sqlmodel import Session, select
 from shared.dependencies import get_session
 from shared.models import Hotels
 from shared.schemas import HotelCreate, HotelRead
+from shared.hotel_versions import etag_matches, hotel_versions, make_etag
+from shared.responses import fast_json, project
 
 router = APIRouter()
 
@@ -15,8 +18,23 @@ def create_hotel(record: HotelCreate, session: Session = Depends(get_session)):
     return db_hotel
 
 @router.get("/{hotel_id}", response_model=HotelRead)
-def get_hotel(hotel_id: int, session: Session = Depends(get_session)):
+def get_hotel(
+    hotel_id: int,
+    if_none_match: Optional[str] = Header(default=None),
+    session: Session = Depends(get_session),
+):
+    # Conditional GET: an unchanged hotel is answered without loading the JSONB blobs
+    versions = hotel_versions.get(session, hotel_id)
+    if versions is None:
+        raise HTTPException(status_code=404, detail="hotel not found")
+    etag = make_etag("hotel", hotel_id, versions[1])
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
     hotel = session.get(Hotels, hotel_id)
     if not hotel:
         raise HTTPException(status_code=404, detail="hotel not found")
-    return hotel
\ No newline at end of file
+    return fast_json(
+        project([hotel], HotelRead)[0],
+        headers={"ETag": make_etag("hotel", hotel_id, hotel.settings_version), "Cache-Control": "no-cache"},
+    )
\ No newline at end of file
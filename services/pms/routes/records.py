@@ -1,18 +1,38 @@
 from typing import List, Tuple, Any, Dict, Optional
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime, timezone
+import io
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, UploadFile
 from sqlmodel import Session, select, func, SQLModel
-from shared.dependencies import get_session, get_current_user
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from shared.dependencies import get_session, get_async_session, get_current_user, get_current_user_sync
 from shared.models import Bookings, CustomerFeedbacks, HotelUsers, Rooms, Customers, CustomerNotes
-from shared.schemas import BookingCreate, BookingRead
-from shared.utils import is_room_available
+from shared.schemas import BookingBatchRead, BookingCreate, BookingRead
+from shared.utils import find_batch_overlaps, is_booking_overlap
+from shared.customers import get_customer_profile, guest_details, upsert_guest_customers
+from shared.stats import apply_booking_stats, apply_booking_stats_many, apply_feedback_stats, apply_feedback_stats_many, snapshot_booking
+from shared.availability import apply_committed_change, bump_availability_version, invalidate_hotel_caches
+from shared.booking_import import BookingImportError, import_bookings
+from shared.room_directory import room_directory
+from shared.responses import fast_json, project
+from shared import idempotency
 
 router = APIRouter()
 
+MAX_BATCH_BOOKINGS = 100
+
+def batch_error(status_code: int, message: str, errors: Dict[int, str]) -> HTTPException:
+    """All-or-nothing batch failure, listing every failing item by its index in the request."""
+    return HTTPException(status_code=status_code, detail={
+        "message": message,
+        "errors": [{"index": index, "detail": errors[index]} for index in sorted(errors)],
+    })
+
 @router.get("/customers/lookup")
-def lookup_customer(
+async def lookup_customer(
     gov_id: str,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: HotelUsers = Depends(get_current_user)
 ):
     """
@@ -25,137 +45,69 @@ def lookup_customer(
     # Standardize ID
     search_id = gov_id.strip().upper()
     
-    # 1. Find Customer
-    customer = session.exec(select(Customers).where(Customers.gov_id == search_id)).first()
+    # 1. Customer + stats + this hotel's recent notes (one round trip)
+    profile = await session.run_sync(get_customer_profile, current_user.hotel_id, search_id)
     
-    if not customer:
+    if not profile:
         return None
-        
-    # 2. Key Stats
-    # Global Stays (Network wide)
-    global_stay_count = session.exec(select(func.count(Bookings.booking_id)).where(Bookings.customer_id == customer.customer_id)).one()
-    
-    # Local Stays (This hotel only) - determines if "Returning" to THIS property
-    local_stay_count = session.exec(
-        select(func.count(Bookings.booking_id))
-        .where(Bookings.customer_id == customer.customer_id)
-        .where(Bookings.hotel_id == current_user.hotel_id)
-    ).one()
-    
-    last_stay = session.exec(
-        select(Bookings)
-        .where(Bookings.customer_id == customer.customer_id)
-        .order_by(Bookings.check_in_at.desc())
-    ).first()
-    
-    # 3. Fetch Notes (Feedback) - Scoped to THIS hotel only
-    notes_query = (
-        select(CustomerFeedbacks.notes)
-        .where(CustomerFeedbacks.customer_id == customer.customer_id)
-        .where(CustomerFeedbacks.hotel_id == current_user.hotel_id)  # Only show notes from this hotel
-        .where(CustomerFeedbacks.notes != None)
-        .where(CustomerFeedbacks.notes != "")
-        .order_by(CustomerFeedbacks.created_at.desc())
-        .limit(5)
-    )
-    recent_notes = session.exec(notes_query).all()
     
-    return {
-        "customer_id": customer.customer_id,
-        "first_name": customer.first_name,
-        "last_name": customer.last_name,
-        "phone": customer.phone,
-        "gov_id": customer.gov_id,
+    return fast_json({
+        "customer_id": profile["customer_id"],
+        "first_name": profile["first_name"],
+        "last_name": profile["last_name"],
+        "phone": profile["phone"],
+        "gov_id": profile["gov_id"],
         # Address Return
-        "address": customer.address,
-        "city": customer.city,
-        "state": customer.state,
-        "zip_code": customer.zip_code,
+        "address": profile["address"],
+        "city": profile["city"],
+        "state": profile["state"],
+        "zip_code": profile["zip_code"],
         "insights": {
-            "previousStays": global_stay_count,  # Network total
-            "localStays": local_stay_count,  # This hotel only
-            "lastVisit": last_stay.check_in_at if last_stay else None,
-            "globalRating": float(customer.average_rating) if customer.average_rating else 5.0,
-            "guestStatus": "returning" if local_stay_count > 0 else "new",  # Based on LOCAL history
-            "notes": recent_notes
+            "previousStays": profile["global_stays"],  # Network total
+            "localStays": profile["local_stays"],  # This hotel only
+            "lastVisit": profile["last_visit"],
+            "globalRating": float(profile["average_rating"]) if profile["average_rating"] else 5.0,
+            "guestStatus": "returning" if profile["local_stays"] > 0 else "new",  # Based on LOCAL history
+            "notes": profile["recent_notes"]
         }
-    }
+    })
 
 @router.post("/", response_model=BookingRead)
-def create_booking(
+async def create_booking(
     booking: BookingCreate,
     current_user: HotelUsers = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
 ):
     try:
+        # --- 0. Retry of a completed request? Replay its response ---
+        if idempotency_key is not None:
+            fingerprint = idempotency.request_hash("POST /bookings/", booking)
+            replay = await session.run_sync(idempotency.find_response, current_user.hotel_id, idempotency_key, fingerprint)
+            if replay is not None:
+                return replay
+
         # --- 1. Smart ID Resolution for Rooms ---
-        real_room = session.get(Rooms, booking.room_id)
-        
-        # Verify ownership if found by ID
-        if real_room and real_room.hotel_id != current_user.hotel_id:
-            real_room = None
-            
+        # Room ID of this hotel, else Room Number scoped to Hotel (cached directory)
+        real_room = await session.run_sync(room_directory.resolve, current_user.hotel_id, booking.room_id)
         if not real_room:
-            # Try by Room Number scoped to Hotel
-            statement = select(Rooms).where(Rooms.room_number == str(booking.room_id), Rooms.hotel_id == current_user.hotel_id)
-            real_room = session.exec(statement).first()
-            if real_room:
-                 booking.room_id = real_room.room_id
-            else:
-                 raise HTTPException(status_code=404, detail=f"Room identifier {booking.room_id} not found.")
+            raise HTTPException(status_code=404, detail=f"Room identifier {booking.room_id} not found.")
+        booking.room_id = real_room.room_id
 
         # --- 2. Smart Customer Upsert ---
-        # If no customer_id provided, look up or create based on Guest Details
+        # If no customer_id provided, look up or create based on Guest Details. One
+        # INSERT ... ON CONFLICT (gov_id) in the booking's transaction: it creates a new
+        # guest or updates the address fields provided, and is rolled back with the
+        # booking if that fails (no orphan customers)
         if not booking.customer_id:
             if not booking.guest_gov_id or not booking.guest_name:
                  raise HTTPException(status_code=400, detail="Either customer_id or guest details (Name, ID) are required.")
-            
-            # Standardize
-            gov_id_clean = booking.guest_gov_id.strip().upper()
-            
-            # Check Existing
-            existing_customer = session.exec(select(Customers).where(Customers.gov_id == gov_id_clean)).first()
-            
-            if existing_customer:
-                booking.customer_id = existing_customer.customer_id
-                # OPTIONAL: Update address if provided
-                if booking.guest_address: existing_customer.address = booking.guest_address
-                if booking.guest_city: existing_customer.city = booking.guest_city
-                if booking.guest_state: existing_customer.state = booking.guest_state
-                if booking.guest_zip_code: existing_customer.zip_code = booking.guest_zip_code
-                session.add(existing_customer)
-                
-            else:
-                # Create New Customer
-                # Split name safely
-                parts = booking.guest_name.strip().split(" ", 1)
-                f_name = parts[0]
-                l_name = parts[1] if len(parts) > 1 else ""
-                
-                new_customer = Customers(
-                    gov_id=gov_id_clean,
-                    first_name=f_name,
-                    last_name=l_name,
-                    phone=booking.guest_phone,
-                    # Save Address
-                    address=booking.guest_address,
-                    city=booking.guest_city,
-                    state=booking.guest_state,
-                    zip_code=booking.guest_zip_code,
-                    average_rating=5.0
-                )
-                session.add(new_customer)
-                session.commit()
-                session.refresh(new_customer)
-                booking.customer_id = new_customer.customer_id
-
-        # --- 3. Overlap Check ---
-        if booking.check_in_at and booking.expected_check_out_at:
-            start_time = booking.check_in_at
-            if not is_room_available(session, booking.room_id, start_time, booking.expected_check_out_at):
-                raise HTTPException(status_code=409, detail="Room is already booked for these dates")
+            guest = guest_details(booking)
+            upserted = await session.run_sync(upsert_guest_customers, [guest])
+            booking.customer_id = upserted[guest["gov_id"]][0]
 
-        # --- 4. Create Booking ---
+        # --- 3. Create Booking ---
+        # Overlaps are rejected by the excl_bookings_room_stay constraint on insert
         new_booking = Bookings(
             hotel_id=current_user.hotel_id,
             customer_id=booking.customer_id,
@@ -170,15 +122,42 @@ def create_booking(
             status=booking.status or "Active"
         )
         session.add(new_booking)
+        try:
+            await session.flush()
+        except IntegrityError as e:
+            await session.rollback()
+            if is_booking_overlap(e):
+                # Usually a concurrent retry of this very request: answer with its response
+                if idempotency_key is not None:
+                    replay = await session.run_sync(idempotency.find_response, current_user.hotel_id, idempotency_key, fingerprint)
+                    if replay is not None:
+                        return replay
+                raise HTTPException(status_code=409, detail="Room is already booked for these dates")
+            raise
         
-        # --- 5. Update Room Status to Occupied ---
-        room = session.get(Rooms, booking.room_id)
-        if room:
-           room.status = "O"
-           session.add(room)
+        # --- 4. Update Room Status to Occupied ---
+        await session.exec(update(Rooms).where(Rooms.room_id == booking.room_id).values(status="O"))
 
-        session.commit()
-        session.refresh(new_booking)
+        # --- 5. Daily Stats Rollup (same transaction) ---
+        await session.run_sync(apply_booking_stats, None, new_booking)
+        version = await session.run_sync(bump_availability_version, current_user.hotel_id)
+
+        # --- 6. Store the response for retries (same transaction) ---
+        if idempotency_key is not None:
+            body = BookingRead.model_validate(new_booking).model_dump_json().encode()
+            if not await session.run_sync(idempotency.save_response, current_user.hotel_id, idempotency_key, fingerprint, 200, body):
+                # A concurrent retry committed first: drop ours, answer with theirs
+                await session.rollback()
+                replay = await session.run_sync(idempotency.find_response, current_user.hotel_id, idempotency_key, fingerprint)
+                if replay is None:
+                    raise HTTPException(status_code=409, detail="A concurrent request with this Idempotency-Key did not finish; retry.")
+                return replay
+
+        await session.commit()
+        await session.refresh(new_booking)
+        apply_committed_change(current_user.hotel_id, version, added=[new_booking], room_status={new_booking.room_id: "O"})
+        if idempotency_key is not None:
+            idempotency.remember_response(current_user.hotel_id, idempotency_key, fingerprint, 200, body)
         return new_booking
 
     except HTTPException as he:
@@ -189,12 +168,162 @@ def create_booking(
         print(f"CRITICAL ERROR IN CREATE_BOOKING: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
+@router.post("/batch", response_model=BookingBatchRead)
+async def create_bookings_batch(
+    bookings: List[BookingCreate],
+    current_user: HotelUsers = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Creates several bookings (e.g. a group reservation) in one transaction:
+    either every booking is created or none is. Rooms, customers and overlaps
+    are resolved for the whole batch at once; if any item fails, the response
+    lists every failing item by its index in the request.
+    """
+    if not bookings:
+        raise HTTPException(status_code=400, detail="At least one booking is required.")
+    if len(bookings) > MAX_BATCH_BOOKINGS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_BOOKINGS} bookings per batch.")
+
+    hotel_id = current_user.hotel_id
+
+    # --- 1. Rooms (cached directory) and guest details ---
+    room_ids: Dict[int, int] = {}
+    guests: Dict[int, dict] = {}
+    errors: Dict[int, str] = {}
+    status_code = 404
+    for index, booking in enumerate(bookings):
+        if not booking.customer_id and (not booking.guest_gov_id or not booking.guest_name):
+            errors[index] = "Either customer_id or guest details (Name, ID) are required."
+            status_code = 400
+            continue
+        room = await session.run_sync(room_directory.resolve, hotel_id, booking.room_id)
+        if not room:
+            errors[index] = f"Room identifier {booking.room_id} not found."
+            continue
+        room_ids[index] = room.room_id
+        if not booking.customer_id:
+            guests[index] = guest_details(booking)
+    if errors:
+        raise batch_error(status_code, "Some bookings could not be resolved", errors)
+
+    # --- 2. Overlaps (against existing bookings and within the batch) ---
+    overlaps = await session.run_sync(find_batch_overlaps, [
+        (index, room_ids[index], booking.check_in_at, booking.expected_check_out_at)
+        for index, booking in enumerate(bookings)
+        if (booking.status or "Active") == "Active"
+    ])
+    if overlaps:
+        raise batch_error(409, "Some rooms are already booked for these dates", overlaps)
+
+    try:
+        # --- 3. Customers: existing ids must exist, guests are upserted ---
+        known_ids = {booking.customer_id for booking in bookings if booking.customer_id}
+        if known_ids:
+            found = set((await session.exec(
+                select(Customers.customer_id).where(Customers.customer_id.in_(known_ids))
+            )).all())
+            missing = {
+                index: f"Customer {booking.customer_id} not found."
+                for index, booking in enumerate(bookings)
+                if booking.customer_id and booking.customer_id not in found
+            }
+            if missing:
+                raise batch_error(404, "Some bookings could not be resolved", missing)
+        upserted = await session.run_sync(upsert_guest_customers, list(guests.values()))
+
+        # --- 4. Create Bookings ---
+        new_bookings = []
+        for index, booking in enumerate(bookings):
+            customer_id, _ = upserted[guests[index]["gov_id"]] if index in guests else (booking.customer_id, False)
+            new_bookings.append(Bookings(
+                hotel_id=hotel_id,
+                customer_id=customer_id,
+                room_id=room_ids[index],
+                created_by_user_id=current_user.user_id,
+                check_in_at=booking.check_in_at,
+                expected_check_out_at=booking.expected_check_out_at,
+                actual_check_out_at=None,
+                total_amount=booking.total_amount,
+                cash_amount=booking.cash_amount or 0,
+                card_amount=booking.card_amount or 0,
+                status=booking.status or "Active"
+            ))
+        session.add_all(new_bookings)
+        try:
+            await session.flush()
+        except IntegrityError as e:
+            # A concurrent booking won the room after the overlap check
+            await session.rollback()
+            if is_booking_overlap(e):
+                raise HTTPException(status_code=409, detail="Room is already booked for these dates")
+            raise
+
+        # --- 5. Rooms Occupied, Stats Rollup (same transaction) ---
+        booked_rooms = sorted(set(room_ids.values()))
+        await session.exec(update(Rooms).where(Rooms.room_id.in_(booked_rooms)).values(status="O"))
+        await session.run_sync(apply_booking_stats_many, [(None, new_booking) for new_booking in new_bookings])
+        version = await session.run_sync(bump_availability_version, hotel_id)
+        await session.commit()
+    except HTTPException:
+        await session.rollback()
+        raise
+
+    apply_committed_change(hotel_id, version, added=new_bookings, room_status={room_id: "O" for room_id in booked_rooms})
+    return {
+        "bookings": [
+            {
+                "index": index,
+                "customer_created": index in guests and upserted[guests[index]["gov_id"]][1],
+                "booking": new_booking,
+            }
+            for index, new_booking in enumerate(new_bookings)
+        ]
+    }
+
+@router.post("/import")
+def import_bookings_file(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(default=None, pattern="^(csv|json)$", description="Defaults to the file extension"),
+    current_user: HotelUsers = Depends(get_current_user_sync),
+    session: Session = Depends(get_session),
+):
+    """
+    Imports past and current stays exported from another PMS (CSV, JSON or
+    JSON Lines) in one transaction; see shared/booking_import.py for the
+    columns. All or nothing: invalid or overlapping rows are listed by their
+    row number and nothing is imported.
+    """
+    file_format = format or ("csv" if (file.filename or "").lower().endswith(".csv") else "json")
+    # Sync route: COPY needs the psycopg2 connection, and the upload is read as it is parsed
+    text_file = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="" if file_format == "csv" else None)
+    try:
+        result = import_bookings(session, current_user.hotel_id, current_user.user_id, text_file, file_format)
+        session.commit()
+    except BookingImportError as e:
+        session.rollback()
+        raise HTTPException(status_code=422, detail={
+            "message": e.message,
+            "errors": [{"row": row, "detail": e.errors[row]} for row in sorted(e.errors)],
+        })
+    except IntegrityError as e:
+        session.rollback()
+        # Staging was checked, so this is a booking committed since then
+        if is_booking_overlap(e):
+            raise HTTPException(status_code=409, detail="Some rooms were booked for these dates during the import; nothing imported")
+        raise
+    finally:
+        text_file.detach()
+
+    invalidate_hotel_caches(current_user.hotel_id)
+    return {"success": True, **result}
+
 @router.get("/customer/{customer_id}")
 def get_customer_history(
     customer_id: int,
     limit: int = Query(default=50, ge=1, le=500),
     offset: int = Query(default=0, ge=0),
-    current_user: HotelUsers = Depends(get_current_user),
+    current_user: HotelUsers = Depends(get_current_user_sync),
     session: Session = Depends(get_session),
 ):
     target_hotel_id = current_user.hotel_id
@@ -210,12 +339,9 @@ def get_customer_history(
     )
     bookings = session.exec(query).all()
     
-    # 2) Global Reputation
-    avg_rating_query = (
-        select(func.avg(CustomerFeedbacks.rating))
-        .where(CustomerFeedbacks.customer_id == customer_id)
-    )
-    scalar_avg = session.exec(avg_rating_query).one()
+    # 2) Global Reputation + Visit Counts (shared with the lookup endpoint)
+    profile = get_customer_profile(session, target_hotel_id, customer_id=customer_id, notes_limit=0) or {}
+    scalar_avg = profile.get("feedback_rating")
     customer_global_rating = float(scalar_avg) if scalar_avg is not None else 0.0
     
     # 3) Global Feedback
@@ -228,27 +354,19 @@ def get_customer_history(
     )
     feedbacks = session.exec(feedback_query).all()
 
-    # 4) Visit Counts
-    global_stays_query = select(func.count(Bookings.booking_id)).where(Bookings.customer_id == customer_id)
-    global_stays = session.exec(global_stays_query).one()
-    
-    local_stays_query = (
-        select(func.count(Bookings.booking_id))
-        .where(Bookings.customer_id == customer_id)
-        .where(Bookings.hotel_id == target_hotel_id)
-    )
-    local_stays = session.exec(local_stays_query).one()
+    global_stays = profile.get("global_stays", 0)
+    local_stays = profile.get("local_stays", 0)
 
-    return {
+    return fast_json({
         "viewer_hotel_id": target_hotel_id,
         "insights": {
             "global_rating": customer_global_rating,
             "total_system_stays": global_stays,
             "stays_at_this_hotel": local_stays
         },
-        "bookings_history": bookings,
-        "global_feedbacks": feedbacks
-    }
+        "bookings_history": project(bookings, Bookings),
+        "global_feedbacks": project(feedbacks, CustomerFeedbacks)
+    })
 
 from sqlmodel import Field
 
@@ -256,25 +374,22 @@ class CheckoutRequest(SQLModel):
     notes: Optional[str] = None
     rating: Optional[int] = Field(default=None, ge=1, le=5, description="Rating must be between 1 and 5")
 
+class BulkCheckoutItem(CheckoutRequest):
+    room_id: Optional[int] = None  # Room ID or Room Number, as in /room/{room_id}/checkout
+    booking_id: Optional[int] = None
+
 @router.get("/room/{room_id}/current")
 def get_current_booking_for_room(
     room_id: int,
     session: Session = Depends(get_session),
-    current_user: HotelUsers = Depends(get_current_user),
+    current_user: HotelUsers = Depends(get_current_user_sync),
 ):
     """
     Get the currently active booking for a specific room.
     Used by the Check-Out modal to show guest details.
     """
-    # Auto-resolve Room ID vs Room Number
-    real_room = session.get(Rooms, room_id)
-    
-    # Verify ownership
-    if real_room and real_room.hotel_id != current_user.hotel_id:
-        real_room = None
-        
-    if not real_room:
-        real_room = session.exec(select(Rooms).where(Rooms.room_number == str(room_id), Rooms.hotel_id == current_user.hotel_id)).first()
+    # Auto-resolve Room ID vs Room Number (scoped to this hotel)
+    real_room = room_directory.resolve(session, current_user.hotel_id, room_id)
     
     if not real_room:
         raise HTTPException(status_code=404, detail="Room not found")
@@ -296,7 +411,7 @@ def get_current_booking_for_room(
     # Get Customer Details
     customer = session.get(Customers, booking.customer_id)
     
-    return {
+    return fast_json({
         "booking_id": booking.booking_id,
         "customer_name": f"{customer.first_name} {customer.last_name}" if customer else "Unknown Guest",
         "customer_phone": customer.phone if customer else "",
@@ -304,13 +419,13 @@ def get_current_booking_for_room(
         "expected_check_out_at": booking.expected_check_out_at,
         "total_amount": booking.total_amount,
         "status": booking.status
-    }
+    })
 
 @router.post("/room/{room_id}/checkout")
-def checkout_room(
+async def checkout_room(
     room_id: int,
     request: CheckoutRequest,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: HotelUsers = Depends(get_current_user),
 ):
     """
@@ -319,41 +434,38 @@ def checkout_room(
     2. Set Room status to Available (or Dirty).
     3. (Optional) Create feedback.
     """
-    # Auto-resolve Room ID vs Room Number
-    real_room = session.get(Rooms, room_id)
-    
-    # Verify ownership
-    if real_room and real_room.hotel_id != current_user.hotel_id:
-        real_room = None
-        
-    if not real_room:
-        real_room = session.exec(select(Rooms).where(Rooms.room_number == str(room_id), Rooms.hotel_id == current_user.hotel_id)).first()
+    # Auto-resolve Room ID vs Room Number (scoped to this hotel)
+    real_room = await session.run_sync(room_directory.resolve, current_user.hotel_id, room_id)
     
     if not real_room:
          raise HTTPException(status_code=404, detail="Room not found")
          
     target_room_id = real_room.room_id
 
-    # 1. Get Active Booking
+    # 1. Get Active Booking, locked: a concurrent checkout of the same room
+    # waits here, then finds it no longer Active (404) instead of counting
+    # the stay and its feedback twice.
     statement = (
         select(Bookings)
         .where(Bookings.room_id == target_room_id)
         .where(Bookings.status == "Active")
         .order_by(Bookings.check_in_at.desc())
+        .with_for_update()
     )
-    booking = session.exec(statement).first()
+    booking = (await session.exec(statement)).first()
     
     if not booking:
         raise HTTPException(status_code=404, detail="No active booking to check out")
         
     # 2. Update Booking
+    before = snapshot_booking(booking)
     booking.status = "Completed"
-    booking.actual_check_out_at = datetime.utcnow()
+    booking.actual_check_out_at = datetime.now(timezone.utc)
     session.add(booking)
+    await session.run_sync(apply_booking_stats, before, booking)
     
     # 3. Update Room Status
-    real_room.status = "A" # Available
-    session.add(real_room)
+    await session.exec(update(Rooms).where(Rooms.room_id == target_room_id).values(status="A")) # Available
         
     # 4. Create Feedback (if rating provided)
     if request.rating and booking.customer_id:
@@ -363,27 +475,146 @@ def checkout_room(
             booking_id=booking.booking_id,
             rating=request.rating,
             notes=request.notes or "",
-            created_at=datetime.utcnow()
+            created_at=datetime.now(timezone.utc)
         )
         session.add(feedback)
         
-        # 4.1 Update Customer Average Rating
-        # We must commit the feedback first or query carefully to include it.
-        # Ideally, we query ALL ratings for this customer and average them.
-        session.flush() # Ensure feedback is visible to valid queries in this transaction
-        
-        avg_query = select(func.avg(CustomerFeedbacks.rating)).where(CustomerFeedbacks.customer_id == booking.customer_id)
-        new_avg = session.exec(avg_query).one()
-        
-        if new_avg is not None:
-            customer = session.get(Customers, booking.customer_id)
-            if customer:
-                # Explicitly cast to Decimal to match model definition
-                from decimal import Decimal
-                customer.average_rating = Decimal(str(new_avg)) # Convert via string to avoid float precision errors
-                session.add(customer)
+        # 4.1 Update Daily Stats + Customer Average Rating
+        # Running rating_sum/rating_count on the customer: one UPDATE, no scan of past feedback
+        await session.run_sync(
+            apply_feedback_stats, current_user.hotel_id, booking.customer_id, feedback.created_at, request.rating
+        )
         
-    session.commit()
+    version = await session.run_sync(bump_availability_version, current_user.hotel_id)
+    await session.commit()
+    apply_committed_change(current_user.hotel_id, version, removed=[booking], room_status={target_room_id: "A"})
     
     return {"success": True, "message": "Check-out completed successfully"}
 
+
+@router.post("/checkout/bulk")
+async def checkout_rooms_bulk(
+    items: List[BulkCheckoutItem],
+    session: AsyncSession = Depends(get_async_session),
+    current_user: HotelUsers = Depends(get_current_user),
+):
+    """
+    Check out many rooms (or bookings) at once, e.g. the morning checkout rush.
+    Same steps as /room/{room_id}/checkout for every item, done with set-based
+    statements in one transaction: either every item is checked out or none.
+    """
+    if not items:
+        raise HTTPException(status_code=400, detail="At least one room or booking is required.")
+    if len(items) > MAX_BATCH_BOOKINGS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_BOOKINGS} checkouts per request.")
+
+    hotel_id = current_user.hotel_id
+
+    # --- 1. Resolve Rooms (cached directory) ---
+    room_items: Dict[int, int] = {}
+    booking_items: Dict[int, int] = {}
+    errors: Dict[int, str] = {}
+    status_code = 404
+    for index, item in enumerate(items):
+        if (item.room_id is None) == (item.booking_id is None):
+            errors[index] = "Exactly one of room_id or booking_id is required."
+            status_code = 400
+        elif item.booking_id is not None:
+            booking_items[index] = item.booking_id
+        else:
+            real_room = await session.run_sync(room_directory.resolve, hotel_id, item.room_id)
+            if not real_room:
+                errors[index] = "Room not found"
+            else:
+                room_items[index] = real_room.room_id
+    if errors:
+        raise batch_error(status_code, "Some checkouts could not be resolved", errors)
+
+    # --- 2. Active Bookings (latest per room, as for a single checkout) ---
+    by_room: Dict[int, Bookings] = {}
+    if room_items:
+        statement = (
+            select(Bookings)
+            .where(Bookings.room_id.in_(set(room_items.values())))
+            .where(Bookings.status == "Active")
+            .order_by(Bookings.room_id, Bookings.check_in_at.desc())
+            .distinct(Bookings.room_id)
+        )
+        by_room = {booking.room_id: booking for booking in (await session.exec(statement)).all()}
+    by_id: Dict[int, Bookings] = {}
+    if booking_items:
+        statement = (
+            select(Bookings)
+            .where(Bookings.booking_id.in_(set(booking_items.values())))
+            .where(Bookings.hotel_id == hotel_id)
+            .where(Bookings.status == "Active")
+        )
+        by_id = {booking.booking_id: booking for booking in (await session.exec(statement)).all()}
+
+    targets: Dict[int, Bookings] = {}
+    first_index: Dict[int, int] = {}
+    for index in range(len(items)):
+        booking = by_room.get(room_items[index]) if index in room_items else by_id.get(booking_items[index])
+        if not booking:
+            errors[index] = "No active booking to check out"
+        elif booking.booking_id in first_index:
+            errors[index] = f"Same booking as item {first_index[booking.booking_id]}"
+        else:
+            targets[index] = booking
+            first_index[booking.booking_id] = index
+    if errors:
+        raise batch_error(404, "Some checkouts could not be resolved", errors)
+
+    # --- 3. Complete Bookings, Free Rooms (one UPDATE each) ---
+    checked_out_at = datetime.now(timezone.utc)
+    before = {index: snapshot_booking(booking) for index, booking in targets.items()}
+    room_ids = sorted({booking.room_id for booking in targets.values()})
+    # Re-checked in the UPDATE: a booking checked out by a concurrent request
+    # since step 2 is not returned, and nothing is counted twice.
+    completed = set((await session.exec(
+        update(Bookings)
+        .where(Bookings.booking_id.in_([booking.booking_id for booking in targets.values()]))
+        .where(Bookings.status == "Active")
+        .values(status="Completed", actual_check_out_at=checked_out_at)
+        .returning(Bookings.booking_id)
+    )).scalars().all())
+    if len(completed) < len(targets):
+        await session.rollback()
+        raise batch_error(409, "Some bookings were checked out concurrently", {
+            index: "Booking is no longer active"
+            for index, booking in targets.items() if booking.booking_id not in completed
+        })
+    await session.exec(update(Rooms).where(Rooms.room_id.in_(room_ids)).values(status="A"))  # Available
+    await session.run_sync(apply_booking_stats_many, [(before[index], targets[index]) for index in targets])
+
+    # --- 4. Feedback: one multi-row insert, one grouped rating update ---
+    rated = [index for index, item in enumerate(items) if item.rating and targets[index].customer_id]
+    if rated:
+        await session.exec(insert(CustomerFeedbacks).values([
+            {
+                "hotel_id": hotel_id,
+                "customer_id": targets[index].customer_id,
+                "booking_id": targets[index].booking_id,
+                "rating": items[index].rating,
+                "notes": items[index].notes or "",
+                "created_at": checked_out_at,
+            }
+            for index in rated
+        ]))
+        await session.run_sync(
+            apply_feedback_stats_many, hotel_id,
+            [(targets[index].customer_id, checked_out_at, items[index].rating) for index in rated],
+        )
+
+    version = await session.run_sync(bump_availability_version, hotel_id)
+    await session.commit()
+    apply_committed_change(hotel_id, version, removed=list(targets.values()), room_status={room_id: "A" for room_id in room_ids})
+
+    return {
+        "success": True,
+        "message": f"Checked out {len(targets)} bookings",
+        "checked_out": [
+            {"index": index, "booking_id": booking.booking_id, "room_id": booking.room_id, "feedback": index in rated}
+            for index, booking in targets.items()
+        ],
+    }
@@ -1,20 +1,27 @@
-from typing import List
-from datetime import datetime
-from fastapi import APIRouter, Depends, Query, HTTPException
+from typing import List, Optional
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, Header, Query, HTTPException, Response
 from sqlmodel import Session, select
-from shared.dependencies import get_session, get_current_user
+from sqlmodel.ext.asyncio.session import AsyncSession
+from shared.dependencies import get_session, get_async_session, get_current_user, get_current_user_sync
 from shared.models import Rooms, HotelUsers
 from shared.schemas import RoomCreate, RoomRead
-from shared.utils import find_available_rooms
+from shared.utils import find_available_rooms, room_occupancy_calendar
+from shared.availability import bump_availability_version, invalidate_hotel_caches
+from shared.room_directory import room_directory
+from shared.hotel_versions import etag_matches, hotel_versions, make_etag
+from shared.responses import fast_json, project
 
 router = APIRouter()
 
+MAX_CALENDAR_DAYS = 92
+
 @router.get("/available", response_model=List[RoomRead])
-def get_available_rooms(
+async def get_available_rooms(
     check_in_at: datetime,
     expected_check_out_at: datetime,
     current_user: HotelUsers = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """
     Returns a list of rooms available for the specific dates.
@@ -22,31 +29,61 @@ def get_available_rooms(
     if check_in_at >= expected_check_out_at:
          raise HTTPException(status_code=400, detail="Check-out must be after check-in")
          
-    rooms = find_available_rooms(
-        session, 
+    rooms = await session.run_sync(
+        find_available_rooms,
         current_user.hotel_id, 
         check_in_at, 
         expected_check_out_at
     )
-    return rooms
+    return fast_json(project(rooms, RoomRead))
+
+@router.get("/calendar")
+async def get_room_calendar(
+    start: date,
+    end: date,
+    current_user: HotelUsers = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Per-room occupancy bitmap for the days [start, end), one character per day
+    ("1" = booked). Replaces calling /available once per day of the grid.
+    """
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if (end - start).days > MAX_CALENDAR_DAYS:
+        raise HTTPException(status_code=400, detail=f"Calendar window is limited to {MAX_CALENDAR_DAYS} days")
+
+    return fast_json(await session.run_sync(room_occupancy_calendar, current_user.hotel_id, start, end))
 
 @router.get("", response_model=List[RoomRead])
 @router.get("/", response_model=List[RoomRead])
 def list_rooms(
-    current_user: HotelUsers = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(default=None),
+    current_user: HotelUsers = Depends(get_current_user_sync),
     session: Session = Depends(get_session),
 ):
     """
     List all rooms for the current user's hotel.
+    Supports If-None-Match: unchanged inventory is answered 304 from the cached version.
     """
-    stmt = select(Rooms).where(Rooms.hotel_id == current_user.hotel_id)
-    return session.exec(stmt).all()
+    hotel_id = current_user.hotel_id
+    versions = hotel_versions.get(session, hotel_id)
+    if versions is not None:
+        etag = make_etag("rooms", hotel_id, versions[0])
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+    version, rooms = room_directory.snapshot(session, hotel_id)
+    return fast_json(
+        project(rooms, RoomRead),
+        headers={"ETag": make_etag("rooms", hotel_id, version), "Cache-Control": "private, no-cache"},
+    )
 
 @router.post("", response_model=RoomRead)
 @router.post("/", response_model=RoomRead)
 def create_room(
     room: RoomCreate,
-    current_user: HotelUsers = Depends(get_current_user),
+    current_user: HotelUsers = Depends(get_current_user_sync),
     session: Session = Depends(get_session),
 ):
     """
@@ -60,6 +97,8 @@ def create_room(
         status=room.status
     )
     session.add(db_room)
+    bump_availability_version(session, current_user.hotel_id)
     session.commit()
     session.refresh(db_room)
+    invalidate_hotel_caches(current_user.hotel_id)
     return db_room
@@ -1,62 +1,282 @@
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.responses import StreamingResponse
-from sqlmodel import Session, select
-import pandas as pd
+from sqlmodel import Session, select, func
+from sqlalchemy import BigInteger, Boolean, DateTime, Integer, Numeric
+import pyarrow as pa
+import pyarrow.parquet as pq
+import csv
 import io
-from datetime import datetime
-from typing import Optional
+import itertools
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Iterator, Literal, Optional, Sequence
 
 from shared.database import engine
-from shared.models import Bookings
+from shared.models import Bookings, HotelDailyStats, Rooms
 
 app = FastAPI(title="Reporting Service")
 
-# --- Logging Middleware ---
-from shared.middleware import LogExceptionMiddleware
-app.add_middleware(LogExceptionMiddleware)
+# --- Logging & Metrics Middleware ---
+from shared.middleware import RequestMetricsMiddleware
+app.add_middleware(RequestMetricsMiddleware)
+
+# Rows fetched per server-side cursor round trip (and per streamed chunk)
+REPORT_BATCH_SIZE = int(os.getenv("REPORT_BATCH_SIZE", 5000))
+# Rows buffered per Parquet row group
+REPORT_ROW_GROUP_SIZE = int(os.getenv("REPORT_ROW_GROUP_SIZE", 100000))
+BOOKING_COLUMNS = list(Bookings.__table__.columns)
+
+def _arrow_type(column) -> pa.DataType:
+    """
+    Maps a SQLAlchemy column type to the Arrow type used for columnar exports.
+    """
+    sql_type = column.type
+    if isinstance(sql_type, DateTime):
+        return pa.timestamp("us", tz="UTC") if sql_type.timezone else pa.timestamp("us")
+    if isinstance(sql_type, Numeric):
+        return pa.decimal128(sql_type.precision, sql_type.scale)
+    if isinstance(sql_type, BigInteger):
+        return pa.int64()
+    if isinstance(sql_type, Integer):
+        return pa.int32()
+    if isinstance(sql_type, Boolean):
+        return pa.bool_()
+    return pa.string()
+
+BOOKING_ARROW_SCHEMA = pa.schema([pa.field(c.name, _arrow_type(c)) for c in BOOKING_COLUMNS])
 
 def get_session():
     with Session(engine) as session:
         yield session
 
-@app.post("/reports/bookings")
-def generate_booking_report(
+def iter_booking_batches(
     hotel_id: int,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    session: Session = Depends(get_session)
-):
-    # Construct Query
-    query = select(Bookings).where(Bookings.hotel_id == hotel_id)
-    
+    batch_size: int = REPORT_BATCH_SIZE,
+) -> Iterator[Sequence[tuple]]:
+    """
+    Yields bookings as fixed-size batches of plain tuples from a server-side cursor.
+    Owns its session so it stays open for as long as the response is streaming.
+    """
+    query = select(*BOOKING_COLUMNS).where(Bookings.hotel_id == hotel_id)
     if start_date:
         query = query.where(Bookings.check_in_at >= start_date)
     if end_date:
         query = query.where(Bookings.check_in_at <= end_date)
-        
-    # Execute (fetch all for report)
-    # Warning: For massive datasets, use chunking. For MVP, fetch all is fine.
-    bookings = session.exec(query).all()
-    
-    if not bookings:
+    query = query.order_by(Bookings.check_in_at, Bookings.booking_id)
+
+    with Session(engine) as session:
+        result = session.exec(query.execution_options(yield_per=batch_size))
+        for batch in result.partitions():
+            yield batch
+
+def iter_csv_chunks(batches: Iterable[Sequence[tuple]], header: Sequence[str]) -> Iterator[str]:
+    """
+    Encodes each batch as one CSV chunk, reusing a single small buffer.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+def _record_batch(batch: Sequence[tuple], schema: pa.Schema) -> pa.RecordBatch:
+    columns = list(zip(*batch))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file object that collects whatever the Arrow writers emit,
+    so it can be drained and streamed between batches.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def iter_parquet_chunks(batches: Iterable[Sequence[tuple]], schema: pa.Schema) -> Iterator[bytes]:
+    """
+    Encodes batches as Parquet, flushing one row group per REPORT_ROW_GROUP_SIZE rows.
+    """
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    pending, pending_rows = [], 0
+    for batch in batches:
+        pending.append(_record_batch(batch, schema))
+        pending_rows += len(batch)
+        if pending_rows >= REPORT_ROW_GROUP_SIZE:
+            writer.write_table(pa.Table.from_batches(pending), row_group_size=pending_rows)
+            pending, pending_rows = [], 0
+            yield sink.drain()
+    if pending:
+        writer.write_table(pa.Table.from_batches(pending), row_group_size=pending_rows)
+    writer.close()
+    yield sink.drain()
+
+def iter_arrow_chunks(batches: Iterable[Sequence[tuple]], schema: pa.Schema) -> Iterator[bytes]:
+    """
+    Encodes batches as an Arrow IPC stream, one record batch per cursor batch.
+    """
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(_record_batch(batch, schema))
+            yield sink.drain()
+    yield sink.drain()
+
+REPORT_FORMATS = {
+    # format: (encoder, media type, file extension)
+    "csv": (lambda batches: iter_csv_chunks(batches, BOOKING_ARROW_SCHEMA.names), "text/csv", "csv"),
+    "parquet": (lambda batches: iter_parquet_chunks(batches, BOOKING_ARROW_SCHEMA), "application/vnd.apache.parquet", "parquet"),
+    "arrow": (lambda batches: iter_arrow_chunks(batches, BOOKING_ARROW_SCHEMA), "application/vnd.apache.arrow.stream", "arrow"),
+}
+
+@app.post("/reports/bookings")
+def generate_booking_report(
+    hotel_id: int,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    format: Literal["csv", "parquet", "arrow"] = "csv",
+):
+    batches = iter_booking_batches(hotel_id, start_date, end_date)
+
+    # Pull the first batch up front so an empty report is still a 404
+    first_batch = next(batches, None)
+    if first_batch is None:
         raise HTTPException(status_code=404, detail="No bookings found for criteria")
-        
-    # Convert to Pandas DataFrame
-    data = [b.dict() for b in bookings]
-    df = pd.DataFrame(data)
-    
-    # Create CSV in memory
-    stream = io.StringIO()
-    df.to_csv(stream, index=False)
-    
+
+    encode, media_type, extension = REPORT_FORMATS[format]
     response = StreamingResponse(
-        iter([stream.getvalue()]),
-        media_type="text/csv"
+        encode(itertools.chain([first_batch], batches)),
+        media_type=media_type
     )
-    response.headers["Content-Disposition"] = "attachment; filename=bookings_report.csv"
+    response.headers["Content-Disposition"] = f"attachment; filename=bookings_report.{extension}"
     
     return response
 
+# --- Dashboards (served from hotel_daily_stats, O(days) not O(bookings)) ---
+
+def _default_range(start_date: Optional[date], end_date: Optional[date]):
+    end_date = end_date or datetime.now(timezone.utc).date()
+    start_date = start_date or end_date - timedelta(days=29)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    return start_date, end_date
+
+def _average_rating(rating_sum, rating_count):
+    return round(rating_sum / rating_count, 2) if rating_count else None
+
+@app.get("/reports/daily-stats")
+def get_daily_stats(
+    hotel_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    session: Session = Depends(get_session)
+):
+    """
+    Per-day occupancy, movement and revenue for a date range (days without activity are omitted).
+    """
+    start_date, end_date = _default_range(start_date, end_date)
+    rows = session.exec(
+        select(HotelDailyStats)
+        .where(HotelDailyStats.hotel_id == hotel_id)
+        .where(HotelDailyStats.stat_date >= start_date)
+        .where(HotelDailyStats.stat_date <= end_date)
+        .order_by(HotelDailyStats.stat_date)
+    ).all()
+    return [
+        {
+            "date": row.stat_date,
+            "occupied_room_nights": row.occupied_room_nights,
+            "arrivals": row.arrivals,
+            "departures": row.departures,
+            "revenue_total": float(row.revenue_total),
+            "revenue_cash": float(row.revenue_cash),
+            "revenue_card": float(row.revenue_card),
+            "average_rating": _average_rating(row.rating_sum, row.rating_count),
+        }
+        for row in rows
+    ]
+
+@app.get("/reports/summary")
+def get_summary(
+    hotel_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    session: Session = Depends(get_session)
+):
+    """
+    Totals over a date range, plus occupancy rate against the current room count.
+    """
+    start_date, end_date = _default_range(start_date, end_date)
+    totals = session.exec(
+        select(
+            func.coalesce(func.sum(HotelDailyStats.occupied_room_nights), 0),
+            func.coalesce(func.sum(HotelDailyStats.arrivals), 0),
+            func.coalesce(func.sum(HotelDailyStats.departures), 0),
+            func.coalesce(func.sum(HotelDailyStats.revenue_total), 0),
+            func.coalesce(func.sum(HotelDailyStats.revenue_cash), 0),
+            func.coalesce(func.sum(HotelDailyStats.revenue_card), 0),
+            func.coalesce(func.sum(HotelDailyStats.rating_sum), 0),
+            func.coalesce(func.sum(HotelDailyStats.rating_count), 0),
+        )
+        .where(HotelDailyStats.hotel_id == hotel_id)
+        .where(HotelDailyStats.stat_date >= start_date)
+        .where(HotelDailyStats.stat_date <= end_date)
+    ).one()
+    room_nights, arrivals, departures, revenue, cash, card, rating_sum, rating_count = totals
+    room_count = session.exec(select(func.count(Rooms.room_id)).where(Rooms.hotel_id == hotel_id)).one()
+    available_room_nights = room_count * ((end_date - start_date).days + 1)
+
+    return {
+        "hotel_id": hotel_id,
+        "start_date": start_date,
+        "end_date": end_date,
+        "occupied_room_nights": room_nights,
+        "occupancy_rate": round(room_nights / available_room_nights, 4) if available_room_nights else None,
+        "arrivals": arrivals,
+        "departures": departures,
+        "revenue_total": float(revenue),
+        "revenue_cash": float(cash),
+        "revenue_card": float(card),
+        "average_rating": _average_rating(rating_sum, rating_count),
+    }
+
 @app.get("/health")
 def health():
     return {"status": "ok", "service": "reporting"}
+
+# --- Metrics ---
+from shared.database import pool_stats
+from shared.middleware import prometheus_metrics
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return prometheus_metrics()
+
+@app.get("/metrics/pool")
+def pool_metrics():
+    return pool_stats()
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from shared.models import HotelUsers
+from shared.core.config import AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_ENTRIES
+
+# Fields copied out of hotelusers. Deliberately excludes password_hash and the
+# reset token columns - nothing downstream of get_current_user needs them.
+PRINCIPAL_FIELDS = ("user_id", "hotel_id", "username", "full_name", "is_active")
+
+
+class PrincipalCache:
+    """
+    Bounded, TTL-based cache of authenticated users keyed by user_id.
+
+    get_current_user() runs on every authenticated request, so a hit here
+    removes the hotelusers lookup from the hot path entirely. Commits made in
+    this process invalidate entries at once (see below); changes made by other
+    processes are seen once the entry expires, so the TTL is that window.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped by every invalidation; put() skips principals loaded before one
+        self.epoch = 0
+
+    def get(self, user_id: int) -> Optional[HotelUsers]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            fields = entry[1]
+        # Hand out a fresh transient instance so callers can't mutate the cached copy
+        return HotelUsers(**fields)
+
+    def put(self, user: HotelUsers, epoch: Optional[int] = None) -> None:
+        """
+        Caches user. Pass the epoch read before loading it: if any principal was
+        invalidated since, the row may predate that change and isn't cached.
+        """
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        fields = {name: getattr(user, name) for name in PRINCIPAL_FIELDS}
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return
+            self._entries[user.user_id] = (expires_at, fields)
+            self._entries.move_to_end(user.user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[int]) -> None:
+        if user_id is None:
+            return
+        with self._lock:
+            self.epoch += 1
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+principal_cache = PrincipalCache(AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_ENTRIES)
+
+
+# --- Invalidation ---
+# Any ORM write to hotelusers (create_user, reset_password, deactivation, ...)
+# drops the cached principal in this process once the write is committed:
+# before that, other requests still read the old row and could cache it again.
+# Writes rolled back change nothing and are forgotten.
+_PENDING_KEY = "principal_invalidations"
+
+
+@event.listens_for(HotelUsers, "after_insert")
+@event.listens_for(HotelUsers, "after_update")
+@event.listens_for(HotelUsers, "after_delete")
+def _queue_principal_invalidation(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_principals(session):
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
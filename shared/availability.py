@@ -0,0 +1,233 @@
+"""
+Per-process room availability engine.
+
+For each hotel we keep its rooms and, per room, the Active stays as a sorted
+interval list. Availability questions are then answered from memory:
+
+- The index for a hotel is loaded lazily on first use.
+- hotels.availability_version is bumped in the same transaction as every
+  booking/room change. Before answering we read it (one primary-key lookup)
+  and reload if another worker has moved it on.
+- Changes made by this worker are applied in place after commit, so the
+  common case never reloads.
+"""
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import text
+from sqlmodel import Session, select
+from shared.models import Bookings, Rooms
+from shared.room_directory import room_directory
+from shared.hotel_versions import hotel_versions
+
+ROOM_FIELDS = ("room_id", "hotel_id", "room_number", "room_type", "rate", "status")
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class RoomStays:
+    """
+    Active stays of one room, sorted by start. prefix_max_end[i] is the latest
+    end among stays[0..i], so an overlap test is a single bisect.
+    """
+
+    __slots__ = ("stays", "starts", "prefix_max_end")
+
+    def __init__(self):
+        self.stays = []  # (start, end, booking_id)
+        self.starts = []
+        self.prefix_max_end = []
+
+    def _rebuild_from(self, index: int) -> None:
+        self.starts[index:] = [stay[0] for stay in self.stays[index:]]
+        running = self.prefix_max_end[index - 1] if index else None
+        self.prefix_max_end[index:] = []
+        for start, end, _ in self.stays[index:]:
+            running = end if running is None or end > running else running
+            self.prefix_max_end.append(running)
+
+    def add(self, start: datetime, end: datetime, booking_id: int) -> None:
+        stay = (start, end, booking_id)
+        insort(self.stays, stay)
+        self._rebuild_from(self.stays.index(stay))
+
+    def remove(self, booking_id: int) -> None:
+        for i, stay in enumerate(self.stays):
+            if stay[2] == booking_id:
+                del self.stays[i]
+                del self.starts[i:]
+                self._rebuild_from(i)
+                return
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        # Stays that begin before `end` are stays[:i]; one of them overlaps
+        # iff the latest end among them is after `start`.
+        i = bisect_left(self.starts, end)
+        return i > 0 and self.prefix_max_end[i - 1] > start
+
+
+class HotelIndex:
+    def __init__(self, version: int, rooms: Dict[int, dict]):
+        self.version = version
+        self.rooms = rooms
+        self.stays: Dict[int, RoomStays] = {room_id: RoomStays() for room_id in rooms}
+
+    def add_stay(self, room_id: int, start, end, booking_id: int) -> None:
+        if start is None or end is None:
+            # Same as the SQL overlap test: a NULL bound never overlaps
+            return
+        self.stays.setdefault(room_id, RoomStays()).add(_as_utc(start), _as_utc(end), booking_id)
+
+    def remove_stay(self, room_id: int, booking_id: int) -> None:
+        if room_id in self.stays:
+            self.stays[room_id].remove(booking_id)
+
+    def is_free(self, room_id: int, start: datetime, end: datetime) -> bool:
+        stays = self.stays.get(room_id)
+        return stays is None or not stays.overlaps(start, end)
+
+
+class AvailabilityEngine:
+    def __init__(self):
+        self._hotels: Dict[int, HotelIndex] = {}
+        self._room_hotel: Dict[int, int] = {}  # room_id -> hotel_id (never changes)
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    # --- Loading ---
+
+    def _db_version(self, session: Session, hotel_id: int) -> Optional[int]:
+        return session.exec(
+            text("SELECT availability_version FROM hotels WHERE hotel_id = :hotel_id").bindparams(hotel_id=hotel_id)
+        ).scalar()
+
+    def _load(self, session: Session, hotel_id: int, version: int) -> HotelIndex:
+        rooms = session.exec(select(*(getattr(Rooms, f) for f in ROOM_FIELDS)).where(Rooms.hotel_id == hotel_id)).all()
+        index = HotelIndex(version, {row.room_id: dict(row._mapping) for row in rooms})
+        stays = session.exec(
+            select(Bookings.room_id, Bookings.check_in_at, Bookings.expected_check_out_at, Bookings.booking_id)
+            .where(Bookings.hotel_id == hotel_id, Bookings.status == "Active")
+        ).all()
+        for room_id, start, end, booking_id in stays:
+            index.add_stay(room_id, start, end, booking_id)
+        with self._lock:
+            self._hotels[hotel_id] = index
+            for room_id in index.rooms:
+                self._room_hotel[room_id] = hotel_id
+            self.loads += 1
+        return index
+
+    def get_index(self, session: Session, hotel_id: int) -> HotelIndex:
+        version = self._db_version(session, hotel_id)
+        index = self._hotels.get(hotel_id)
+        if index is not None and index.version == version:
+            return index
+        return self._load(session, hotel_id, version or 0)
+
+    # --- Queries ---
+
+    def find_available_rooms(self, session: Session, hotel_id: int, check_in_at: datetime, expected_check_out_at: datetime) -> List[Rooms]:
+        start, end = _as_utc(check_in_at), _as_utc(expected_check_out_at)
+        index = self.get_index(session, hotel_id)
+        with self._lock:
+            free = [fields for room_id, fields in sorted(index.rooms.items()) if index.is_free(room_id, start, end)]
+        # Fields come straight from the rooms table, so skip re-validation
+        return [Rooms.model_construct(**fields) for fields in free]
+
+    def is_room_available(self, session: Session, room_id: int, check_in_at: datetime, expected_check_out_at: datetime) -> bool:
+        hotel_id = self._room_hotel.get(room_id)
+        if hotel_id is None:
+            hotel_id = session.exec(select(Rooms.hotel_id).where(Rooms.room_id == room_id)).first()
+            if hotel_id is None:
+                # Unknown room: it can't be booked, so it isn't available
+                return False
+        index = self.get_index(session, hotel_id)
+        with self._lock:
+            return index.is_free(room_id, _as_utc(check_in_at), _as_utc(expected_check_out_at))
+
+    # --- Updates (call after the transaction that bumped the version has committed) ---
+
+    def apply(
+        self,
+        hotel_id: int,
+        version: int,
+        added: Iterable[Bookings] = (),
+        removed: Iterable[Bookings] = (),
+        room_status: Optional[Dict[int, str]] = None,
+    ) -> None:
+        """
+        Applies this worker's own committed change in place. If the local index
+        isn't exactly one version behind, someone else wrote in between and
+        the index is dropped so the next read reloads it.
+        """
+        with self._lock:
+            index = self._hotels.get(hotel_id)
+            if index is None:
+                return
+            if index.version != version - 1:
+                del self._hotels[hotel_id]
+                return
+            for booking in removed:
+                index.remove_stay(booking.room_id, booking.booking_id)
+            for booking in added:
+                if booking.status == "Active":
+                    index.add_stay(booking.room_id, booking.check_in_at, booking.expected_check_out_at, booking.booking_id)
+            for room_id, status in (room_status or {}).items():
+                if room_id in index.rooms:
+                    index.rooms[room_id]["status"] = status
+            index.version = version
+
+    def invalidate(self, hotel_id: int) -> None:
+        with self._lock:
+            self._hotels.pop(hotel_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hotels_loaded": len(self._hotels),
+                "active_stays": sum(len(s.stays) for i in self._hotels.values() for s in i.stays.values()),
+                "loads": self.loads,
+            }
+
+
+availability_engine = AvailabilityEngine()
+
+
+def bump_availability_version(session: Session, hotel_id: int) -> int:
+    """
+    Increments hotels.availability_version inside the caller's transaction and
+    returns the new value (pass it to availability_engine.apply after commit).
+    """
+    return session.exec(
+        text(
+            "UPDATE hotels SET availability_version = availability_version + 1 "
+            "WHERE hotel_id = :hotel_id RETURNING availability_version"
+        ).bindparams(hotel_id=hotel_id)
+    ).scalar()
+
+
+def apply_committed_change(
+    hotel_id: int,
+    version: int,
+    added: Iterable[Bookings] = (),
+    removed: Iterable[Bookings] = (),
+    room_status: Optional[Dict[int, str]] = None,
+) -> None:
+    """
+    After commit: brings this worker's hotel caches (availability index and
+    room directory) up to `version`, the value bump_availability_version returned.
+    """
+    availability_engine.apply(hotel_id, version, added=added, removed=removed, room_status=room_status)
+    room_directory.apply(hotel_id, version, room_status or {})
+    hotel_versions.note_availability(hotel_id, version)
+
+
+def invalidate_hotel_caches(hotel_id: int) -> None:
+    availability_engine.invalidate(hotel_id)
+    room_directory.invalidate(hotel_id)
+    hotel_versions.invalidate(hotel_id)
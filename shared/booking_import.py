@@ -0,0 +1,342 @@
+"""
+Bulk import of past and current stays exported from another PMS.
+
+import_bookings() takes a CSV or JSON export and loads it into one hotel in a
+single transaction:
+
+1. Rows are parsed and checked as they are read. Each one is streamed with
+   COPY into a temp staging table, so the file is never held in memory (a
+   JSON array is the exception: it is parsed whole; JSON Lines is not).
+2. Active stays are checked against each other and against the hotel's
+   Active bookings, the same rule as excl_bookings_room_stay.
+3. Guests are upserted with one INSERT ... ON CONFLICT (gov_id), following
+   the rules of the booking form: gov_id is normalized the same way, names
+   and phones of existing customers are kept, and provided address fields
+   are updated.
+4. Bookings are inserted from staging with one INSERT ... SELECT.
+5. The new bookings' contributions to the derived stats (hotel_daily_stats,
+   customer stay counters) are added with one statement per table, instead
+   of row by row, and without locking the tables for other hotels.
+
+It is all or nothing: any invalid row raises BookingImportError listing the
+failing rows, and the caller rolls back. Otherwise the caller commits.
+
+Columns / keys (the BookingCreate names):
+  room_id or room_number, guest_gov_id, guest_name, check_in_at,
+  expected_check_out_at, total_amount                                   required
+  guest_phone, guest_address, guest_city, guest_state, guest_zip_code,
+  actual_check_out_at, cash_amount, card_amount, num_guests, status     optional
+Timestamps are ISO 8601; ones without an offset are taken as UTC. status
+is Active, Completed or Cancelled. It defaults to Completed for stays that
+are checked out or already over, and to Active otherwise.
+"""
+import csv
+import itertools
+import json
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Dict, IO, Iterator, Optional, Tuple
+from sqlalchemy import text
+from sqlmodel import Session
+from shared.availability import bump_availability_version
+from shared.bulk_copy import copy_rows
+from shared.customers import GUEST_ADDRESS_FIELDS, normalize_gov_id, split_guest_name
+from shared.room_directory import room_directory
+from shared.stats import apply_new_bookings_stats
+
+BOOKING_STATUSES = ("Active", "Completed", "Cancelled")
+MAX_IMPORT_ERRORS = 100  # parsing stops once this many rows have failed
+
+STAGING_COLUMNS = (
+    "row_number", "room_id", "gov_id", "first_name", "last_name", "phone", *GUEST_ADDRESS_FIELDS,
+    "check_in_at", "expected_check_out_at", "actual_check_out_at",
+    "total_amount", "cash_amount", "card_amount", "num_guests", "status",
+)
+
+CREATE_STAGING_SQL = """
+CREATE TEMP TABLE import_bookings (
+    row_number INTEGER PRIMARY KEY,
+    room_id INTEGER NOT NULL,
+    gov_id TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    phone TEXT,
+    address TEXT,
+    city TEXT,
+    state TEXT,
+    zip_code TEXT,
+    check_in_at TIMESTAMPTZ NOT NULL,
+    expected_check_out_at TIMESTAMPTZ NOT NULL,
+    actual_check_out_at TIMESTAMPTZ,
+    total_amount NUMERIC(10, 2) NOT NULL,
+    cash_amount NUMERIC(10, 2) NOT NULL,
+    card_amount NUMERIC(10, 2) NOT NULL,
+    num_guests INTEGER NOT NULL,
+    status TEXT NOT NULL
+) ON COMMIT DROP
+"""
+
+# Active stays that overlap an Active booking of the room, or another Active
+# row of the file. Rows are compared with the latest check-out among the
+# room's rows checking in before them (a window, not a self-join), and the
+# clashing row is only looked up for the rows reported.
+STAGING_OVERLAPS_SQL = """
+WITH active AS (
+    SELECT row_number, room_id, check_in_at, expected_check_out_at,
+           MAX(expected_check_out_at) OVER (
+               PARTITION BY room_id ORDER BY check_in_at, row_number
+               ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+           ) > check_in_at AS clashes
+    FROM import_bookings
+    WHERE status = 'Active'
+), flagged AS (
+    SELECT a.*,
+           EXISTS (
+               SELECT 1 FROM bookings b
+               WHERE b.room_id = a.room_id AND b.status = 'Active'
+                 AND b.stay && tstzrange(a.check_in_at, a.expected_check_out_at, '[)')
+           ) AS booked
+    FROM active a
+)
+SELECT f.row_number, f.booked,
+       CASE WHEN f.clashes THEN (
+           SELECT MIN(o.row_number) FROM import_bookings o
+           WHERE o.room_id = f.room_id AND o.status = 'Active' AND o.row_number <> f.row_number
+             AND o.check_in_at < f.expected_check_out_at AND o.expected_check_out_at > f.check_in_at
+       ) END AS clashes_with
+FROM flagged f
+WHERE f.booked OR f.clashes
+ORDER BY f.row_number
+LIMIT :limit
+"""
+
+# Same rules as upsert_guest_customers: the first row of a gov_id names a new
+# customer, the last non-empty value of each address field wins
+UPSERT_CUSTOMERS_SQL = """
+WITH guests AS (
+    SELECT gov_id,
+           (ARRAY_AGG(first_name ORDER BY row_number))[1] AS first_name,
+           (ARRAY_AGG(last_name ORDER BY row_number))[1] AS last_name,
+           (ARRAY_AGG(phone ORDER BY row_number))[1] AS phone,
+           {address_fields}
+    FROM import_bookings
+    GROUP BY gov_id
+), upserted AS (
+    INSERT INTO customers AS c (gov_id, first_name, last_name, phone, {address_columns}, average_rating)
+    SELECT gov_id, first_name, last_name, phone, {address_columns}, 5.0 FROM guests
+    ORDER BY gov_id
+    ON CONFLICT (gov_id) DO UPDATE SET {address_updates}
+    RETURNING xmax = 0 AS created
+)
+SELECT COUNT(*) FILTER (WHERE created) AS created, COUNT(*) FILTER (WHERE NOT created) AS existing FROM upserted
+""".format(
+    address_fields=",\n           ".join(
+        f"(ARRAY_AGG({field} ORDER BY row_number DESC) FILTER (WHERE {field} IS NOT NULL))[1] AS {field}"
+        for field in GUEST_ADDRESS_FIELDS
+    ),
+    address_columns=", ".join(GUEST_ADDRESS_FIELDS),
+    address_updates=", ".join(f"{field} = COALESCE(EXCLUDED.{field}, c.{field})" for field in GUEST_ADDRESS_FIELDS),
+)
+
+INSERT_BOOKINGS_SQL = """
+INSERT INTO bookings (
+    hotel_id, customer_id, room_id, created_by_user_id, num_guests,
+    check_in_at, expected_check_out_at, actual_check_out_at,
+    total_amount, cash_amount, card_amount, status
+)
+SELECT :hotel_id, c.customer_id, s.room_id, :user_id, s.num_guests,
+       s.check_in_at, s.expected_check_out_at, s.actual_check_out_at,
+       s.total_amount, s.cash_amount, s.card_amount, s.status
+FROM import_bookings s
+JOIN customers c ON c.gov_id = s.gov_id
+ORDER BY s.row_number
+RETURNING booking_id
+"""
+
+# Guests in house now: their rooms become Occupied, like after a check-in
+OCCUPY_ROOMS_SQL = """
+UPDATE rooms SET status = 'O'
+WHERE hotel_id = :hotel_id AND status <> 'O' AND room_id IN (
+    SELECT room_id FROM import_bookings
+    WHERE status = 'Active' AND check_in_at <= now() AND expected_check_out_at > now()
+)
+"""
+
+
+class BookingImportError(Exception):
+    """The import was rejected; errors maps 1-based row numbers to what is wrong with them."""
+
+    def __init__(self, message: str, errors: Dict[int, str]):
+        super().__init__(message)
+        self.message = message
+        self.errors = errors
+
+
+def read_records(file: IO[str], file_format: str) -> Iterator[Tuple[int, Optional[dict]]]:
+    """
+    (row_number, record) for each row of a CSV export (with a header row) or a
+    JSON export (a top-level array, or JSON Lines). record is None for a JSON
+    row that isn't an object.
+    """
+    if file_format == "csv":
+        yield from enumerate(csv.DictReader(file), start=1)
+        return
+
+    first = file.readline()
+    while first and not first.strip():
+        first = file.readline()
+    if first.lstrip().startswith("["):
+        records = json.loads(first + file.read())
+        for row_number, record in enumerate(records, start=1):
+            yield row_number, record if isinstance(record, dict) else None
+        return
+
+    row_number = 0
+    for line in itertools.chain([first], file):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield row_number, record if isinstance(record, dict) else None
+
+
+def _text(record: dict, key: str) -> Optional[str]:
+    value = record.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _timestamp(record: dict, key: str) -> Optional[datetime]:
+    value = _text(record, key)
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{key} is not an ISO 8601 timestamp: {value!r}")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _amount(record: dict, key: str) -> Optional[Decimal]:
+    value = _text(record, key)
+    if value is None:
+        return None
+    try:
+        amount = Decimal(value).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise ValueError(f"{key} is not a number: {value!r}")
+    if amount < 0 or amount >= Decimal("1e8"):
+        raise ValueError(f"{key} is out of range: {value}")
+    return amount
+
+
+def staging_row(row_number: int, record: dict, rooms: Tuple[Dict[int, int], Dict[str, int]], now: datetime) -> tuple:
+    """One checked row in STAGING_COLUMNS order; raises ValueError saying what is wrong."""
+    by_id, by_number = rooms
+    room = _text(record, "room_id")
+    # Same precedence as the booking form: a room_id of this hotel, then a room number
+    room_id = by_id.get(int(room)) if room is not None and room.isdigit() else None
+    if room_id is None:
+        room = room if room is not None else _text(record, "room_number")
+        room_id = by_number.get(room)
+    if room_id is None:
+        raise ValueError(f"Room {room!r} not found" if room else "room_id or room_number is required")
+
+    gov_id, name = _text(record, "guest_gov_id"), _text(record, "guest_name")
+    if not gov_id or not name:
+        raise ValueError("guest_gov_id and guest_name are required")
+    first_name, last_name = split_guest_name(name)
+
+    check_in_at = _timestamp(record, "check_in_at")
+    expected_check_out_at = _timestamp(record, "expected_check_out_at")
+    if check_in_at is None or expected_check_out_at is None:
+        raise ValueError("check_in_at and expected_check_out_at are required")
+    if expected_check_out_at <= check_in_at:
+        raise ValueError("expected_check_out_at must be after check_in_at")
+    actual_check_out_at = _timestamp(record, "actual_check_out_at")
+
+    total_amount = _amount(record, "total_amount")
+    if total_amount is None:
+        raise ValueError("total_amount is required")
+
+    status = _text(record, "status")
+    if status is None:
+        status = "Completed" if actual_check_out_at or expected_check_out_at <= now else "Active"
+    elif status not in BOOKING_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(BOOKING_STATUSES)}")
+
+    num_guests = _text(record, "num_guests") or "1"
+    if not num_guests.isdigit() or int(num_guests) < 1:
+        raise ValueError(f"num_guests must be a positive whole number: {num_guests!r}")
+
+    return (
+        row_number, room_id, normalize_gov_id(gov_id), first_name, last_name, _text(record, "guest_phone"),
+        *(_text(record, f"guest_{field}") for field in GUEST_ADDRESS_FIELDS),
+        check_in_at, expected_check_out_at, actual_check_out_at,
+        total_amount, _amount(record, "cash_amount") or Decimal("0.00"),
+        _amount(record, "card_amount") or Decimal("0.00"), int(num_guests), status,
+    )
+
+
+def import_bookings(session: Session, hotel_id: int, user_id: int, file: IO[str], file_format: str) -> dict:
+    """
+    Loads an export into hotel_id, recording user_id as the creator of every
+    booking. Returns counts of what was imported; raises BookingImportError
+    if any row is invalid. Caller commits (or rolls back).
+    """
+    rooms = room_directory.list(session, hotel_id)
+    room_index = ({room.room_id: room.room_id for room in rooms}, {room.room_number: room.room_id for room in rooms})
+    now = datetime.now(timezone.utc)
+    errors: Dict[int, str] = {}
+
+    def checked_rows():
+        for row_number, record in read_records(file, file_format):
+            try:
+                if record is None:
+                    raise ValueError("Not a JSON object")
+                yield staging_row(row_number, record, room_index, now)
+            except ValueError as e:
+                errors[row_number] = str(e)
+                if len(errors) >= MAX_IMPORT_ERRORS:
+                    return
+
+    # --- 1. Parse and stream into staging ---
+    session.exec(text(CREATE_STAGING_SQL))
+    try:
+        with session.connection().connection.cursor() as cursor:
+            staged = copy_rows(cursor, "import_bookings", STAGING_COLUMNS, checked_rows())
+    except (ValueError, csv.Error) as e:
+        raise BookingImportError(f"Unreadable {file_format.upper()} file: {e}", errors)
+    if errors:
+        raise BookingImportError(f"{len(errors)} invalid rows, nothing imported", errors)
+    if not staged:
+        raise BookingImportError("The file has no rows", {})
+
+    # --- 2. Active stays must not overlap ---
+    session.exec(text("ANALYZE import_bookings"))
+    overlaps = {
+        row.row_number: "Room is already booked for these dates" if row.booked else f"Overlaps Active row {row.clashes_with}"
+        for row in session.exec(text(STAGING_OVERLAPS_SQL).bindparams(limit=MAX_IMPORT_ERRORS))
+    }
+    if overlaps:
+        raise BookingImportError(f"{len(overlaps)} rows overlap existing stays, nothing imported", overlaps)
+
+    # --- 3. Customers, 4. bookings, rooms in house ---
+    customers = session.exec(text(UPSERT_CUSTOMERS_SQL)).one()
+    booking_ids = session.exec(text(INSERT_BOOKINGS_SQL).bindparams(hotel_id=hotel_id, user_id=user_id)).scalars().all()
+    occupied = session.exec(text(OCCUPY_ROOMS_SQL).bindparams(hotel_id=hotel_id)).rowcount
+
+    # --- 5. Derived stats: the new bookings' contributions, added set-based ---
+    apply_new_bookings_stats(session, booking_ids)
+    bump_availability_version(session, hotel_id)
+    return {
+        "bookings": len(booking_ids),
+        "customers_created": customers.created,
+        "customers_existing": customers.existing,
+        "rooms_occupied": occupied,
+    }
@@ -0,0 +1,64 @@
+"""
+Streaming COPY FROM STDIN for bulk loads (synthetic data, booking imports).
+
+copy_rows() feeds rows from any iterable to Postgres in COPY text format
+through a file-like reader, so a load of millions of rows never holds more
+than one buffer of them in memory. Needs a psycopg2 cursor (the sync engine):
+asyncpg connections don't have copy_expert.
+"""
+from datetime import datetime
+from typing import Iterable, Optional, Sequence
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class CopyStream:
+    """File-like reader over rows in COPY text format; counts the rows it has handed out."""
+
+    def __init__(self, rows: Iterable[Sequence]):
+        self._rows = iter(rows)
+        self._buffer = ""
+        self.rows = 0
+        self.error: Optional[BaseException] = None
+
+    def read(self, size: int = -1) -> str:
+        size = size if size and size > 0 else 1 << 16
+        parts, length = [self._buffer], len(self._buffer)
+        try:
+            for row in self._rows:
+                line = "\t".join(_copy_value(value) for value in row) + "\n"
+                parts.append(line)
+                length += len(line)
+                self.rows += 1
+                if length >= size:
+                    break
+        except Exception as e:
+            # psycopg2 only reports "COPY from stdin failed"; keep the real error for copy_rows
+            self.error = e
+            raise
+        data = "".join(parts)
+        self._buffer = data[size:]
+        return data[:size]
+
+
+def copy_rows(cursor, table: str, columns: Sequence[str], rows: Iterable[Sequence]) -> int:
+    """
+    COPY rows (tuples in `columns` order) into table; returns how many were
+    sent. An exception raised while producing the rows is re-raised as is.
+    """
+    stream = CopyStream(rows)
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", stream)
+    except Exception:
+        if stream.error is not None:
+            raise stream.error
+        raise
+    return stream.rows
@@ -9,3 +9,28 @@ if not SECRET_KEY:
     raise ValueError("SECRET_KEY environment variable is not set")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+
+# Authenticated principal cache (see shared/auth_cache.py).
+# Each worker process keeps its own copy and only sees commits made through it:
+# a user deactivated or changed through the identity service (or any other
+# worker) stays authenticated here, as before, for up to this many seconds.
+# Keep it short; 0 = always read hotelusers.
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", 5))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000))
+
+# Password hashing pool (see shared/core/security.py).
+# bcrypt runs in its own process pool so a login storm can't starve the request threadpool.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32))
+PASSWORD_HASH_RETRY_AFTER_SECONDS = int(os.getenv("PASSWORD_HASH_RETRY_AFTER_SECONDS", 2))
+
+# Per-hotel version cache behind ETags on /hotel/{id} and /rooms (see shared/hotel_versions.py).
+# A conditional GET within this window is answered from memory; changes made through
+# another worker show up once the cached version expires. 0 = always read the DB.
+HOTEL_VERSION_TTL_SECONDS = float(os.getenv("HOTEL_VERSION_TTL_SECONDS", 2))
+
+# Idempotency-Key replay for booking / check-in POSTs (see shared/idempotency.py).
+# Stored responses are replayed for this long; each worker also keeps the most
+# recent ones in memory so a retry storm doesn't even hit the database.
+IDEMPOTENCY_KEY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", 24))
+IDEMPOTENCY_CACHE_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_CACHE_MAX_ENTRIES", 10000))
@@ -1,8 +1,18 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 from typing import Optional
 import jwt 
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
-from shared.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from shared.core.config import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES,
+    PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_RETRY_AFTER_SECONDS,
+)
+from shared.metrics import Histogram
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -21,3 +31,103 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+# --- Password Hashing Pool ---
+
+def _timed_call(fn, *args):
+    """Runs in a pool worker: fn's result and how long fn itself took."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool with a bounded queue.
+
+    Only awaited from the event loop, so the in-flight counter needs no lock.
+    When workers + max_queue jobs are already in flight, new work is rejected
+    with a 503 + Retry-After instead of piling up behind the storm. A job hit
+    by a dead worker is retried once on a fresh pool, then answered the same way.
+    """
+
+    def __init__(self, workers: int, max_queue: int, retry_after: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.rejected = 0
+        self.pool_restarts = 0
+        self.hash_latency = Histogram()  # bcrypt itself, in the worker
+        self.queue_wait = Histogram()  # submit to result, minus the hash
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the parent holds DB pools and event loop threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        # Concurrent jobs see the same broken pool: only the first one replaces it
+        if self._executor is executor:
+            self._executor = None
+            self.pool_restarts += 1
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _busy(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy. Please retry shortly.",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    async def run(self, fn, *args):
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise self._busy()
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            for attempt in range(2):
+                executor = self._get_executor()
+                start = time.perf_counter()
+                try:
+                    result, hash_seconds = await loop.run_in_executor(executor, _timed_call, fn, *args)
+                except BrokenProcessPool:
+                    # A worker died: retry once on a fresh pool, then give up with a 503
+                    self._discard_executor(executor)
+                    continue
+                self.hash_latency.observe(hash_seconds)
+                self.queue_wait.observe(max(time.perf_counter() - start - hash_seconds, 0.0))
+                return result
+            raise self._busy()
+        finally:
+            self.in_flight -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": max(self.in_flight - self.workers, 0),
+            "rejected": self.rejected,
+            "pool_restarts": self.pool_restarts,
+            "hash_latency_seconds": self.hash_latency.snapshot(),
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+        }
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_RETRY_AFTER_SECONDS)
+
+async def verify_password_async(plain_password, hashed_password):
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await password_hasher.run(get_password_hash, password)
@@ -0,0 +1,120 @@
+"""
+Customer profile lookups shared by the guest lookup and history endpoints.
+
+get_customer_profile returns the customer row together with their stay
+counts, last visit, feedback rating and the hotel's most recent notes in a
+single round trip, so both endpoints read the same numbers. Stay counts come
+from the counters maintained by shared/stats.py, never from bookings.
+
+upsert_guest_customers resolves the guest details typed in at booking time
+to customer_ids, creating the customers that don't exist yet.
+"""
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, literal_column, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
+from shared.models import Customers
+
+# Updated on an existing customer when the booking provides them
+GUEST_ADDRESS_FIELDS = ("address", "city", "state", "zip_code")
+
+CUSTOMER_PROFILE_SQL = """
+SELECT c.customer_id, c.gov_id, c.first_name, c.last_name, c.phone,
+       c.address, c.city, c.state, c.zip_code, c.average_rating,
+       c.total_stays AS global_stays,
+       COALESCE(stays.local_stays, 0) AS local_stays,
+       stays.last_visit,
+       CASE WHEN c.rating_count > 0 THEN CAST(c.rating_sum AS NUMERIC) / c.rating_count END AS feedback_rating,
+       ARRAY(
+           SELECT f.notes FROM customerfeedbacks f
+           WHERE f.customer_id = c.customer_id AND f.hotel_id = :hotel_id
+             AND f.notes IS NOT NULL AND f.notes <> ''
+           ORDER BY f.created_at DESC
+           LIMIT :notes_limit
+       ) AS recent_notes
+FROM customers c
+CROSS JOIN LATERAL (
+    SELECT MAX(s.stay_count) FILTER (WHERE s.hotel_id = :hotel_id) AS local_stays,
+           MAX(s.last_visit) AS last_visit
+    FROM customer_hotel_stats s
+    WHERE s.customer_id = c.customer_id
+) stays
+WHERE {where}
+"""
+
+
+def get_customer_profile(
+    session: Session,
+    hotel_id: int,
+    gov_id: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    notes_limit: int = 5,
+) -> Optional[dict]:
+    """
+    Customer (by gov_id or customer_id) plus:
+      global_stays / local_stays  non-cancelled stays network-wide / at hotel_id
+      last_visit                  latest check-in anywhere
+      feedback_rating             average of all feedback ratings (None if unrated)
+      recent_notes                latest non-empty feedback notes left at hotel_id
+    Returns None if the customer doesn't exist.
+    """
+    if gov_id is not None:
+        where, params = "c.gov_id = :gov_id", {"gov_id": gov_id}
+    else:
+        where, params = "c.customer_id = :customer_id", {"customer_id": customer_id}
+
+    statement = text(CUSTOMER_PROFILE_SQL.format(where=where)).bindparams(
+        hotel_id=hotel_id, notes_limit=notes_limit, **params
+    )
+    row = session.exec(statement).first()
+    return dict(row._mapping) if row else None
+
+
+def normalize_gov_id(gov_id: str) -> str:
+    """The form gov_ids are stored and looked up in."""
+    return gov_id.strip().upper()
+
+
+def split_guest_name(name: str) -> Tuple[str, str]:
+    """(first_name, last_name) from a single typed-in name."""
+    parts = name.strip().split(" ", 1)
+    return parts[0], parts[1] if len(parts) > 1 else ""
+
+
+def guest_details(booking) -> dict:
+    """Customers columns from a BookingCreate's guest_* fields."""
+    first_name, last_name = split_guest_name(booking.guest_name)
+    return {
+        "gov_id": normalize_gov_id(booking.guest_gov_id),
+        "first_name": first_name,
+        "last_name": last_name,
+        "phone": booking.guest_phone,
+        **{field: getattr(booking, f"guest_{field}") or None for field in GUEST_ADDRESS_FIELDS},
+    }
+
+
+def upsert_guest_customers(session: Session, guests: List[dict]) -> Dict[str, Tuple[int, bool]]:
+    """
+    Creates the guests (from guest_details) whose gov_id is new and updates the
+    address fields provided for the ones that exist, in one statement. Later
+    entries for the same gov_id override earlier address fields.
+    Returns {gov_id: (customer_id, created)}.
+    """
+    merged: Dict[str, dict] = {}
+    for guest in guests:
+        current = merged.setdefault(guest["gov_id"], dict(guest))
+        for field in GUEST_ADDRESS_FIELDS:
+            if guest[field]:
+                current[field] = guest[field]
+    if not merged:
+        return {}
+
+    table = Customers.__table__
+    stmt = insert(Customers).values(
+        [{**guest, "average_rating": 5.0} for _, guest in sorted(merged.items())]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.gov_id],
+        set_={field: func.coalesce(stmt.excluded[field], table.c[field]) for field in GUEST_ADDRESS_FIELDS},
+    ).returning(table.c.customer_id, table.c.gov_id, literal_column("xmax = 0").label("created"))
+    return {row.gov_id: (row.customer_id, row.created) for row in session.exec(stmt)}
@@ -1,6 +1,17 @@
 from sqlmodel import create_engine, Session
+from sqlalchemy import event, exc as sa_exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 from dotenv import load_dotenv
+from shared.metrics import Histogram
+from contextvars import ContextVar, Token
+from typing import Callable, Optional, Tuple
+import logging
 import os
+import re
+import threading
+import time
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -14,11 +25,201 @@ if DATABASE_URL.startswith("postgres://"):
 # Only enable SQL echo if DEBUG is explicitly true
 DEBUG_MODE = os.getenv("DEBUG", "false").lower() == "true"
 
+# --- Connection Pool ---
+# Every service process has its own pools (one sync, one async) against the
+# shared Postgres, so size them per service. DB_POOL_MODE=null opens a fresh
+# connection per checkout, for running behind an external pooler (PgBouncer).
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue").lower()
+if DB_POOL_MODE not in ("queue", "null"):
+    raise ValueError("DB_POOL_MODE must be 'queue' or 'null'")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))    # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", -1))      # seconds; -1 = never recycle
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"  # avoids stale connections
+
+# Checkout wait in seconds: a pool with free connections answers in microseconds
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class PoolStats:
+    """Checkout counters for one engine's pool, kept across pool recreation (dispose)."""
+
+    def __init__(self):
+        self.wait_seconds = Histogram(POOL_WAIT_BUCKETS)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self._lock = threading.Lock()
+
+    def checked_out(self, waited: float) -> None:
+        self.wait_seconds.observe(waited)
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def checked_in(self) -> None:
+        with self._lock:
+            self.in_use -= 1
+
+
+def _instrumented(pool_class, stats: PoolStats):
+    """pool_class, timing every checkout into `stats`."""
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = pool_class._do_get(self)
+        except sa_exc.TimeoutError:
+            stats.wait_seconds.observe(time.perf_counter() - started)
+            with stats._lock:
+                stats.timeouts += 1
+            raise
+        stats.checked_out(time.perf_counter() - started)
+        return connection
+
+    def _do_return_conn(self, record):
+        stats.checked_in()
+        pool_class._do_return_conn(self, record)
+
+    return type(pool_class.__name__, (pool_class,), {"_do_get": _do_get, "_do_return_conn": _do_return_conn})
+
+
+def _pool_options(pool_class, stats: PoolStats) -> dict:
+    if DB_POOL_MODE == "null":
+        return {"poolclass": _instrumented(NullPool, stats), "pool_pre_ping": DB_POOL_PRE_PING}
+    return {
+        "poolclass": _instrumented(pool_class, stats),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+sync_pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
 engine = create_engine(
     DATABASE_URL,
     echo=DEBUG_MODE,    # Controlled by env var
-    pool_pre_ping=True  # avoids stale connections
+    **_pool_options(QueuePool, sync_pool_stats)
 )
 
+def _async_database_url(url: str) -> str:
+    """
+    Derive the asyncpg URL from DATABASE_URL (postgresql[+driver]:// -> postgresql+asyncpg://).
+    asyncpg does not understand libpq's 'sslmode', so it is passed on as 'ssl'.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return url
+    parsed = parsed.set(drivername="postgresql+asyncpg")
+    if "sslmode" in parsed.query:
+        parsed = parsed.update_query_dict({"ssl": parsed.query["sslmode"]}).difference_update_query(["sslmode"])
+    return parsed.render_as_string(hide_password=False)
+
+# Async engine for routes that run natively on the event loop.
+# ASYNC_DATABASE_URL overrides the derived URL (e.g. to point at a different driver).
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(DATABASE_URL)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=DEBUG_MODE,
+    **_pool_options(AsyncAdaptedQueuePool, async_pool_stats)
+)
+
+
+def _pool_metrics(pool, stats: PoolStats) -> dict:
+    metrics = {
+        "mode": DB_POOL_MODE,
+        "pre_ping": DB_POOL_PRE_PING,
+        "in_use": stats.in_use,
+        "peak_in_use": stats.peak_in_use,
+        "checkouts": stats.checkouts,
+        "timeouts": stats.timeouts,
+        "wait_seconds": stats.wait_seconds.snapshot(),
+    }
+    if isinstance(pool, QueuePool):
+        metrics.update({
+            "pool_size": pool.size(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "timeout": DB_POOL_TIMEOUT,
+            "recycle": DB_POOL_RECYCLE,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),  # negative while the pool is still filling up
+        })
+    return metrics
+
+
+def pool_stats() -> dict:
+    """Live numbers for this process's sync and async pools (served at /metrics/pool)."""
+    return {
+        "sync": _pool_metrics(engine.pool, sync_pool_stats),
+        "async": _pool_metrics(async_engine.sync_engine.pool, async_pool_stats),
+    }
+
+
+# --- Query Tracking ---
+# Every statement on either engine is counted and timed into the current
+# request's QueryStats (see RequestMetricsMiddleware, which reports them as a
+# Server-Timing header and per-route metrics). Statements slower than
+# SLOW_QUERY_THRESHOLD_MS are logged with the route that ran them; <= 0 disables.
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 200))
+slow_query_logger = logging.getLogger("slow_query")
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds", "route")
+
+    def __init__(self, route: Callable[[], str]):
+        self.count = 0
+        self.seconds = 0.0
+        self.route = route  # called lazily, only to label a slow query
+
+
+_current_queries: ContextVar[Optional[QueryStats]] = ContextVar("current_queries", default=None)
+
+
+def track_queries(route: Callable[[], str]) -> Tuple[QueryStats, Token]:
+    """Starts counting this context's statements; pass the token to untrack_queries()."""
+    stats = QueryStats(route)
+    return stats, _current_queries.set(stats)
+
+
+def untrack_queries(token: Token) -> None:
+    _current_queries.reset(token)
+
+
+_SQL_STRING = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBER = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")  # not $1 placeholders or identifiers
+_SQL_SPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str, limit: int = 1000) -> str:
+    """One line, literals replaced with ?, so the same query always logs the same way."""
+    statement = _SQL_STRING.sub("?", statement)
+    statement = _SQL_NUMBER.sub("?", statement)
+    return _SQL_SPACE.sub(" ", statement).strip()[:limit]
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context.query_started = time.perf_counter()
+
 
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.query_started
+    stats = _current_queries.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    if SLOW_QUERY_THRESHOLD_MS > 0 and elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        slow_query_logger.warning(
+            "%.1f ms route=%s sql=%s", elapsed * 1000, stats.route() if stats else "-", normalize_sql(statement)
+        )
 
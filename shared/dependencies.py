@@ -1,9 +1,12 @@
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 import jwt
-from shared.database import engine
+from shared.database import engine, async_engine
 from shared.models import HotelUsers
+from shared.auth_cache import principal_cache
 from shared.core.config import SECRET_KEY, ALGORITHM
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -12,10 +15,14 @@ def get_session():
     with Session(engine) as session:
         yield session
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    session: Session = Depends(get_session)
-) -> HotelUsers:
+async def get_async_session():
+    # expire_on_commit=False: attribute access after commit would otherwise
+    # trigger an implicit (sync) refresh, which the async session can't do.
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+def _token_user_id(token: str) -> int:
+    """user_id from a valid access token, else 401."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -28,11 +35,43 @@ def get_current_user(
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
-        
-    user = session.get(HotelUsers, int(user_id))
+    return int(user_id)
+
+def _active_principal(user: Optional[HotelUsers], epoch: Optional[int] = None) -> HotelUsers:
     if not user:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if epoch is not None:
+        principal_cache.put(user, epoch)
     if not user.is_active:
         raise HTTPException(status_code=403, detail="User is inactive")
-        
-    return user
\ No newline at end of file
+    return user
+
+# Async routes authenticate with get_current_user, sync (def) routes with
+# get_current_user_sync: each shares the route's own session on a principal
+# cache miss, so a request never holds a connection from both pools.
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_async_session)
+) -> HotelUsers:
+    user_id = _token_user_id(token)
+    # Principal cache: skips the hotelusers round trip on a hit
+    user = principal_cache.get(user_id)
+    if user is not None:
+        return _active_principal(user)
+    epoch = principal_cache.epoch
+    return _active_principal(await session.get(HotelUsers, user_id), epoch)
+
+def get_current_user_sync(
+    token: str = Depends(oauth2_scheme),
+    session: Session = Depends(get_session)
+) -> HotelUsers:
+    user_id = _token_user_id(token)
+    user = principal_cache.get(user_id)
+    if user is not None:
+        return _active_principal(user)
+    epoch = principal_cache.epoch
+    return _active_principal(session.get(HotelUsers, user_id), epoch)
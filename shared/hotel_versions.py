@@ -0,0 +1,85 @@
+"""
+Per-hotel version numbers for conditional GETs.
+
+hotels.availability_version moves whenever rooms or bookings change (room
+inventory/status), hotels.settings_version whenever the hotel row itself
+changes (a trigger bumps it). ETags are built from these, so a poll whose
+If-None-Match still matches can be answered 304 without loading or
+serializing anything.
+
+Versions are cached per worker for HOTEL_VERSION_TTL_SECONDS. Changes made
+by this worker update the cache immediately (note_availability/invalidate).
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from sqlalchemy import text
+from sqlmodel import Session
+from shared.core.config import HOTEL_VERSION_TTL_SECONDS
+
+
+class HotelVersionCache:
+    def __init__(self, ttl_seconds: float = HOTEL_VERSION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[int, Tuple[float, int, int]] = {}  # hotel_id -> (expires_at, availability, settings)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session: Session, hotel_id: int) -> Optional[Tuple[int, int]]:
+        """(availability_version, settings_version), or None if the hotel doesn't exist."""
+        entry = self._entries.get(hotel_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1], entry[2]
+        self.misses += 1
+        row = session.exec(
+            text("SELECT availability_version, settings_version FROM hotels WHERE hotel_id = :hotel_id")
+            .bindparams(hotel_id=hotel_id)
+        ).first()
+        if row is None:
+            return None
+        self.put(hotel_id, row.availability_version, row.settings_version)
+        return row.availability_version, row.settings_version
+
+    def put(self, hotel_id: int, availability_version: int, settings_version: int) -> None:
+        with self._lock:
+            self._entries[hotel_id] = (time.monotonic() + self.ttl_seconds, availability_version, settings_version)
+
+    def note_availability(self, hotel_id: int, version: int) -> None:
+        # Called after this worker commits a bump; keeps our own changes visible immediately
+        with self._lock:
+            entry = self._entries.get(hotel_id)
+            if entry is not None and version > entry[1]:
+                self._entries[hotel_id] = (entry[0], version, entry[2])
+
+    def invalidate(self, hotel_id: int) -> None:
+        with self._lock:
+            self._entries.pop(hotel_id, None)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hotels_cached": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+hotel_versions = HotelVersionCache()
+
+
+def make_etag(kind: str, hotel_id: int, version: int) -> str:
+    return f'"{kind}-{hotel_id}-{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates)
@@ -0,0 +1,155 @@
+"""
+Idempotency-Key support for POSTs the frontend retries (create booking, check-in).
+
+When a request carries an Idempotency-Key header, its response is stored in
+idempotency_keys in the same transaction as the booking it created, so both
+commit or neither does. A retry with the same key gets the stored response
+back (with Idempotent-Replayed: true) without re-running the booking logic:
+from this worker's LRU, else by one primary-key lookup.
+
+- Keys are scoped to the hotel. Reusing a key for a different request
+  (other endpoint or body) is a 422.
+- Only completed requests are stored. A request that failed (e.g. 409
+  overlap) left nothing behind and may be retried with the same key.
+- Two concurrent requests with one key: the second one blocks on the first
+  one's booking (overlap constraint) or key row, then rolls back its own work
+  and replays the first one's response.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from fastapi.responses import Response
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, SQLModel
+from shared.models import IdempotencyKeys
+from shared.core.config import IDEMPOTENCY_KEY_TTL_HOURS, IDEMPOTENCY_CACHE_MAX_ENTRIES
+
+MAX_KEY_LENGTH = 255
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyCache:
+    """Bounded LRU of recently stored responses, keyed by (hotel_id, key)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, str], tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.replays = 0
+
+    def get(self, hotel_id: int, key: str) -> Optional[tuple]:
+        """(request_hash, status_code, body), or None."""
+        with self._lock:
+            entry = self._entries.get((hotel_id, key))
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end((hotel_id, key))
+            self.hits += 1
+            return entry[1:]
+
+    def put(self, hotel_id: int, key: str, request_hash: str, status_code: int, body: bytes, expires_at: float) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[(hotel_id, key)] = (expires_at, request_hash, status_code, body)
+            self._entries.move_to_end((hotel_id, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "replays": self.replays,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+idempotency_cache = IdempotencyCache(IDEMPOTENCY_KEY_TTL_HOURS * 3600, IDEMPOTENCY_CACHE_MAX_ENTRIES)
+
+
+def request_hash(endpoint: str, payload: SQLModel) -> str:
+    """Fingerprint of the request a key was first used for."""
+    return hashlib.sha256(endpoint.encode() + b"\n" + payload.model_dump_json().encode()).hexdigest()
+
+
+def _expiry_cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+
+
+def find_response(session: Session, hotel_id: int, key: str, fingerprint: str) -> Optional[Response]:
+    """
+    The stored response for this key, ready to send back, or None if the key
+    is new (or expired). Raises 400/422 for an unusable key.
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters.")
+
+    stored = idempotency_cache.get(hotel_id, key)
+    if stored is None:
+        row = session.exec(
+            text("""
+                SELECT request_hash, status_code, response_body, created_at FROM idempotency_keys
+                WHERE hotel_id = :hotel_id AND key = :key AND created_at > :cutoff
+            """).bindparams(hotel_id=hotel_id, key=key, cutoff=_expiry_cutoff())
+        ).first()
+        if row is None:
+            return None
+        stored = (row.request_hash, row.status_code, bytes(row.response_body))
+        remaining = (row.created_at - _expiry_cutoff()).total_seconds()
+        idempotency_cache.put(hotel_id, key, *stored, expires_at=time.monotonic() + remaining)
+
+    stored_hash, status_code, body = stored
+    if stored_hash != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request.")
+    idempotency_cache.replays += 1
+    return Response(content=body, status_code=status_code, media_type="application/json", headers={REPLAY_HEADER: "true"})
+
+
+def save_response(session: Session, hotel_id: int, key: str, fingerprint: str, status_code: int, body: bytes) -> bool:
+    """
+    Stores the response in the caller's transaction (call right before commit).
+    Returns False if a concurrent request with the same key committed first:
+    the caller should roll back and replay find_response() instead.
+    """
+    table = IdempotencyKeys.__table__
+    stmt = insert(IdempotencyKeys).values(
+        hotel_id=hotel_id, key=key, request_hash=fingerprint, status_code=status_code, response_body=body
+    )
+    # An expired row for the key is simply replaced
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.hotel_id, table.c.key],
+        set_={name: stmt.excluded[name] for name in ("request_hash", "status_code", "response_body", "created_at")},
+        where=table.c.created_at <= _expiry_cutoff(),
+    ).returning(table.c.created_at)
+    return session.exec(stmt).first() is not None
+
+
+def remember_response(hotel_id: int, key: str, fingerprint: str, status_code: int, body: bytes) -> None:
+    """After commit: lets this worker answer retries from memory."""
+    idempotency_cache.put(
+        hotel_id, key, fingerprint, status_code, body,
+        expires_at=time.monotonic() + IDEMPOTENCY_KEY_TTL_HOURS * 3600,
+    )
+
+
+def purge_expired(session: Session) -> int:
+    """Deletes keys past IDEMPOTENCY_KEY_TTL_HOURS. Returns the number removed."""
+    result = session.exec(
+        text("DELETE FROM idempotency_keys WHERE created_at <= :cutoff").bindparams(cutoff=_expiry_cutoff())
+    )
+    return result.rowcount
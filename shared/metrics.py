@@ -0,0 +1,118 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, Sequence, Tuple
+
+# Latency buckets in seconds (Prometheus client defaults)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+class Histogram:
+    """
+    Minimal thread-safe histogram with cumulative buckets.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)  # first bucket with value <= bound, else +Inf
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative, running = {}, 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            running += n
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {"count": count, "sum": round(total, 6), "buckets": cumulative}
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+
+# SQL statements per request
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+def _render_histograms(lines: list, name: str, help_text: str, series) -> None:
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (method, route), histogram in series:
+        snapshot = histogram.snapshot()
+        labels = _labels(method=method, route=route)
+        for bound, count in snapshot["buckets"].items():
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f"{name}_sum{{{labels}}} {snapshot['sum']}")
+        lines.append(f"{name}_count{{{labels}}} {snapshot['count']}")
+
+
+class RequestMetrics:
+    """
+    Per-route request metrics for one service, rendered in the Prometheus
+    text format. Routes are labelled by their template (/rooms/{room_id}),
+    never the raw path, so the number of series stays bounded.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # (method, route) -> (latency, db time, queries) histograms
+        self._routes: Dict[Tuple[str, str], Tuple[Histogram, Histogram, Histogram]] = {}
+        self._responses: Dict[Tuple[str, str, int], int] = {}
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, method: str, route: str, status: int, seconds: float, queries: int = 0, db_seconds: float = 0.0) -> None:
+        key = (method, route)
+        histograms = self._routes.get(key)
+        with self._lock:
+            self.in_flight -= 1
+            self._responses[(method, route, status)] = self._responses.get((method, route, status), 0) + 1
+            if histograms is None:
+                histograms = self._routes.setdefault(
+                    key, (Histogram(self.buckets), Histogram(self.buckets), Histogram(QUERY_COUNT_BUCKETS))
+                )
+        latency, db_time, query_count = histograms
+        latency.observe(seconds)
+        db_time.observe(db_seconds)
+        query_count.observe(queries)
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            routes = sorted(self._routes.items())
+            responses = sorted(self._responses.items())
+            in_flight = self.in_flight
+
+        lines = []
+        _render_histograms(lines, "http_request_duration_seconds", "Request latency by route template.",
+                           [(key, histograms[0]) for key, histograms in routes])
+        _render_histograms(lines, "http_request_db_seconds", "Time spent in SQL statements per request.",
+                           [(key, histograms[1]) for key, histograms in routes])
+        _render_histograms(lines, "http_request_db_queries", "SQL statements executed per request.",
+                           [(key, histograms[2]) for key, histograms in routes])
+
+        lines += [
+            "# HELP http_requests_total Responses by route template and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in responses:
+            lines.append(f"http_requests_total{{{_labels(method=method, route=route, status=str(status))}}} {count}")
+
+        lines += [
+            "# HELP http_requests_in_flight Requests currently being handled.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {in_flight}",
+        ]
+        return "\n".join(lines) + "\n"
@@ -1,8 +1,11 @@
 import sys
 import logging
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
+import time
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from shared.database import track_queries, untrack_queries
+from shared.metrics import RequestMetrics
 import traceback
 
 # Setup basic logging config
@@ -13,17 +16,102 @@ logging.basicConfig(
 )
 logger = logging.getLogger("api_logger")
 
-class LogExceptionMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+# One registry per process; every service serves it at GET /metrics
+request_metrics = RequestMetrics()
+
+UNMATCHED_ROUTE = "<unmatched>"  # 404s etc., kept as one series whatever the path
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _match_route(scope: Scope):
+    """The app route matching this request, for when routing didn't record one in the scope."""
+    router = getattr(scope.get("app"), "router", None)
+    for route in getattr(router, "routes", ()):
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            return child_scope.get("route", route)
+    return None
+
+
+def route_template(scope: Scope) -> str:
+    """The matched route's path template, with its router prefix (e.g. /bookings/room/{room_id})."""
+    route = scope.get("route") or _match_route(scope)
+    template = getattr(route, "path", None)
+    if not template:
+        return UNMATCHED_ROUTE
+    # Routes of a router included with a prefix may carry the router-relative
+    # template: the prefix is whatever the request path has before the
+    # template's segments (path parameters never span a "/")
+    parts = scope["path"].split("/")
+    prefix_length = len(parts) - template.count("/")
+    prefix = "/".join(parts[:prefix_length]) if prefix_length > 1 else ""
+    return prefix + template
+
+
+def server_timing(queries, elapsed: float) -> str:
+    return f'db;dur={queries.seconds * 1000:.1f};desc="{queries.count} queries", app;dur={elapsed * 1000:.1f}'
+
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware: times every HTTP request into request_metrics and
+    logs unhandled exceptions (answering a generic 500 when nothing has been
+    sent yet). Unlike BaseHTTPMiddleware it doesn't wrap the request/response
+    in extra tasks and streams, so streaming responses pass straight through.
+
+    SQL statements run for the request are counted and timed (see
+    shared/database.py) and reported on the response as
+    Server-Timing: db;dur=<ms>;desc="<n> queries", app;dur=<ms>
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, response_started
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_started = True
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", server_timing(queries, time.perf_counter() - started).encode("latin-1"))
+                ]
+            await send(message)
+
+        self.metrics.started()
+        queries, token = track_queries(lambda: route_template(scope))
+        started = time.perf_counter()
         try:
-            return await call_next(request)
-        except Exception as exc:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
             # Log the full error with traceback
-            logger.error(f"Global Exception on {request.method} {request.url}")
+            logger.error(f"Global Exception on {scope['method']} {scope.get('path')}")
             logger.error(traceback.format_exc())
-            
+            if response_started:
+                raise
             # Return a generic 500 error to user
-            return JSONResponse(
+            status = 500
+            response = JSONResponse(
                 status_code=500,
                 content={"detail": "Internal Server Error. Please check server logs for details."}
             )
+            await response(scope, receive, send)
+        finally:
+            untrack_queries(token)
+            self.metrics.finished(
+                scope["method"], route_template(scope), status, time.perf_counter() - started,
+                queries=queries.count, db_seconds=queries.seconds,
+            )
+
+
+def prometheus_metrics() -> PlainTextResponse:
+    """GET /metrics handler body: request_metrics in the Prometheus text format."""
+    return PlainTextResponse(request_metrics.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,8 +1,8 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, Any, Dict, List
 from decimal import Decimal
 from sqlmodel import Field, SQLModel, func
-from sqlalchemy import Column, DateTime, DECIMAL, ForeignKey, Index, BigInteger, CheckConstraint, SmallInteger, Text, UniqueConstraint
+from sqlalchemy import Column, DateTime, DECIMAL, ForeignKey, Index, BigInteger, CheckConstraint, LargeBinary, SmallInteger, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB
 
 class Hotels(SQLModel, table=True):
@@ -38,6 +38,17 @@ class Hotels(SQLModel, table=True):
         sa_column=Column(JSONB, nullable=True)
     )
 
+    # Bumped on every change to this hotel's bookings or rooms (see shared/availability.py)
+    availability_version: int = Field(
+        default=0,
+        sa_column=Column(BigInteger, nullable=False, default=0, server_default="0")
+    )
+    # Bumped by a DB trigger whenever the hotel row itself is updated (ETag for GET /hotel/{id})
+    settings_version: int = Field(
+        default=0,
+        sa_column=Column(BigInteger, nullable=False, default=0, server_default="0")
+    )
+
 # --- 2. Customers ---
 class Customers(SQLModel, table=True):
     __tablename__ = "customers"
@@ -63,6 +74,13 @@ class Customers(SQLModel, table=True):
         sa_column=Column(DateTime(timezone=True), default=func.now())
     )
 
+    # Non-cancelled bookings network-wide, maintained by shared/stats.py
+    total_stays: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
+    # Running feedback totals; average_rating = rating_sum / rating_count (see shared/stats.py)
+    rating_sum: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
 # --- 3. CustomerNotes ---
 class CustomerNotes(SQLModel, table=True):
     __tablename__ = "customer_notes"
@@ -108,6 +126,8 @@ class Rooms(SQLModel, table=True):
     status: str = Field(default="A")
 
 # --- 6. Bookings ---
+# The generated `stay` tstzrange column and its excl_bookings_room_stay overlap
+# constraint live in the database only (Alembic 3f1b7c2d9e10).
 class Bookings(SQLModel, table=True):
     __tablename__ = "bookings"
     __table_args__ = (
@@ -171,3 +191,57 @@ class CustomerFeedbacks(SQLModel, table=True):
         default=None, 
         sa_column=Column(DateTime(timezone=True), default=func.now())
     )
+
+# --- 8. HotelDailyStats ---
+# Rollup maintained incrementally by shared/stats.py; rebuild with scripts/backfill_daily_stats.py
+class HotelDailyStats(SQLModel, table=True):
+    __tablename__ = "hotel_daily_stats"
+
+    hotel_id: int = Field(foreign_key="hotels.hotel_id", primary_key=True)
+    stat_date: date = Field(primary_key=True)
+
+    occupied_room_nights: int = Field(default=0)
+    arrivals: int = Field(default=0)
+    departures: int = Field(default=0)
+
+    revenue_total: Decimal = Field(
+        default=0, sa_column=Column(DECIMAL(precision=12, scale=2), nullable=False, default=0))
+    revenue_cash: Decimal = Field(
+        default=0, sa_column=Column(DECIMAL(precision=12, scale=2), nullable=False, default=0))
+    revenue_card: Decimal = Field(
+        default=0, sa_column=Column(DECIMAL(precision=12, scale=2), nullable=False, default=0))
+
+    # Average rating = rating_sum / rating_count (kept as sums so updates stay additive)
+    rating_sum: int = Field(default=0)
+    rating_count: int = Field(default=0)
+
+# --- 9. CustomerHotelStats ---
+# Per (customer, hotel) stay counter maintained by shared/stats.py; repair with scripts/reconcile_customer_stats.py
+class CustomerHotelStats(SQLModel, table=True):
+    __tablename__ = "customer_hotel_stats"
+
+    customer_id: int = Field(foreign_key="customers.customer_id", primary_key=True)
+    hotel_id: int = Field(foreign_key="hotels.hotel_id", primary_key=True)
+
+    stay_count: int = Field(default=0)
+    last_visit: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+
+# --- 10. IdempotencyKeys ---
+# Responses of completed POSTs sent with an Idempotency-Key (see shared/idempotency.py);
+# expired rows are removed by scripts/purge_idempotency_keys.py
+class IdempotencyKeys(SQLModel, table=True):
+    __tablename__ = "idempotency_keys"
+
+    hotel_id: int = Field(foreign_key="hotels.hotel_id", primary_key=True)
+    key: str = Field(primary_key=True, max_length=255)
+
+    request_hash: str = Field(max_length=64)  # sha256 of endpoint + request body
+    status_code: int
+    response_body: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    created_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    )
@@ -0,0 +1,87 @@
+"""
+Fast JSON response path for read-heavy endpoints.
+
+Returning ORM objects from a route makes FastAPI validate every row against
+the response_model, walk the result again with jsonable_encoder, and only
+then json.dumps it. Rows loaded from our own tables don't need re-validating,
+so routes can opt in to:
+
+    return fast_json(project(rooms, RoomRead), headers=...)
+
+project() copies just the schema's fields off each row into plain dicts, and
+FastJSONResponse serializes them with orjson. The response_model on the
+route still documents the shape in OpenAPI.
+
+Output is the same JSON the default path produced: projected fields follow
+pydantic's JSON mode (Decimal fields as strings, float fields as numbers,
+UTC datetimes ending in "Z"); bare values in hand-built dicts follow
+jsonable_encoder (Decimal as a number, datetime.isoformat()).
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Type, Union, get_args, get_origin
+import orjson
+from fastapi.responses import Response
+from sqlmodel import SQLModel
+
+_PROJECTIONS: Dict[Type[SQLModel], Tuple[Tuple[str, Optional[Callable]], ...]] = {}
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, SQLModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _decimal_str(value):
+    return str(value) if isinstance(value, Decimal) else value
+
+
+def _as_float(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _datetime_str(value):
+    if not isinstance(value, datetime):
+        return value
+    text = value.isoformat()
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+def _converter(annotation) -> Optional[Callable]:
+    # Optional[X] -> X
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        annotation = args[0] if len(args) == 1 else annotation
+    return {Decimal: _decimal_str, float: _as_float, datetime: _datetime_str}.get(annotation)
+
+
+def _projection(schema: Type[SQLModel]) -> Tuple[Tuple[str, Optional[Callable]], ...]:
+    projection = _PROJECTIONS.get(schema)
+    if projection is None:
+        projection = _PROJECTIONS[schema] = tuple(
+            (name, _converter(field.annotation)) for name, field in schema.model_fields.items()
+        )
+    return projection
+
+
+def project(rows: Iterable[Any], schema: Type[SQLModel]) -> List[dict]:
+    """Plain dicts holding `schema`'s fields, read straight off trusted rows."""
+    projection = _projection(schema)
+    return [
+        {name: convert(getattr(row, name, None)) if convert else getattr(row, name, None) for name, convert in projection}
+        for row in rows
+    ]
+
+
+def fast_json(content: Any, status_code: int = 200, headers: Optional[Mapping[str, str]] = None) -> FastJSONResponse:
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
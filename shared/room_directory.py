@@ -0,0 +1,121 @@
+"""
+Per-process room directory.
+
+Maps each hotel's room_id and room_number to the room's fields so routes can
+resolve "which room does the user mean" without touching the database.
+
+- room_id, room_number and hotel_id never change once a room exists, so
+  resolve() trusts the cached entry and only goes to the DB on a miss (a room
+  created by another worker), reloading that hotel once.
+- status/rate can change, so list() checks hotels.availability_version
+  (bumped by every booking/room change) and reloads when it has moved.
+- Routes that change rooms call invalidate() (or apply() for their own
+  status change) after commit.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlmodel import Session, select
+from shared.models import Rooms
+
+ROOM_FIELDS = ("room_id", "hotel_id", "room_number", "room_type", "rate", "status")
+
+
+class HotelRooms:
+    def __init__(self, version: int, rooms: Dict[int, dict]):
+        self.version = version
+        self.by_id = rooms
+        self.by_number = {fields["room_number"]: room_id for room_id, fields in rooms.items()}
+
+
+class RoomDirectory:
+    def __init__(self):
+        self._hotels: Dict[int, HotelRooms] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    def _load(self, session: Session, hotel_id: int) -> HotelRooms:
+        version = session.exec(
+            text("SELECT availability_version FROM hotels WHERE hotel_id = :hotel_id").bindparams(hotel_id=hotel_id)
+        ).scalar() or 0
+        rows = session.exec(select(*(getattr(Rooms, f) for f in ROOM_FIELDS)).where(Rooms.hotel_id == hotel_id)).all()
+        entry = HotelRooms(version, {row.room_id: dict(row._mapping) for row in rows})
+        with self._lock:
+            self._hotels[hotel_id] = entry
+            self.loads += 1
+        return entry
+
+    @staticmethod
+    def _lookup(entry: HotelRooms, identifier) -> Optional[dict]:
+        # Same precedence as before: a room_id of this hotel, then a room_number
+        if isinstance(identifier, int) and identifier in entry.by_id:
+            return entry.by_id[identifier]
+        room_id = entry.by_number.get(str(identifier))
+        return entry.by_id[room_id] if room_id is not None else None
+
+    def resolve(self, session: Session, hotel_id: int, identifier) -> Optional[Rooms]:
+        """
+        The hotel's room with this room_id or room_number, or None. The
+        returned Rooms is detached: use it to read ids, not to write status.
+        """
+        entry = self._hotels.get(hotel_id)
+        fields = self._lookup(entry, identifier) if entry is not None else None
+        if fields is None:
+            self.misses += 1
+            fields = self._lookup(self._load(session, hotel_id), identifier)
+        else:
+            self.hits += 1
+        return Rooms.model_construct(**fields) if fields is not None else None
+
+    def list(self, session: Session, hotel_id: int) -> List[Rooms]:
+        return self.snapshot(session, hotel_id)[1]
+
+    def snapshot(self, session: Session, hotel_id: int) -> Tuple[int, List[Rooms]]:
+        """(availability_version, rooms) as of one consistent read."""
+        version = session.exec(
+            text("SELECT availability_version FROM hotels WHERE hotel_id = :hotel_id").bindparams(hotel_id=hotel_id)
+        ).scalar() or 0
+        entry = self._hotels.get(hotel_id)
+        if entry is None or entry.version != version:
+            self.misses += 1
+            entry = self._load(session, hotel_id)
+        else:
+            self.hits += 1
+        with self._lock:
+            return entry.version, [Rooms.model_construct(**fields) for _, fields in sorted(entry.by_id.items())]
+
+    def apply(self, hotel_id: int, version: int, room_status: Dict[int, str]) -> None:
+        """
+        Applies this worker's committed room status change. Dropped (and later
+        reloaded) unless the entry is exactly one version behind.
+        """
+        with self._lock:
+            entry = self._hotels.get(hotel_id)
+            if entry is None:
+                return
+            if entry.version != version - 1:
+                del self._hotels[hotel_id]
+                return
+            for room_id, status in room_status.items():
+                if room_id in entry.by_id:
+                    entry.by_id[room_id]["status"] = status
+            entry.version = version
+
+    def invalidate(self, hotel_id: int) -> None:
+        with self._lock:
+            self._hotels.pop(hotel_id, None)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hotels_loaded": len(self._hotels),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+            "loads": self.loads,
+        }
+
+
+room_directory = RoomDirectory()
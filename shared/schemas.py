@@ -78,6 +78,14 @@ class BookingRead(BookingBase):
     actual_check_out_at: Optional[datetime] = None
     total_amount: float
 
+class BookingBatchResult(SQLModel):
+    index: int  # position in the request
+    customer_created: bool
+    booking: BookingRead
+
+class BookingBatchRead(SQLModel):
+    bookings: List[BookingBatchResult]
+
 class HotelRead(HotelBase):
     hotel_id: int
     phone_number: Optional[str] = None
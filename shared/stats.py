@@ -0,0 +1,469 @@
+"""
+Incrementally maintained statistics.
+
+hotel_daily_stats is a per (hotel_id, stat_date) rollup that the reporting
+service reads instead of scanning bookings. Every route that changes a booking
+applies the difference between the booking's old and new contribution in the
+same transaction, so the rollup never drifts from bookings on commit.
+
+How a booking contributes (all dates in UTC):
+- arrivals, revenue_*        on the check-in date
+- occupied_room_nights       one per night from check-in up to (not including)
+                             the check-out date; same-day stays count one night
+- departures                 on the check-out date once the booking is Completed
+Check-out date is actual_check_out_at when set, else expected_check_out_at.
+Cancelled bookings contribute nothing.
+
+Customer stay counters (customers.total_stays and customer_hotel_stats) count
+a customer's non-cancelled bookings, network-wide and per hotel, and are
+maintained by the same apply_booking_stats call.
+
+Customer ratings are kept as customers.rating_sum / rating_count (plus the
+derived average_rating), bumped by apply_feedback_stats with one UPDATE.
+"""
+from collections import defaultdict, namedtuple
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
+from shared.models import CustomerHotelStats, HotelDailyStats
+
+EXCLUDED_STATUSES = ("Cancelled",)
+
+DAILY_COUNTERS = (
+    "occupied_room_nights", "arrivals", "departures",
+    "revenue_total", "revenue_cash", "revenue_card",
+    "rating_sum", "rating_count",
+)
+
+# Just the booking fields the rollup depends on, captured before a mutation
+BookingSnapshot = namedtuple(
+    "BookingSnapshot",
+    "hotel_id customer_id check_in_at expected_check_out_at actual_check_out_at total_amount cash_amount card_amount status",
+)
+
+
+def snapshot_booking(booking) -> BookingSnapshot:
+    return BookingSnapshot(*(getattr(booking, field) for field in BookingSnapshot._fields))
+
+
+def _utc_date(value: datetime) -> date:
+    # Naive datetimes in this codebase are UTC (datetime.utcnow())
+    if value.tzinfo is None:
+        return value.date()
+    return value.astimezone(timezone.utc).date()
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value or 0))
+
+
+def _booking_contribution(booking) -> Dict[date, Dict[str, object]]:
+    if booking.status in EXCLUDED_STATUSES or booking.check_in_at is None:
+        return {}
+
+    contribution = defaultdict(lambda: defaultdict(int))
+    check_in_day = _utc_date(booking.check_in_at)
+    check_out_at = booking.actual_check_out_at or booking.expected_check_out_at
+
+    arrival = contribution[check_in_day]
+    arrival["arrivals"] += 1
+    arrival["revenue_total"] += _money(booking.total_amount)
+    arrival["revenue_cash"] += _money(booking.cash_amount)
+    arrival["revenue_card"] += _money(booking.card_amount)
+
+    nights = (_utc_date(check_out_at) - check_in_day).days if check_out_at else 0
+    for offset in range(max(nights, 1)):
+        contribution[check_in_day + timedelta(days=offset)]["occupied_room_nights"] += 1
+
+    if booking.status == "Completed" and check_out_at:
+        contribution[_utc_date(check_out_at)]["departures"] += 1
+
+    return contribution
+
+
+def _upsert_daily_deltas(session: Session, hotel_id: int, deltas: Dict[date, Dict[str, object]]) -> None:
+    rows = [
+        {"hotel_id": hotel_id, "stat_date": day, **{name: values.get(name, 0) for name in DAILY_COUNTERS}}
+        for day, values in sorted(deltas.items())
+        if any(values.values())
+    ]
+    if not rows:
+        return
+    stmt = insert(HotelDailyStats).values(rows)
+    table = HotelDailyStats.__table__
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.hotel_id, table.c.stat_date],
+        set_={name: table.c[name] + stmt.excluded[name] for name in DAILY_COUNTERS},
+    )
+    session.exec(stmt)
+
+
+def apply_booking_stats(session: Session, before: Optional[BookingSnapshot], after) -> None:
+    """
+    Moves a booking's contribution from `before` (None for a new booking) to
+    `after` (the booking as it will be committed) in hotel_daily_stats and the
+    customer stay counters.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for sign, booking in ((-1, before), (1, after)):
+        if booking is None:
+            continue
+        for day, values in _booking_contribution(booking).items():
+            for name, value in values.items():
+                deltas[day][name] += sign * value
+
+    hotel_id = (after or before).hotel_id
+    _upsert_daily_deltas(session, hotel_id, deltas)
+    apply_customer_stats(session, before, after)
+
+
+def apply_booking_stats_many(session: Session, changes) -> None:
+    """
+    apply_booking_stats for many (before, after) pairs at once: one rollup
+    upsert per hotel and one statement per counter table for new stays.
+    Cancellations still go through apply_customer_stats one by one.
+    """
+    deltas = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+    stays = defaultdict(lambda: [0, None])  # (customer_id, hotel_id) -> [stays, last_visit]
+    for before, after in changes:
+        for sign, booking in ((-1, before), (1, after)):
+            if booking is None:
+                continue
+            for day, values in _booking_contribution(booking).items():
+                for name, value in values.items():
+                    deltas[booking.hotel_id][day][name] += sign * value
+        delta = int(_counts_as_stay(after)) - int(_counts_as_stay(before))
+        if delta < 0:
+            apply_customer_stats(session, before, after)
+        elif delta > 0:
+            entry = stays[(after.customer_id, after.hotel_id)]
+            entry[0] += 1
+            entry[1] = after.check_in_at if entry[1] is None else max(entry[1], after.check_in_at)
+
+    for hotel_id, hotel_deltas in sorted(deltas.items()):
+        _upsert_daily_deltas(session, hotel_id, hotel_deltas)
+    if not stays:
+        return
+
+    table = CustomerHotelStats.__table__
+    stmt = insert(CustomerHotelStats).values([
+        {"customer_id": customer_id, "hotel_id": hotel_id, "stay_count": count, "last_visit": last_visit}
+        for (customer_id, hotel_id), (count, last_visit) in sorted(stays.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.customer_id, table.c.hotel_id],
+        set_={
+            "stay_count": table.c.stay_count + stmt.excluded.stay_count,
+            "last_visit": func.greatest(table.c.last_visit, stmt.excluded.last_visit),
+        },
+    )
+    session.exec(stmt)
+
+    totals = defaultdict(int)
+    for (customer_id, _), (count, _) in stays.items():
+        totals[customer_id] += count
+    customer_ids = sorted(totals)
+    session.exec(text("""
+        UPDATE customers c SET total_stays = c.total_stays + d.stays
+        FROM unnest(CAST(:customer_ids AS INTEGER[]), CAST(:stays AS INTEGER[])) AS d(customer_id, stays)
+        WHERE c.customer_id = d.customer_id
+    """).bindparams(customer_ids=customer_ids, stays=[totals[customer_id] for customer_id in customer_ids]))
+
+
+def _counts_as_stay(booking) -> bool:
+    return booking is not None and booking.status not in EXCLUDED_STATUSES
+
+
+def apply_customer_stats(session: Session, before: Optional[BookingSnapshot], after) -> None:
+    delta = int(_counts_as_stay(after)) - int(_counts_as_stay(before))
+    if delta == 0:
+        return
+    booking = after or before
+    keys = {"customer_id": booking.customer_id, "hotel_id": booking.hotel_id}
+
+    if delta > 0:
+        table = CustomerHotelStats.__table__
+        stmt = insert(CustomerHotelStats).values(stay_count=1, last_visit=booking.check_in_at, **keys)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.customer_id, table.c.hotel_id],
+            set_={
+                "stay_count": table.c.stay_count + 1,
+                "last_visit": func.greatest(table.c.last_visit, stmt.excluded.last_visit),
+            },
+        )
+        session.exec(stmt)
+    else:
+        # Cancellation: last_visit may have been this booking, so re-derive it
+        # from the (already flushed) bookings of this customer at this hotel
+        session.flush()
+        session.exec(text("""
+            UPDATE customer_hotel_stats SET
+                stay_count = stay_count - 1,
+                last_visit = (
+                    SELECT MAX(check_in_at) FROM bookings
+                    WHERE customer_id = :customer_id AND hotel_id = :hotel_id AND status NOT IN ('Cancelled')
+                )
+            WHERE customer_id = :customer_id AND hotel_id = :hotel_id
+        """).bindparams(**keys))
+
+    session.exec(
+        text("UPDATE customers SET total_stays = total_stays + :delta WHERE customer_id = :customer_id")
+        .bindparams(delta=delta, customer_id=booking.customer_id)
+    )
+
+
+def apply_feedback_stats(session: Session, hotel_id: int, customer_id: int, rated_at: datetime, rating: int) -> Optional[Decimal]:
+    """
+    Adds a new feedback rating to the hotel's daily rollup and the customer's
+    running totals. Returns the customer's new average_rating.
+    """
+    _upsert_daily_deltas(session, hotel_id, {_utc_date(rated_at): {"rating_sum": rating, "rating_count": 1}})
+    return session.exec(text("""
+        UPDATE customers SET
+            rating_sum = rating_sum + :rating,
+            rating_count = rating_count + 1,
+            average_rating = ROUND(CAST(rating_sum + :rating AS NUMERIC) / (rating_count + 1), 2)
+        WHERE customer_id = :customer_id
+        RETURNING average_rating
+    """).bindparams(rating=rating, customer_id=customer_id)).scalar()
+
+
+def apply_feedback_stats_many(session: Session, hotel_id: int, ratings) -> Dict[int, Decimal]:
+    """
+    apply_feedback_stats for many (customer_id, rated_at, rating) at once: one
+    rollup upsert and one grouped UPDATE of the customers' running totals.
+    Returns {customer_id: new average_rating}.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    totals = defaultdict(lambda: [0, 0])  # customer_id -> [rating_sum, rating_count]
+    for customer_id, rated_at, rating in ratings:
+        day = deltas[_utc_date(rated_at)]
+        day["rating_sum"] += rating
+        day["rating_count"] += 1
+        totals[customer_id][0] += rating
+        totals[customer_id][1] += 1
+    if not totals:
+        return {}
+
+    _upsert_daily_deltas(session, hotel_id, deltas)
+    customer_ids = sorted(totals)
+    rows = session.exec(text("""
+        UPDATE customers c SET
+            rating_sum = c.rating_sum + d.rating_sum,
+            rating_count = c.rating_count + d.rating_count,
+            average_rating = ROUND(CAST(c.rating_sum + d.rating_sum AS NUMERIC) / (c.rating_count + d.rating_count), 2)
+        FROM unnest(CAST(:customer_ids AS INTEGER[]), CAST(:sums AS INTEGER[]), CAST(:counts AS INTEGER[]))
+            AS d(customer_id, rating_sum, rating_count)
+        WHERE c.customer_id = d.customer_id
+        RETURNING c.customer_id, c.average_rating
+    """).bindparams(
+        customer_ids=customer_ids,
+        sums=[totals[customer_id][0] for customer_id in customer_ids],
+        counts=[totals[customer_id][1] for customer_id in customer_ids],
+    )).all()
+    return {row.customer_id: row.average_rating for row in rows}
+
+
+# --- Full rebuild (backfill / repair) ---
+
+# Daily contributions of the bookings and feedback matching the {bookings} and
+# {feedback} conditions, grouped per (hotel_id, stat_date)
+DAILY_CONTRIBUTIONS_SQL = """
+SELECT hotel_id, stat_date,
+       SUM(occupied_room_nights), SUM(arrivals), SUM(departures),
+       SUM(revenue_total), SUM(revenue_cash), SUM(revenue_card),
+       SUM(rating_sum), SUM(rating_count)
+FROM (
+    WITH b AS (
+        SELECT hotel_id, status, total_amount, cash_amount, card_amount,
+               (check_in_at AT TIME ZONE 'UTC')::date AS check_in_day,
+               (COALESCE(actual_check_out_at, expected_check_out_at) AT TIME ZONE 'UTC')::date AS check_out_day
+        FROM bookings
+        WHERE status NOT IN ('Cancelled') AND check_in_at IS NOT NULL
+          AND {bookings}
+    )
+    SELECT hotel_id, check_in_day AS stat_date, 0 AS occupied_room_nights, 1 AS arrivals, 0 AS departures,
+           COALESCE(total_amount, 0) AS revenue_total, COALESCE(cash_amount, 0) AS revenue_cash,
+           COALESCE(card_amount, 0) AS revenue_card, 0 AS rating_sum, 0 AS rating_count
+    FROM b
+    UNION ALL
+    SELECT hotel_id, night::date, 1, 0, 0, 0, 0, 0, 0, 0
+    FROM b, generate_series(check_in_day, GREATEST(check_out_day - 1, check_in_day), interval '1 day') AS night
+    UNION ALL
+    SELECT hotel_id, check_out_day, 0, 0, 1, 0, 0, 0, 0, 0
+    FROM b WHERE status = 'Completed' AND check_out_day IS NOT NULL
+    UNION ALL
+    SELECT hotel_id, (created_at AT TIME ZONE 'UTC')::date, 0, 0, 0, 0, 0, 0, rating, 1
+    FROM customerfeedbacks
+    WHERE rating IS NOT NULL AND created_at IS NOT NULL
+      AND {feedback}
+) AS parts
+GROUP BY hotel_id, stat_date
+"""
+
+REBUILD_DAILY_STATS_SQL = """
+INSERT INTO hotel_daily_stats (
+    hotel_id, stat_date, occupied_room_nights, arrivals, departures,
+    revenue_total, revenue_cash, revenue_card, rating_sum, rating_count
+)""" + DAILY_CONTRIBUTIONS_SQL.format(
+    bookings="(CAST(:hotel_id AS INTEGER) IS NULL OR hotel_id = :hotel_id)",
+    feedback="(CAST(:hotel_id AS INTEGER) IS NULL OR hotel_id = :hotel_id)",
+)
+
+
+def rebuild_daily_stats(session: Session, hotel_id: Optional[int] = None) -> int:
+    """
+    Recomputes hotel_daily_stats from bookings and feedback (one hotel, or all).
+    The table lock makes concurrent incremental updates wait for the rebuild,
+    so none of them are lost or double counted. Caller commits.
+    """
+    session.exec(text("LOCK TABLE hotel_daily_stats IN EXCLUSIVE MODE"))
+    delete_sql = "DELETE FROM hotel_daily_stats"
+    if hotel_id is not None:
+        delete_sql += " WHERE hotel_id = :hotel_id"
+    session.exec(text(delete_sql).bindparams(**({"hotel_id": hotel_id} if hotel_id is not None else {})))
+    result = session.exec(text(REBUILD_DAILY_STATS_SQL).bindparams(hotel_id=hotel_id))
+    return result.rowcount
+
+
+RECONCILE_CUSTOMER_HOTEL_STATS_SQL = """
+WITH expected AS (
+    SELECT customer_id, hotel_id, COUNT(*) AS stay_count, MAX(check_in_at) AS last_visit
+    FROM bookings
+    WHERE status NOT IN ('Cancelled')
+      AND (CAST(:customer_id AS INTEGER) IS NULL OR customer_id = :customer_id)
+    GROUP BY customer_id, hotel_id
+)
+INSERT INTO customer_hotel_stats AS s (customer_id, hotel_id, stay_count, last_visit)
+SELECT customer_id, hotel_id, stay_count, last_visit FROM expected
+ON CONFLICT (customer_id, hotel_id) DO UPDATE
+SET stay_count = EXCLUDED.stay_count, last_visit = EXCLUDED.last_visit
+WHERE (s.stay_count, s.last_visit) IS DISTINCT FROM (EXCLUDED.stay_count, EXCLUDED.last_visit)
+"""
+
+DELETE_ORPHAN_CUSTOMER_HOTEL_STATS_SQL = """
+DELETE FROM customer_hotel_stats s
+WHERE (CAST(:customer_id AS INTEGER) IS NULL OR s.customer_id = :customer_id)
+  AND NOT EXISTS (
+      SELECT 1 FROM bookings b
+      WHERE b.customer_id = s.customer_id AND b.hotel_id = s.hotel_id AND b.status NOT IN ('Cancelled')
+  )
+"""
+
+RECONCILE_CUSTOMER_TOTALS_SQL = """
+UPDATE customers c SET total_stays = t.stays
+FROM (
+    SELECT c2.customer_id, COALESCE(SUM(s.stay_count), 0) AS stays
+    FROM customers c2
+    LEFT JOIN customer_hotel_stats s ON s.customer_id = c2.customer_id
+    WHERE (CAST(:customer_id AS INTEGER) IS NULL OR c2.customer_id = :customer_id)
+    GROUP BY c2.customer_id
+) t
+WHERE t.customer_id = c.customer_id AND c.total_stays IS DISTINCT FROM t.stays
+"""
+
+
+def reconcile_customer_stats(session: Session, customer_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Fixes drift in the customer stay counters (one customer, or all) and
+    returns how many rows were corrected. Holding the table lock means
+    in-flight incremental updates either finish first or wait. Caller commits.
+    """
+    session.exec(text("LOCK TABLE customer_hotel_stats IN EXCLUSIVE MODE"))
+    fixed = {}
+    for name, sql in (
+        ("hotel_rows_upserted", RECONCILE_CUSTOMER_HOTEL_STATS_SQL),
+        ("hotel_rows_deleted", DELETE_ORPHAN_CUSTOMER_HOTEL_STATS_SQL),
+        ("customer_totals_fixed", RECONCILE_CUSTOMER_TOTALS_SQL),
+    ):
+        fixed[name] = session.exec(text(sql).bindparams(customer_id=customer_id)).rowcount
+    return fixed
+
+
+# --- Bookings inserted in bulk (imports) ---
+
+ADD_BOOKINGS_DAILY_STATS_SQL = """
+INSERT INTO hotel_daily_stats AS d (
+    hotel_id, stat_date, occupied_room_nights, arrivals, departures,
+    revenue_total, revenue_cash, revenue_card, rating_sum, rating_count
+)""" + DAILY_CONTRIBUTIONS_SQL.format(
+    bookings="booking_id = ANY(CAST(:booking_ids AS BIGINT[]))",
+    feedback="FALSE",
+) + """ON CONFLICT (hotel_id, stat_date) DO UPDATE SET
+""" + ",\n".join(f"    {name} = d.{name} + EXCLUDED.{name}" for name in DAILY_COUNTERS)
+
+ADD_BOOKINGS_CUSTOMER_HOTEL_STATS_SQL = """
+INSERT INTO customer_hotel_stats AS s (customer_id, hotel_id, stay_count, last_visit)
+SELECT customer_id, hotel_id, COUNT(*), MAX(check_in_at)
+FROM bookings
+WHERE booking_id = ANY(CAST(:booking_ids AS BIGINT[])) AND status NOT IN ('Cancelled')
+GROUP BY customer_id, hotel_id
+ON CONFLICT (customer_id, hotel_id) DO UPDATE
+SET stay_count = s.stay_count + EXCLUDED.stay_count,
+    last_visit = GREATEST(s.last_visit, EXCLUDED.last_visit)
+"""
+
+ADD_BOOKINGS_CUSTOMER_TOTALS_SQL = """
+UPDATE customers c SET total_stays = c.total_stays + t.stays
+FROM (
+    SELECT customer_id, COUNT(*) AS stays
+    FROM bookings
+    WHERE booking_id = ANY(CAST(:booking_ids AS BIGINT[])) AND status NOT IN ('Cancelled')
+    GROUP BY customer_id
+) t
+WHERE t.customer_id = c.customer_id
+"""
+
+
+def apply_new_bookings_stats(session: Session, booking_ids: List[int]) -> None:
+    """
+    apply_booking_stats(session, None, booking) for bookings already inserted
+    (e.g. by an import), computed in SQL instead of loading them. Like the
+    incremental helpers it only touches the affected rows and takes no table
+    lock. Caller commits.
+    """
+    if not booking_ids:
+        return
+    for sql in (ADD_BOOKINGS_DAILY_STATS_SQL, ADD_BOOKINGS_CUSTOMER_HOTEL_STATS_SQL, ADD_BOOKINGS_CUSTOMER_TOTALS_SQL):
+        session.exec(text(sql).bindparams(booking_ids=booking_ids))
+
+
+# --- Customer rating consistency ---
+
+CUSTOMER_RATING_DRIFT_SQL = """
+SELECT c.customer_id, c.rating_sum, c.rating_count,
+       COALESCE(f.rating_sum, 0) AS expected_sum, COALESCE(f.rating_count, 0) AS expected_count
+FROM customers c
+LEFT JOIN (
+    SELECT customer_id, SUM(rating) AS rating_sum, COUNT(*) AS rating_count
+    FROM customerfeedbacks
+    WHERE rating IS NOT NULL
+    GROUP BY customer_id
+) f ON f.customer_id = c.customer_id
+WHERE (c.rating_sum, c.rating_count) IS DISTINCT FROM (COALESCE(f.rating_sum, 0), COALESCE(f.rating_count, 0))
+ORDER BY c.customer_id
+"""
+
+
+def check_customer_ratings(session: Session, fix: bool = False) -> list:
+    """
+    Returns customers whose rating_sum/rating_count disagree with their
+    feedback rows. With fix=True also rewrites them (and average_rating);
+    the caller commits.
+    """
+    drifted = session.exec(text(CUSTOMER_RATING_DRIFT_SQL)).all()
+    if fix:
+        for row in drifted:
+            session.exec(text("""
+                UPDATE customers SET
+                    rating_sum = :rating_sum,
+                    rating_count = :rating_count,
+                    average_rating = CASE WHEN :rating_count > 0
+                        THEN ROUND(CAST(:rating_sum AS NUMERIC) / :rating_count, 2)
+                        ELSE average_rating END
+                WHERE customer_id = :customer_id
+            """).bindparams(customer_id=row.customer_id, rating_sum=row.expected_sum, rating_count=row.expected_count))
+    return [dict(row._mapping) for row in drifted]
@@ -1,7 +1,21 @@
-from datetime import datetime
+from datetime import date, datetime
+from sqlalchemy import text
 from sqlmodel import Session, select
 from typing import List
+from sqlalchemy.exc import IntegrityError
 from shared.models import Bookings, Rooms
+from shared.availability import availability_engine
+
+# EXCLUDE constraint on bookings (room_id, stay) for Active bookings; see the
+# 3f1b7c2d9e10 migration. Postgres reports violations as SQLSTATE 23P01.
+BOOKING_OVERLAP_CONSTRAINT = "excl_bookings_room_stay"
+
+def is_booking_overlap(error: IntegrityError) -> bool:
+    """
+    True if an IntegrityError was raised by the booking overlap constraint
+    (i.e. the room is already booked for an overlapping stay).
+    """
+    return BOOKING_OVERLAP_CONSTRAINT in str(error.orig)
 
 def is_room_available(
     session: Session, 
@@ -10,22 +24,14 @@ def is_room_available(
     expected_check_out_at: datetime
 ) -> bool:
     """
-    Returns True if the room is available (not booked) for the given time range.
+    Returns True if the room is available (not booked) for the given time range,
+    False for a room that doesn't exist. Answered from the in-memory availability index (see shared/availability.py).
     """
     # Overlap logic: 
     # Existing Booking [Start, End] overlaps with Request [ReqStart, ReqEnd] if:
     # ExistingStart < ReqEnd AND ExistingEnd > ReqStart
     # We only care about active bookings.
-    
-    query = select(Bookings).where(
-        Bookings.room_id == room_id,
-        Bookings.status == "Active",
-        Bookings.check_in_at < expected_check_out_at,
-        Bookings.expected_check_out_at > check_in_at
-    )
-    # If any booking is found, it's NOT available
-    existing_booking = session.exec(query).first()
-    return existing_booking is None
+    return availability_engine.is_room_available(session, room_id, check_in_at, expected_check_out_at)
 
 def find_available_rooms(
     session: Session,
@@ -35,6 +41,18 @@ def find_available_rooms(
 ) -> List[Rooms]:
     """
     Returns a list of Rooms for the given hotel that are available for the date range.
+    Answered from the in-memory availability index (see shared/availability.py).
+    """
+    return availability_engine.find_available_rooms(session, hotel_id, check_in_at, expected_check_out_at)
+
+def find_available_rooms_sql(
+    session: Session,
+    hotel_id: int,
+    check_in_at: datetime,
+    expected_check_out_at: datetime
+) -> List[Rooms]:
+    """
+    Direct SQL version of find_available_rooms (kept as the benchmark baseline).
     """
     # 1. Get all rooms for the hotel
     all_rooms = session.exec(select(Rooms).where(Rooms.hotel_id == hotel_id)).all()
@@ -52,3 +70,108 @@ def find_available_rooms(
     # 3. Filter
     available_rooms = [r for r in all_rooms if r.room_id not in booked_set]
     return available_rooms
+
+# One row per room; `first_days`/`last_days` pair up into the inclusive day
+# offsets (from :start) covered by each Active stay overlapping the window. A
+# stay covers every UTC day whose [00:00, 24:00) it overlaps.
+# Day boundaries are midnight UTC whatever the session TimeZone: a date is made
+# a timestamp first, as date AT TIME ZONE would go through the session zone
+ROOM_CALENDAR_SQL = """
+SELECT r.room_id, r.room_number, r.room_type, r.status,
+       COALESCE(array_agg(o.first_day) FILTER (WHERE o.first_day IS NOT NULL), '{}') AS first_days,
+       COALESCE(array_agg(o.last_day) FILTER (WHERE o.first_day IS NOT NULL), '{}') AS last_days,
+       (SELECT availability_version FROM hotels WHERE hotel_id = :hotel_id) AS version
+FROM rooms r
+LEFT JOIN (
+    SELECT b.room_id,
+           GREATEST((lower(b.stay) AT TIME ZONE 'UTC')::date, CAST(:start AS date)) - CAST(:start AS date) AS first_day,
+           LEAST(((upper(b.stay) - interval '1 microsecond') AT TIME ZONE 'UTC')::date, CAST(:end AS date) - 1) - CAST(:start AS date) AS last_day
+    FROM bookings b
+    WHERE b.hotel_id = :hotel_id
+      AND b.status = 'Active'
+      AND b.stay && tstzrange(CAST(:start AS date)::timestamp AT TIME ZONE 'UTC', CAST(:end AS date)::timestamp AT TIME ZONE 'UTC')
+) o ON o.room_id = r.room_id
+WHERE r.hotel_id = :hotel_id
+GROUP BY r.room_id
+ORDER BY r.room_id
+"""
+
+def room_occupancy_calendar(
+    session: Session,
+    hotel_id: int,
+    start: date,
+    end: date
+) -> dict:
+    """
+    Occupancy for every room of the hotel over the days [start, end), in one query.
+    Each room gets a bitmap string with one character per day: "1" if an Active
+    booking overlaps that UTC day, else "0". `version` is the hotel's
+    availability_version, so pollers can skip unchanged calendars.
+    """
+    days = (end - start).days
+    rows = session.exec(text(ROOM_CALENDAR_SQL).bindparams(hotel_id=hotel_id, start=start, end=end)).all()
+    rooms = []
+    for row in rows:
+        bitmap = ["0"] * days
+        for first, last in zip(row.first_days, row.last_days):
+            bitmap[first:last + 1] = "1" * (last + 1 - first)
+        rooms.append({
+            "room_id": row.room_id,
+            "room_number": row.room_number,
+            "room_type": row.room_type,
+            "status": row.status,
+            "occupancy": "".join(bitmap),
+        })
+    return {
+        "start": start,
+        "end": end,
+        "days": days,
+        "version": rows[0].version if rows else None,
+        "rooms": rooms,
+    }
+
+# For each requested stay (idx, room_id, [check_in_at, check_out_at)): whether
+# an Active booking already overlaps it, and the lowest earlier idx in the same
+# request that overlaps it. Uses the same range as excl_bookings_room_stay.
+BATCH_OVERLAP_SQL = """
+WITH items AS (
+    SELECT * FROM unnest(
+        CAST(:idx AS INTEGER[]), CAST(:room_ids AS INTEGER[]),
+        CAST(:check_ins AS TIMESTAMPTZ[]), CAST(:check_outs AS TIMESTAMPTZ[])
+    ) AS t(idx, room_id, check_in_at, check_out_at)
+)
+SELECT i.idx,
+       EXISTS (
+           SELECT 1 FROM bookings b
+           WHERE b.room_id = i.room_id AND b.status = 'Active'
+             AND b.stay && tstzrange(i.check_in_at, i.check_out_at, '[)')
+       ) AS booked,
+       (
+           SELECT MIN(j.idx) FROM items j
+           WHERE j.room_id = i.room_id AND j.idx < i.idx
+             AND j.check_in_at < i.check_out_at AND j.check_out_at > i.check_in_at
+       ) AS clashes_with
+FROM items i
+"""
+
+def find_batch_overlaps(session: Session, stays: List[tuple]) -> dict:
+    """
+    Checks many requested stays, given as (idx, room_id, check_in_at,
+    expected_check_out_at), in one statement: against Active bookings and
+    against each other. Returns {idx: reason} for the ones that would be
+    rejected by the overlap constraint.
+    """
+    stays = [stay for stay in stays if stay[2] < stay[3]]  # empty stays are not constrained
+    if not stays:
+        return {}
+    idx, room_ids, check_ins, check_outs = (list(column) for column in zip(*stays))
+    rows = session.exec(text(BATCH_OVERLAP_SQL).bindparams(
+        idx=idx, room_ids=room_ids, check_ins=check_ins, check_outs=check_outs
+    )).all()
+    overlaps = {}
+    for row in rows:
+        if row.booked:
+            overlaps[row.idx] = "Room is already booked for these dates"
+        elif row.clashes_with is not None:
+            overlaps[row.idx] = f"Overlaps item {row.clashes_with} of this batch"
+    return overlaps
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# shared.database builds its engines at import time (without connecting)
+os.environ.setdefault("DATABASE_URL", "postgresql://postgres@localhost/hms")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
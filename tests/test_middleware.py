@@ -0,0 +1,64 @@
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from shared.metrics import RequestMetrics
+from shared.middleware import UNMATCHED_ROUTE, RequestMetricsMiddleware, route_template
+
+
+def make_app(metrics: RequestMetrics) -> FastAPI:
+    router = APIRouter()
+
+    @router.get("/room/{room_id}")
+    def get_room(room_id: int):
+        return {"room_id": room_id}
+
+    @router.get("/")
+    def list_rooms():
+        return []
+
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware, metrics=metrics)
+    app.include_router(router, prefix="/bookings")
+
+    @app.get("/calendar/{hotel_id}/days")
+    def calendar(hotel_id: int):
+        return {}
+
+    return app
+
+
+def request_labels(metrics: RequestMetrics) -> list:
+    return [line for line in metrics.render_prometheus().splitlines() if line.startswith("http_requests_total{")]
+
+
+def test_path_parameter_route_is_labelled_with_its_prefixed_template():
+    metrics = RequestMetrics()
+    client = TestClient(make_app(metrics))
+    client.get("/bookings/room/5")
+    client.get("/bookings/room/6")
+    assert request_labels(metrics) == ['http_requests_total{method="GET",route="/bookings/room/{room_id}",status="200"} 2']
+
+
+def test_router_root_and_app_routes_keep_their_templates():
+    metrics = RequestMetrics()
+    client = TestClient(make_app(metrics))
+    client.get("/bookings/")
+    client.get("/calendar/3/days")
+    assert request_labels(metrics) == [
+        'http_requests_total{method="GET",route="/bookings/",status="200"} 1',
+        'http_requests_total{method="GET",route="/calendar/{hotel_id}/days",status="200"} 1',
+    ]
+
+
+def test_unknown_paths_share_one_series():
+    metrics = RequestMetrics()
+    client = TestClient(make_app(metrics))
+    client.get("/nope/1")
+    client.get("/nope/2")
+    assert request_labels(metrics) == [f'http_requests_total{{method="GET",route="{UNMATCHED_ROUTE}",status="404"}} 2']
+
+
+def test_route_is_matched_when_routing_left_no_route_in_the_scope():
+    app = make_app(RequestMetrics())
+    scope = {"type": "http", "app": app, "method": "GET", "path": "/calendar/9/days", "root_path": "", "headers": [], "query_string": b""}
+    assert route_template(scope) == "/calendar/{hotel_id}/days"
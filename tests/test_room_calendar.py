@@ -0,0 +1,71 @@
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+
+from shared.database import engine
+from shared.utils import room_occupancy_calendar
+
+START = date(2031, 3, 10)
+END = date(2031, 3, 12)
+
+# [check_in, check_out) in UTC -> expected occupancy over [START, END)
+STAYS = {
+    "early": (datetime(2031, 3, 10, 1, tzinfo=timezone.utc), datetime(2031, 3, 10, 5, tzinfo=timezone.utc), "10"),
+    "late": (datetime(2031, 3, 11, 20, tzinfo=timezone.utc), datetime(2031, 3, 12, 4, tzinfo=timezone.utc), "01"),
+    "before": (datetime(2031, 3, 9, 12, tzinfo=timezone.utc), datetime(2031, 3, 9, 20, tzinfo=timezone.utc), "00"),
+    "after": (datetime(2031, 3, 12, 2, tzinfo=timezone.utc), datetime(2031, 3, 12, 9, tzinfo=timezone.utc), "00"),
+}
+
+
+@pytest.fixture
+def session():
+    try:
+        with Session(engine) as session:
+            session.exec(text("SELECT 1"))
+            yield session
+            session.rollback()
+    except OperationalError:
+        pytest.skip("needs the Postgres database in DATABASE_URL")
+
+
+def seed_hotel(session: Session) -> int:
+    hotel_id = session.exec(text("""
+        INSERT INTO hotels (name, address, terms_and_conditions, subscription_valid)
+        VALUES ('Calendar Test Inn', 'a', 't', true) RETURNING hotel_id
+    """)).scalar()
+    user_id = session.exec(text("""
+        INSERT INTO hotelusers (hotel_id, username, full_name, password_hash, is_active)
+        VALUES (:hotel_id, 'calendar-test@example.com', 'Test', 'x', true) RETURNING user_id
+    """).bindparams(hotel_id=hotel_id)).scalar()
+    customer_id = session.exec(text("""
+        INSERT INTO customers (first_name, last_name, gov_id) VALUES ('Cal', 'Endar', 'CAL-TEST-1') RETURNING customer_id
+    """)).scalar()
+    for number, (check_in_at, check_out_at, _) in STAYS.items():
+        room_id = session.exec(text("""
+            INSERT INTO rooms (hotel_id, room_number, room_type, rate, status)
+            VALUES (:hotel_id, :number, 'D', 50, 'A') RETURNING room_id
+        """).bindparams(hotel_id=hotel_id, number=number)).scalar()
+        session.exec(text("""
+            INSERT INTO bookings (hotel_id, customer_id, room_id, created_by_user_id, num_guests,
+                                  check_in_at, expected_check_out_at, total_amount, status)
+            VALUES (:hotel_id, :customer_id, :room_id, :user_id, 1, :check_in_at, :check_out_at, 100, 'Active')
+        """).bindparams(
+            hotel_id=hotel_id, customer_id=customer_id, room_id=room_id, user_id=user_id,
+            check_in_at=check_in_at, check_out_at=check_out_at,
+        ))
+    return hotel_id
+
+
+@pytest.mark.parametrize("time_zone", ["UTC", "Pacific/Honolulu", "Pacific/Kiritimati", "Asia/Kolkata"])
+def test_calendar_days_are_utc_days_whatever_the_session_time_zone(session, time_zone):
+    hotel_id = seed_hotel(session)
+    session.exec(text(f"SET LOCAL TIME ZONE '{time_zone}'"))
+
+    calendar = room_occupancy_calendar(session, hotel_id, START, END)
+
+    assert {room["room_number"]: room["occupancy"] for room in calendar["rooms"]} == {
+        number: expected for number, (_, _, expected) in STAYS.items()
+    }